@@ -0,0 +1 @@
+"""Utilidades offline sobre el corpus generado (figures/*, prompts/*)."""
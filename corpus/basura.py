@@ -0,0 +1,144 @@
+"""Filtro de basura y fugas en la salida del modelo.
+
+qwen2.5 a veces mezcla caracteres chinos (u otras escrituras), se pasa al
+inglés, añade comentarios ("Nota:", "Análisis:", "Aquí tienes..."), numera
+los versos, escribe más o menos versos de la cuenta o entrecomilla la
+palabra objetivo. Todo eso se detecta con una sola pasada de una expresión
+precompilada por poema, así que cuesta lo mismo en generación que sobre los
+lotes ya escritos.
+
+Uso (desde la raíz del repo):
+    python -m corpus.basura
+    python -m corpus.basura figures/ALITERACION --salida basura.jsonl
+"""
+import os
+import re
+import json
+import argparse
+from collections import Counter
+from functools import lru_cache
+
+# --- CONFIGURACIÓN ---
+VERSOS = 4
+MIN_INGLES = 2     # Palabras inglesas inequívocas a partir de las cuales el poema está en inglés
+
+# Una sola alternancia con grupos con nombre: el primer grupo que casa da el motivo
+RE_BASURA = re.compile(r"""
+    (?P<cjk>[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿＀-￯])
+  | (?P<escritura>[Ͱ-ϿЀ-ӿ֐-ۿ฀-๿])
+  | (?P<fuga>(?:^|\n)[\W_]*(?:
+        (?:nota|an[aá]lisis|explicaci[oó]n|traducci[oó]n|poema|verso\s*\d*|t[ií]tulo|
+           palabra\s+objetivo|contexto|enfoque|note|analysis|translation)\s*:
+      | aqu[ií]\s+tienes | espero\s+que | entiendo\s+tu | lo\s+siento
+      | como\s+(?:modelo|asistente|ia)\b ))
+  | (?P<numerado>(?:^|\n)\s*(?:\d+\s*[.):\-]|\(\d+\)))
+  | (?P<ingles>\b(?:the|and|with|you|your|is|are|this|that|of|my|from|through|into|
+        where|when|light|night|heart|soul)\b)
+""", re.IGNORECASE | re.VERBOSE)
+
+MOTIVOS = {
+    "cjk": "caracteres CJK",
+    "escritura": "otra escritura",
+    "fuga": "comentario o instrucción filtrada",
+    "numerado": "versos numerados",
+    "ingles": "texto en inglés",
+}
+
+
+@lru_cache(maxsize=4096)
+def _re_entrecomillada(palabra):
+    return re.compile(r"[\"'«“‘*]\s*%s\s*[\"'»”’*]" % re.escape(palabra), re.IGNORECASE)
+
+
+def revisar_basura(poema, palabra=None, versos=VERSOS, final=True):
+    """Motivo del primer problema encontrado en `poema`, o None si está limpio.
+
+    Con `final=False` (texto aún generándose) no se juzga el número de versos
+    ni la cola de la última línea.
+    """
+    ingles = 0
+    for encontrado in RE_BASURA.finditer(poema):
+        tipo = encontrado.lastgroup
+        if tipo != "ingles":
+            return MOTIVOS[tipo]
+        ingles += 1
+        if ingles >= MIN_INGLES:
+            return MOTIVOS["ingles"]
+
+    if palabra and _re_entrecomillada(palabra).search(poema):
+        return "palabra clave entrecomillada"
+
+    if final and versos:
+        n = sum(1 for linea in poema.split('\n') if linea.strip())
+        if n != versos:
+            return f"{'más' if n > versos else 'menos'} de {versos} versos"
+    return None
+
+
+def regla_streaming(palabra=None, versos=VERSOS):
+    """La misma revisión como regla de generacion.vigilancia (solo sobre líneas completas)."""
+    def regla(texto, final):
+        if not final:
+            texto = texto[:texto.rfind('\n') + 1]
+        return revisar_basura(texto, palabra, versos, final)
+    return regla
+
+
+class FiltroBasura:
+    """Filtro en streaming: deja pasar los poemas limpios y cuenta los descartes por motivo."""
+
+    def __init__(self, versos=VERSOS):
+        self.versos = versos
+        self.revisados = 0
+        self.motivos = Counter()
+
+    def revisar(self, poema, palabra=None):
+        self.revisados += 1
+        motivo = revisar_basura(poema, palabra, self.versos)
+        if motivo:
+            self.motivos[motivo] += 1
+        return motivo
+
+    def filtrar(self, pares):
+        """Generador sobre (palabra, poema): devuelve solo los pares limpios."""
+        for palabra, poema in pares:
+            if self.revisar(poema, palabra) is None:
+                yield palabra, poema
+
+    def resumen(self):
+        descartes = sum(self.motivos.values())
+        detalle = ", ".join(f"{m}: {n}" for m, n in self.motivos.most_common()) or "ninguno"
+        return f"Basura: {descartes}/{self.revisados} descartados ({detalle})"
+
+
+def main():
+    from corpus.validar import RAICES, buscar_archivos, poemas_de_archivo
+
+    parser = argparse.ArgumentParser(description="Cuenta basura y fugas del modelo en los lotes generados")
+    parser.add_argument("raices", nargs="*", default=RAICES, help="Carpetas a recorrer")
+    parser.add_argument("--versos", type=int, default=VERSOS, help="Versos exactos por poema (0 para no exigirlo)")
+    parser.add_argument("--salida", help="JSONL con cada poema descartado y su motivo")
+    args = parser.parse_args()
+
+    filtros = {}
+    f_salida = open(args.salida, 'w', encoding='utf-8') if args.salida else None
+    try:
+        for figura, ruta in buscar_archivos(args.raices):
+            filtro = filtros.setdefault(figura, FiltroBasura(args.versos))
+            for indice, (palabra, poema) in enumerate(poemas_de_archivo(ruta)):
+                motivo = filtro.revisar(poema, palabra)
+                if motivo and f_salida:
+                    f_salida.write(json.dumps({"archivo": ruta, "indice": indice, "palabra": palabra,
+                                               "motivo": motivo, "poema": poema}, ensure_ascii=False) + "\n")
+    finally:
+        if f_salida:
+            f_salida.close()
+
+    for figura, filtro in sorted(filtros.items()):
+        print(f"{figura}: {filtro.resumen()}")
+    if f_salida:
+        print(f"✓ Descartes guardados en {os.path.abspath(args.salida)}")
+
+
+if __name__ == "__main__":
+    main()
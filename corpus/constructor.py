@@ -0,0 +1,198 @@
+"""Filtros comunes para construir los datasets de entrenamiento.
+
+Los phrase.py de cada figura y corpus.dataset pasan cada lote por los mismos
+pasos: largo mínimo, veredicto del juez (generacion.juez), métrica, casi
+duplicados por figura y relevancia semántica; lo que queda se escribe en
+streaming con EscritorDataset. Cada phrase.py solo sabe dónde están sus
+lotes y el nombre de su figura:
+
+    constructor = ConstructorDataset("dataset_final_simil")
+    for lote_id, archivo_palabras, archivos_poemas in ...:
+        constructor.procesar_lote("simil", lote_id, archivos_poemas, archivo_palabras)
+    constructor.cerrar()
+    print(constructor.resumen())
+
+La parte cara de un lote (leer, alinear con sus palabras, sílabas y firmas
+MinHash) está en preparar_lote, que corpus.dataset reparte entre procesos:
+recibe y devuelve rutas, y deja el resultado en el shard de caché del lote
+(corpus.manifiesto), que solo se recalcula si sus archivos cambiaron. El
+proceso principal carga los lotes de uno en uno, así que la memoria no
+crece con el corpus; solo lo hace el índice de duplicados (una firma por
+poema aceptado).
+"""
+import os
+from collections import Counter, defaultdict
+
+from corpus.duplicados import NUM_PERM, TAM_SHINGLE, DetectorDuplicados
+from corpus.escritor import EscritorDataset
+from corpus.lector import alinear, leer_poemas
+from corpus.manifiesto import Manifiesto, cargar_cache, guardar_cache
+from corpus.silabas import medidas
+from corpus.tokens import EOS
+from generacion.juez import cargar_veredictos, huella
+
+# --- CONFIGURACIÓN ---
+# Las entradas se escriben según salen (JSONL); añadir "parquet" o "arrow" para shards con memory-map
+FORMATOS_SALIDA = ("jsonl",)
+MIN_CARACTERES = 10      # Los "poemas" más cortos son basura de la generación
+# Poemas casi idénticos (Jaccard ≥ umbral) de la misma figura solo entran una vez
+UMBRAL_DUPLICADOS = 0.8
+# (mín, máx) sílabas métricas por verso; None para no filtrar por métrica
+METRICA = None
+# Similitud fastText mínima entre poema y palabra clave; None para no filtrar
+UMBRAL_RELEVANCIA = None
+# Descartar los poemas que el juez (python -m generacion.juez) marcó como inválidos
+USAR_JUEZ = True
+# Sube cuando cambia cómo se sacan los registros de un lote: invalida los shards de caché
+VERSION_REGISTROS = 3
+
+_detector = None
+
+
+def texto_entrenamiento(figura, palabra, poema, eos=EOS):
+    # El mismo prompt que usa models/LoRa/switch.py al generar
+    return f"""Escribe un poema usando la figura retórica "{figura}" con la palabra "{palabra}".
+Poema:
+{poema}
+{eos}"""
+
+
+def leer_palabras(archivo_palabras):
+    with open(archivo_palabras, 'r', encoding='utf-8', errors='ignore') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _firma(poema):
+    global _detector
+    if _detector is None:
+        # Misma semilla que los detectores de ConstructorDataset: las firmas son comparables
+        _detector = DetectorDuplicados()
+    return _detector.firma(poema)
+
+
+def preparar_lote(tarea):
+    """Lectura de un lote, en serie o en el pool de corpus.dataset.
+
+    Si el lote cambió, escribe su shard de caché: registros [palabra, poema,
+    sílabas] y sus firmas MinHash. Devuelve la ruta del shard.
+    """
+    cache, rutas, archivo_palabras, vigente = tarea
+    if not vigente:
+        # Cada poema va con la palabra de su encabezado ======[PALABRA]
+        # (o, en los dialectos sin encabezado, con la de su bloque)
+        palabras = leer_palabras(archivo_palabras) if archivo_palabras else []
+        registros = [[palabra, poema, medidas(poema)]
+                     for palabra, poema in alinear(palabras, leer_poemas(rutas))]
+        guardar_cache(cache, registros, [_firma(poema) for _, poema, _ in registros])
+    return cache
+
+
+class ConstructorDataset:
+    """Filtra lotes de poemas y escribe sus entradas en <salida>.jsonl (y shards, si se piden).
+
+    Con `columna_figura` cada entrada lleva también el nombre de su figura,
+    para un dataset con varias.
+    """
+
+    def __init__(self, salida, formatos=FORMATOS_SALIDA, metrica=METRICA, umbral_relevancia=UMBRAL_RELEVANCIA,
+                 usar_juez=USAR_JUEZ, umbral_duplicados=UMBRAL_DUPLICADOS, columna_figura=False):
+        self.escritor = EscritorDataset(salida, formatos)
+        # Tamaño y hash de los archivos de cada lote: solo se releen los que cambiaron
+        self.manifiesto = Manifiesto(salida + ".manifiesto.json",
+                                     {"num_perm": NUM_PERM, "tam_shingle": TAM_SHINGLE,
+                                      "registros": VERSION_REGISTROS})
+        self.metrica = metrica
+        self.umbral_relevancia = umbral_relevancia
+        self.usar_juez = usar_juez
+        self.columna_figura = columna_figura
+        self.detectores = defaultdict(lambda: DetectorDuplicados(umbral_duplicados))
+        self.por_figura = Counter()
+        self.conteo = Counter()
+        self.relevancia = None
+        if umbral_relevancia is not None:
+            from corpus.relevancia import Relevancia
+            self.relevancia = Relevancia()
+
+    def tarea(self, clave, rutas, archivo_palabras=None):
+        """Argumento de preparar_lote para el lote `clave`: solo rutas y si su caché sigue valiendo."""
+        fuentes = ([archivo_palabras] if archivo_palabras else []) + list(rutas)
+        vigente = self.manifiesto.vigente(clave, fuentes)
+        return self.manifiesto.ruta_cache(clave), rutas, archivo_palabras, vigente
+
+    def agregar_lote(self, figura, clave, rutas, cache, archivo_palabras=None):
+        """Filtra y escribe el lote preparado en el shard `cache`; devuelve (sus registros, entradas escritas)."""
+        self.manifiesto.actualizar(clave)
+        registros, firmas = cargar_cache(cache)
+
+        veredictos = {}
+        if self.usar_juez:
+            for ruta in rutas:
+                veredictos.update(cargar_veredictos(ruta))
+
+        entradas, pares = [], []   # pares: (poema, palabra) de cada entrada, para puntuarlas de una vez
+        sin_palabra = 0
+        for (palabra, poema, silabas), firma in zip(registros, firmas):
+            if palabra is None:
+                sin_palabra += 1
+                continue
+            if len(poema) < MIN_CARACTERES:
+                continue
+            if veredictos.get(huella(poema)) is False:
+                self.conteo["rechazados por el juez"] += 1
+                continue
+            if self.metrica and not all(self.metrica[0] <= n <= self.metrica[1] for n in silabas):
+                self.conteo[f"fuera de métrica {self.metrica}"] += 1
+                continue
+            if self.detectores[figura].agregar(poema, firma) is not None:
+                continue
+            entrada = {"text": texto_entrenamiento(figura, palabra, poema), "silabas": silabas}
+            if self.columna_figura:
+                entrada = {"figura": figura, **entrada}
+            entradas.append(entrada)
+            pares.append((poema, palabra))
+
+        if sin_palabra:
+            # Emparejarlos por posición los etiquetaría con la palabra equivocada
+            self.conteo["sin palabra clave"] += sin_palabra
+            causa = (f"sus bloques no son uno por palabra de {os.path.basename(archivo_palabras)}"
+                     if archivo_palabras else "sin encabezado ni lista de palabras propia")
+            print(f"⚠️ {clave}: {sin_palabra} poemas omitidos, {causa}")
+
+        # Relevancia semántica: las entradas del lote en un solo producto de matrices
+        if self.relevancia is not None and entradas:
+            similitudes, _ = self.relevancia.puntuar([p for p, _ in pares], [w for _, w in pares])
+            # NaN: el poema no tiene ninguna palabra con vector, no se puede saber si va al tema
+            self.conteo["sin vocabulario"] += sum(1 for s in similitudes if s != s)
+            self.conteo["fuera de tema"] += sum(1 for s in similitudes if s < self.umbral_relevancia)
+            entradas = [e for e, s in zip(entradas, similitudes) if s >= self.umbral_relevancia]
+
+        for entrada in entradas:
+            self.escritor.escribir(entrada)
+        self.por_figura[figura] += len(entradas)
+        return registros, len(entradas)
+
+    def procesar_lote(self, figura, clave, rutas, archivo_palabras=None):
+        """Prepara, filtra y escribe un lote en este mismo proceso."""
+        cache = preparar_lote(self.tarea(clave, rutas, archivo_palabras))
+        return self.agregar_lote(figura, clave, rutas, cache, archivo_palabras)
+
+    def cerrar(self, completo=True):
+        self.escritor.cerrar(completo)
+        if completo:
+            self.manifiesto.guardar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *_):
+        self.cerrar(completo=tipo is None)
+
+    def resumen(self):
+        lineas = [f"{figura}: {self.por_figura[figura]} ejemplos | {self.detectores[figura].resumen()}"
+                  for figura in sorted(self.por_figura)]
+        for motivo in ("sin palabra clave", "rechazados por el juez", f"fuera de métrica {self.metrica}",
+                       "fuera de tema", "sin vocabulario"):
+            if self.conteo[motivo]:
+                lineas.append(f"Descartados {motivo}: {self.conteo[motivo]}")
+        lineas.append(self.manifiesto.resumen())
+        return "\n".join(lineas)
@@ -0,0 +1,154 @@
+"""Constructor único del dataset de entrenamiento para todas las figuras.
+
+Antes había que entrar en la carpeta de cada figura y lanzar su phrase.py,
+uno detrás de otro (y pleonasmo, aliteración, epíteto o hipérbole no tenían
+ninguno). Aquí se descubren los *_lote_NNN.txt de figures/ y prompts/ y se
+reparte un lote por tarea entre todos los núcleos: lectura, alineado con sus
+palabras, sílabas y firma MinHash (corpus.constructor.preparar_lote). En el
+proceso principal quedan los filtros de corpus.constructor (juez, métrica,
+duplicados por figura, relevancia) y la escritura de un único dataset con
+una columna `figura`, que es el nombre de la figura en el prompt de
+models/LoRa/switch.py.
+
+Por defecto el dataset sale en shards Parquet de FILAS_POR_SHARD filas
+(data/dataset_figuras-NNNNN.parquet); si pyarrow no está instalado
+(pip install pyarrow) sale en un único data/dataset_figuras.jsonl y se
+avisa. --formatos elige otros (jsonl, arrow, parquet).
+
+Uso (desde la raíz del repo):
+    python -m corpus.dataset
+    python -m corpus.dataset figures prompts --formatos jsonl parquet
+    python -m corpus.dataset --figuras pleonasmo aliteracion --metrica 7 11
+"""
+import os
+import re
+import time
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from corpus.constructor import UMBRAL_DUPLICADOS, ConstructorDataset, preparar_lote
+from corpus.escritor import FORMATOS, hay_pyarrow
+from corpus.validadores import FIGURAS
+from corpus.validar import RAICES, buscar_archivos
+from generacion.figuras import SCRIPTS
+
+# --- CONFIGURACIÓN ---
+RAIZ_REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SALIDA = os.path.join(RAIZ_REPO, "data", "dataset_figuras")
+# Shards Parquet con memory-map si hay pyarrow; si no, JSONL (leer_entradas y corpus.tokens leen ambos)
+FORMATOS_SALIDA = ("parquet",) if hay_pyarrow() else ("jsonl",)
+
+RE_LOTE = re.compile(r"_lote_(\d+)\.txt$")
+
+
+@lru_cache(maxsize=None)
+def _carpetas_lotes(raiz_figura):
+    return sorted(carpeta for carpeta, _, _ in os.walk(raiz_figura) if os.path.basename(carpeta) == "lotes")
+
+
+def buscar_palabras(figura, carpeta, lote_id):
+    """lote_NNN.txt de las palabras de unos resultados de `figura`, o None si no aparece.
+
+    Primero el lotes/ más cercano subiendo desde `carpeta` hasta la carpeta de
+    la figura (figures/X o prompts/X), luego cualquier lotes/ dentro de ella
+    y, si no, el lotes/ de su generador (generacion.figuras.SCRIPTS). Nunca
+    la lista de otra figura: sin la propia, los bloques con encabezado llevan
+    la palabra del encabezado y los demás se quedan sin palabra.
+    """
+    nombre = f"lote_{lote_id}.txt"
+    actual = os.path.abspath(carpeta)
+    partes = os.path.relpath(actual, RAIZ_REPO).split(os.sep)
+    raiz_figura = os.path.join(RAIZ_REPO, *partes[:2]) if partes[0] in RAICES and len(partes) > 1 else actual
+
+    while True:
+        ruta = os.path.join(actual, "lotes", nombre)
+        if os.path.exists(ruta):
+            return ruta
+        if len(actual) <= len(raiz_figura):
+            break
+        actual = os.path.dirname(actual)
+
+    propias = _carpetas_lotes(raiz_figura)
+    if figura in SCRIPTS:
+        propias = propias + [os.path.join(RAIZ_REPO, os.path.dirname(SCRIPTS[figura]), "lotes")]
+    for lotes in propias:
+        ruta = os.path.join(lotes, nombre)
+        if os.path.exists(ruta):
+            return ruta
+    return None
+
+
+def agrupar_lotes(raices, figuras=None):
+    """[(figura, carpeta, lote_id, [rutas])] de los resultados de `raices`, un grupo por lote."""
+    grupos = defaultdict(list)
+    for figura, ruta in buscar_archivos(raices):
+        if figuras and figura not in figuras:
+            continue
+        grupos[(figura, os.path.dirname(ruta), RE_LOTE.search(ruta).group(1))].append(ruta)
+    return [clave + (rutas,) for clave, rutas in sorted(grupos.items())]
+
+
+def construir(raices=RAICES, salida=SALIDA, formatos=FORMATOS_SALIDA, figuras=None, procesos=None,
+              metrica=None, umbral_relevancia=None, usar_juez=True, umbral_duplicados=UMBRAL_DUPLICADOS):
+    constructor = ConstructorDataset(salida, formatos, metrica, umbral_relevancia, usar_juez,
+                                     umbral_duplicados, columna_figura=True)
+    copias = 0
+
+    lotes, tareas, vistos = [], [], set()
+    for figura, carpeta, lote_id, rutas in agrupar_lotes(raices, figuras):
+        # Copias exactas de los mismos resultados en otra carpeta (prompts/2ANAFORA) solo cuentan una vez
+        contenido = (figura,) + tuple(constructor.manifiesto.huella(ruta)["sha1"] for ruta in rutas)
+        if contenido in vistos:
+            copias += 1
+            continue
+        vistos.add(contenido)
+
+        archivo_palabras = buscar_palabras(figura, carpeta, lote_id)
+        clave = f"{figura}:{os.path.relpath(carpeta, RAIZ_REPO)}:{lote_id}"
+        lotes.append((figura, clave, rutas, archivo_palabras))
+        tareas.append(constructor.tarea(clave, rutas, archivo_palabras))
+    print(f"--- {len(tareas)} lotes de {len({f for f, _, _, _ in lotes})} figuras "
+          f"({copias} copias repetidas omitidas) ---\n")
+
+    t0 = time.monotonic()
+    with constructor, ProcessPoolExecutor(max_workers=procesos) as pool:
+        # Los procesos reciben y devuelven rutas; cada shard se carga aquí cuando le toca a su lote
+        caches = pool.map(preparar_lote, tareas, chunksize=4)
+        for (figura, clave, rutas, archivo_palabras), cache in zip(lotes, caches):
+            registros, escritas = constructor.agregar_lote(figura, clave, rutas, cache, archivo_palabras)
+            if registros:
+                print(f"✅ {clave}: {escritas}/{len(registros)} poemas")
+            else:
+                print(f"❌ {clave}: 0 poemas (palabras: {archivo_palabras or 'no se encontró su lote_NNN.txt'})")
+
+    print("\n" + "=" * 40)
+    print(constructor.resumen())
+    print(f"{constructor.escritor.resumen()} en {time.monotonic() - t0:.1f} s")
+    print("=" * 40)
+    return constructor.por_figura
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye un único dataset con todas las figuras en paralelo")
+    parser.add_argument("raices", nargs="*", default=RAICES, help="Carpetas a recorrer")
+    parser.add_argument("--salida", default=SALIDA, help="Ruta base del dataset (sin extensión)")
+    parser.add_argument("--formatos", nargs="+", default=list(FORMATOS_SALIDA),
+                        choices=FORMATOS, help="Formatos de salida")
+    parser.add_argument("--figuras", nargs="+", choices=FIGURAS, help="Solo estas figuras")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="Procesos en paralelo (un lote por tarea)")
+    parser.add_argument("--metrica", type=int, nargs=2, metavar=("MIN", "MAX"),
+                        help="Descarta poemas con algún verso fuera de ese rango de sílabas")
+    parser.add_argument("--relevancia", type=float, help="Similitud fastText mínima entre poema y palabra clave")
+    parser.add_argument("--sin-juez", action="store_true", help="No descartar los poemas que rechazó el juez")
+    args = parser.parse_args()
+
+    if args.formatos == ["jsonl"] and not hay_pyarrow():
+        print("⚠️ Sin pyarrow el dataset sale en JSONL, no en shards Parquet (pip install pyarrow)")
+    construir(args.raices, args.salida, args.formatos, args.figuras, args.procesos,
+              tuple(args.metrica) if args.metrica else None, args.relevancia, not args.sin_juez)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Detección de poemas casi duplicados con MinHash + LSH por bandas.
+
+Cada poema se normaliza, se trocea en n-gramas de caracteres y se resume en
+una firma MinHash; las bandas de la firma se usan como cubetas, así que solo
+se comparan poemas que comparten alguna banda (coste casi lineal). Se
+conserva el primer poema de cada grupo como representante.
+
+Uso (desde la raíz del repo):
+    python -m corpus.duplicados
+    python -m corpus.duplicados figures/PLEONASMO --umbral 0.7 --informe grupos.jsonl
+"""
+import os
+import re
+import json
+import zlib
+import argparse
+import unicodedata
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# --- CONFIGURACIÓN ---
+UMBRAL = 0.8          # Jaccard estimado a partir del cual dos poemas son duplicados
+NUM_PERM = 128        # Longitud de la firma MinHash
+TAM_SHINGLE = 5       # n-gramas de caracteres
+FIRMAS_POR_BLOQUE = 4096
+PRIMO = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64(0xFFFFFFFF)
+
+RE_NO_LETRA = re.compile(r"[^a-zñ ]+")
+RE_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni puntuación: 'Lloramos,' y 'lloramos' cuentan igual."""
+    texto = unicodedata.normalize('NFKD', texto.lower().replace('ñ', '\0'))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).replace('\0', 'ñ')
+    return RE_ESPACIOS.sub(' ', RE_NO_LETRA.sub(' ', texto)).strip()
+
+
+def elegir_bandas(num_perm, umbral):
+    """(bandas, filas) con bandas*filas == num_perm cuyo umbral LSH (1/b)^(1/r) queda justo por debajo de `umbral`."""
+    opciones = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    validas = [(b, r) for b, r in opciones if (1 / b) ** (1 / r) <= umbral]
+    return max(validas, key=lambda br: (1 / br[0]) ** (1 / br[1])) if validas else opciones[-1]
+
+
+class DetectorDuplicados:
+    """Índice LSH incremental: `agregar()` devuelve el representante si el poema ya tiene un casi-duplicado."""
+
+    def __init__(self, umbral=UMBRAL, num_perm=NUM_PERM, tam_shingle=TAM_SHINGLE, semilla=1):
+        self.umbral = umbral
+        self.tam_shingle = tam_shingle
+        self.bandas, self.filas = elegir_bandas(num_perm, umbral)
+        aleatorio = np.random.RandomState(semilla)
+        # Permutaciones (a*x + b) mod p; a, b < 2^32 para que a*x no desborde uint64
+        self.a = aleatorio.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = aleatorio.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        # Clave de 64 bits por banda (suma de filas × multiplicadores impares), en vez de sus bytes
+        self.multiplicadores = aleatorio.randint(1, 1 << 62, size=self.filas, dtype=np.uint64) | np.uint64(1)
+        # Por banda, {clave: posición en `representantes`, o lista si hay varias}; un int ocupa menos que una lista
+        self.cubetas = [{} for _ in range(self.bandas)]
+        # Firmas de los representantes (los únicos con los que se compara) en bloques uint32 contiguos
+        self.bloques = []
+        self.representantes = []   # Índice de poema de cada firma guardada
+        self.representante = []    # Por poema: su propio índice o el del grupo al que se une
+        self.comparaciones = 0
+
+    def firma(self, texto):
+        limpio = normalizar(texto)
+        n = self.tam_shingle
+        shingles = {limpio[i:i + n] for i in range(max(1, len(limpio) - n + 1))}
+        valores = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                              dtype=np.uint64, count=len(shingles))
+        permutados = (np.outer(valores, self.a) + self.b) % PRIMO & MAX_HASH
+        return permutados.min(axis=0).astype(np.uint32)
+
+    def _claves(self, firma):
+        bandas = np.asarray(firma[:self.bandas * self.filas], dtype=np.uint64).reshape(self.bandas, self.filas)
+        return (bandas * self.multiplicadores).sum(axis=1).tolist()
+
+    def _firma_guardada(self, posicion):
+        return self.bloques[posicion // FIRMAS_POR_BLOQUE][posicion % FIRMAS_POR_BLOQUE]
+
+    def _guardar_firma(self, firma, indice):
+        fila = len(self.representantes) % FIRMAS_POR_BLOQUE
+        if fila == 0:
+            self.bloques.append(np.empty((FIRMAS_POR_BLOQUE, len(self.a)), dtype=np.uint32))
+        # Se copia: una fila de las firmas de un lote no retiene el lote entero
+        self.bloques[-1][fila] = firma
+        self.representantes.append(indice)
+
+    def agregar(self, texto, firma=None):
+        """Indexa `texto`; devuelve el índice de su representante si es casi duplicado, o None si es nuevo.
+
+        `firma` permite pasar la firma ya calculada (p. ej. en otro proceso con
+        un detector de la misma semilla).
+        """
+        if firma is None:
+            firma = self.firma(texto)
+        indice = len(self.representante)
+        claves = self._claves(firma)
+
+        vistos = set()
+        for banda, clave in enumerate(claves):
+            posiciones = self.cubetas[banda].get(clave, ())
+            for posicion in (posiciones,) if isinstance(posiciones, int) else posiciones:
+                if posicion in vistos:
+                    continue
+                vistos.add(posicion)
+                self.comparaciones += 1
+                if np.mean(self._firma_guardada(posicion) == firma) >= self.umbral:
+                    candidato = self.representantes[posicion]
+                    self.representante.append(candidato)
+                    return candidato
+
+        # Solo los representantes entran en las cubetas: los grupos son estrellas
+        posicion = len(self.representantes)
+        for cubeta, clave in zip(self.cubetas, claves):
+            previas = cubeta.get(clave)
+            if previas is None:
+                cubeta[clave] = posicion
+            elif isinstance(previas, int):
+                cubeta[clave] = [previas, posicion]
+            else:
+                previas.append(posicion)
+        self._guardar_firma(firma, indice)
+        self.representante.append(indice)
+        return None
+
+    def grupos(self):
+        """{representante: [índices]} de los grupos con más de un poema."""
+        grupos = defaultdict(list)
+        for indice, rep in enumerate(self.representante):
+            grupos[rep].append(indice)
+        return {rep: miembros for rep, miembros in grupos.items() if len(miembros) > 1}
+
+    def resumen(self):
+        total = len(self.representante)
+        duplicados = sum(1 for i, rep in enumerate(self.representante) if i != rep)
+        return (f"Duplicados (Jaccard ≥ {self.umbral}, {self.bandas}×{self.filas} bandas): "
+                f"{duplicados}/{total} descartados en {len(self.grupos())} grupos | "
+                f"{self.comparaciones} comparaciones")
+
+
+def deduplicar_figura(tarea):
+    figura, archivos, umbral = tarea
+    # Import diferido: el lector vive junto al validador offline
+    from corpus.validar import poemas_de_archivo
+
+    detector = DetectorDuplicados(umbral)
+    origen = []
+    for ruta in archivos:
+        for indice, (palabra, poema) in enumerate(poemas_de_archivo(ruta)):
+            detector.agregar(poema)
+            origen.append({"archivo": ruta, "indice": indice, "palabra": palabra, "poema": poema})
+    grupos = [[origen[i] for i in miembros] for miembros in detector.grupos().values()]
+    return figura, detector.resumen(), grupos
+
+
+def main():
+    from corpus.validar import RAICES, buscar_archivos
+
+    parser = argparse.ArgumentParser(description="Busca poemas casi duplicados en el corpus generado")
+    parser.add_argument("raices", nargs="*", default=RAICES, help="Carpetas a recorrer")
+    parser.add_argument("--umbral", type=float, default=UMBRAL, help="Jaccard mínimo para considerar duplicado")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="Procesos en paralelo (uno por figura)")
+    parser.add_argument("--informe", help="JSONL con un grupo de duplicados por línea (el primero es el representante)")
+    args = parser.parse_args()
+
+    por_figura = defaultdict(list)
+    for figura, ruta in buscar_archivos(args.raices):
+        por_figura[figura].append(ruta)
+    tareas = [(figura, archivos, args.umbral) for figura, archivos in sorted(por_figura.items())]
+
+    f_informe = open(args.informe, 'w', encoding='utf-8') if args.informe else None
+    try:
+        with ProcessPoolExecutor(max_workers=args.procesos) as pool:
+            for figura, resumen, grupos in pool.map(deduplicar_figura, tareas):
+                print(f"\n{figura}: {resumen}")
+                for grupo in sorted(grupos, key=len, reverse=True)[:3]:
+                    primer_verso = grupo[0]["poema"].split("\n")[0]
+                    print(f"  × {len(grupo)}  «{primer_verso[:70]}»")
+                if f_informe:
+                    for grupo in grupos:
+                        f_informe.write(json.dumps({"figura": figura, "poemas": grupo}, ensure_ascii=False) + "\n")
+    finally:
+        if f_informe:
+            f_informe.close()
+
+
+if __name__ == "__main__":
+    main()
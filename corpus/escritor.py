@@ -0,0 +1,178 @@
+"""Escritura en streaming de los datasets de entrenamiento.
+
+Los phrase.py acumulaban todo `dataset_list` en memoria y lo volcaban al
+final con json.dump(indent=2). Ahora cada entrada se escribe en cuanto sale:
+en JSONL (una por línea) y, si se pide, en shards Arrow o Parquet de
+FILAS_POR_SHARD filas. `datasets.Dataset.from_file` (Arrow) o pyarrow abren
+los shards con memory-map, sin copiarlos. En memoria nunca hay más de un
+shard, así que el uso de RAM no crece con el corpus.
+
+    with EscritorDataset("dataset_final_simil", ("jsonl", "parquet")) as escritor:
+        escritor.escribir({"text": ..., "silabas": [...]})
+
+Uso (desde la raíz del repo), para pasar a shards un dataset ya generado:
+    python -m corpus.escritor prompts/2ANAFORA/resultados_anafora/dataset_final_anafora.json --formatos arrow
+"""
+import os
+import glob
+import json
+import argparse
+import importlib.util
+
+# --- CONFIGURACIÓN ---
+FORMATOS = ("jsonl", "arrow", "parquet")
+FILAS_POR_SHARD = 50_000
+
+_pa = None
+
+
+def _cargar_pyarrow():
+    """pyarrow solo hace falta para los shards; se carga la primera vez."""
+    global _pa
+    if _pa is None:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+        _pa = pyarrow
+    return _pa
+
+
+def hay_pyarrow():
+    """Si se pueden escribir shards (sin importar pyarrow todavía)."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def ruta_shard(base, indice, formato):
+    return f"{base}-{indice:05d}.{formato}"
+
+
+class EscritorDataset:
+    """Escribe entradas (dicts) una a una en <base>.jsonl y/o en shards <base>-NNNNN.arrow|parquet.
+
+    Los archivos se escriben con nombre temporal y se renombran al cerrar,
+    así que una ejecución cortada no deja un dataset a medias.
+    """
+
+    def __init__(self, base, formatos=("jsonl",), filas_por_shard=FILAS_POR_SHARD):
+        desconocidos = set(formatos) - set(FORMATOS)
+        if desconocidos:
+            raise ValueError(f"Formatos desconocidos: {sorted(desconocidos)} (válidos: {FORMATOS})")
+        self.base = base
+        os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+        self.formatos = tuple(formatos)
+        self.filas_por_shard = filas_por_shard
+        self.shards = [f for f in self.formatos if f != "jsonl"]
+        if self.shards:
+            _cargar_pyarrow()    # Falla aquí, no tras procesar todos los lotes
+        self.filas = 0
+        self.num_shards = 0
+        self.escritos = []       # Rutas definitivas (mientras tanto se escribe en <ruta>.tmp)
+        self._esquema = None
+        self._pendientes = []
+        self._jsonl = None
+        if "jsonl" in self.formatos:
+            self._jsonl = self._abrir_temporal(base + ".jsonl")
+
+    def _abrir_temporal(self, ruta):
+        self.escritos.append(ruta)
+        return open(ruta + ".tmp", 'w', encoding='utf-8')
+
+    def escribir(self, entrada):
+        if self._jsonl:
+            self._jsonl.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        if self.shards:
+            self._pendientes.append(entrada)
+            if len(self._pendientes) >= self.filas_por_shard:
+                self._volcar_shard()
+        self.filas += 1
+
+    def _volcar_shard(self):
+        pa = _cargar_pyarrow()
+        # El esquema del primer shard fija el de los demás
+        tabla = pa.Table.from_pylist(self._pendientes, schema=self._esquema)
+        self._esquema = tabla.schema
+        for formato in self.shards:
+            ruta = ruta_shard(self.base, self.num_shards, formato)
+            self.escritos.append(ruta)
+            if formato == "arrow":
+                # Formato stream de Arrow, el mismo que usa `datasets` en caché
+                with pa.OSFile(ruta + ".tmp", 'wb') as destino:
+                    with pa.ipc.new_stream(destino, tabla.schema) as escritor:
+                        escritor.write_table(tabla)
+            else:
+                pa.parquet.write_table(tabla, ruta + ".tmp")
+        self._pendientes = []
+        self.num_shards += 1
+
+    def cerrar(self, completo=True):
+        if self._pendientes:
+            self._volcar_shard()
+        if self._jsonl:
+            self._jsonl.close()
+        if not completo:
+            for ruta in self.escritos:
+                if os.path.exists(ruta + ".tmp"):
+                    os.remove(ruta + ".tmp")
+            return
+        # Shards de una ejecución anterior con más filas que esta
+        for formato in self.shards:
+            for viejo in glob.glob(f"{glob.escape(self.base)}-[0-9][0-9][0-9][0-9][0-9].{formato}"):
+                if viejo not in self.escritos:
+                    os.remove(viejo)
+        for ruta in self.escritos:
+            os.replace(ruta + ".tmp", ruta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *_):
+        self.cerrar(completo=tipo is None)
+
+    def resumen(self):
+        partes = []
+        if self._jsonl:
+            partes.append(f"{self.base}.jsonl")
+        for formato in self.shards:
+            partes.append(f"{self.num_shards} shards {formato} ({self.base}-NNNNN.{formato})")
+        return f"Dataset: {self.filas} entradas → " + " + ".join(partes)
+
+
+def leer_entradas(ruta):
+    """Entradas de un dataset: JSONL, shards Arrow/Parquet (en streaming) o el JSON antiguo (lista completa)."""
+    if ruta.endswith(".jsonl"):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+    elif ruta.endswith(".parquet"):
+        for bloque in _cargar_pyarrow().parquet.ParquetFile(ruta).iter_batches():
+            yield from bloque.to_pylist()
+    elif ruta.endswith(".arrow"):
+        pa = _cargar_pyarrow()
+        with pa.memory_map(ruta) as origen:
+            for bloque in pa.ipc.open_stream(origen):
+                yield from bloque.to_pylist()
+    else:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convierte un dataset JSON/JSONL en JSONL y shards Arrow/Parquet")
+    parser.add_argument("entrada", help="dataset_final_*.json o *.jsonl")
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=["parquet"], help="Formatos de salida")
+    parser.add_argument("--filas-por-shard", type=int, default=FILAS_POR_SHARD, help="Filas por shard")
+    args = parser.parse_args()
+
+    base = os.path.splitext(args.entrada)[0]
+    if args.entrada.endswith(".jsonl") and "jsonl" in args.formatos:
+        print("✗ La entrada ya es el JSONL de salida; quita 'jsonl' de --formatos")
+        return
+    with EscritorDataset(base, args.formatos, args.filas_por_shard) as escritor:
+        for entrada in leer_entradas(args.entrada):
+            escritor.escribir(entrada)
+    print(f"✓ {escritor.resumen()}")
+
+
+if __name__ == "__main__":
+    main()
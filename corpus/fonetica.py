@@ -0,0 +1,200 @@
+"""Transcripción fonológica del español y puntuación de aliteración.
+
+La transcripción (G2P) pasa cada palabra a sus fonemas consonánticos con
+seseo (c/z/s → s), jota (j, ge/gi → x), yeísmo (ll/y → y), h muda, qu/k/c
+fuerte → k, betacismo (v → b) y x → ks. La aliteración se mide por verso
+como densidad de la consonante dominante: cuántas de sus consonantes son el
+fonema más repetido. El cálculo de un lote entero se hace con NumPy.
+
+Uso (desde la raíz del repo):
+    python -m corpus.fonetica "El suave susurro silba su secreto"
+    python -m corpus.fonetica --ranking figures/ALITERACION --salida ranking.jsonl
+"""
+import re
+import sys
+import json
+import argparse
+from functools import lru_cache
+
+import numpy as np
+
+# --- CONFIGURACIÓN ---
+TAM_MEMO = 100_000           # Palabras distintas que se recuerdan transcritas
+MIN_DENSIDAD = 0.27          # Por debajo, la aliteración no se distingue de un poema cualquiera
+MIN_CONSONANTES = 6          # Versos con menos consonantes no puntúan (densidad poco fiable)
+
+# Inventario de fonemas consonánticos ("ch" es la africada; r y rr cuentan juntas)
+FONEMAS = ["p", "b", "t", "d", "k", "g", "f", "s", "x", "y", "ch", "l", "r", "m", "n", "ñ"]
+INDICE = {fonema: i for i, fonema in enumerate(FONEMAS)}
+
+VOCALES = set("aeiouáéíóúüï")
+ANTERIORES = set("eiéí")     # Vocales que suavizan c y g (ce, ci, ge, gi)
+DIRECTOS = {"p": "p", "b": "b", "v": "b", "w": "b", "t": "t", "d": "d", "k": "k",
+            "f": "f", "s": "s", "z": "s", "j": "x", "l": "l", "r": "r", "m": "m",
+            "n": "n", "ñ": "ñ"}
+
+RE_PALABRA = re.compile(r"[a-záéíóúüïñ]+")
+
+
+@lru_cache(maxsize=TAM_MEMO)
+def fonemas(palabra):
+    """Tupla con los fonemas consonánticos de `palabra` en orden."""
+    palabra = palabra.lower()
+    salida = []
+    i, n = 0, len(palabra)
+    while i < n:
+        c = palabra[i]
+        siguiente = palabra[i + 1] if i + 1 < n else ""
+        if c == "h":
+            pass                                    # Muda (la "ch" se trata en la c)
+        elif c == "c":
+            if siguiente == "h":
+                salida.append("ch")
+                i += 1
+            else:
+                salida.append("s" if siguiente in ANTERIORES else "k")
+        elif c == "q":
+            salida.append("k")
+            if siguiente == "u":
+                i += 1                              # La u de que/qui no suena
+        elif c == "g":
+            if siguiente in ANTERIORES:
+                salida.append("x")
+            else:
+                salida.append("g")
+                if siguiente == "u" and palabra[i + 2:i + 3] in ANTERIORES:
+                    i += 1                          # gue/gui: u muda (en güe/güi sí suena, es vocal)
+        elif c == "l" and siguiente == "l":
+            salida.append("y")
+            i += 1
+        elif c == "r" and siguiente == "r":
+            salida.append("r")
+            i += 1
+        elif c == "y":
+            # Consonante ante vocal (ya, mayo); vocal al final o sola (rey, y)
+            if siguiente in VOCALES:
+                salida.append("y")
+        elif c == "x":
+            salida.extend(("k", "s"))
+        elif c in DIRECTOS:
+            salida.append(DIRECTOS[c])
+        i += 1
+    return tuple(salida)
+
+
+@lru_cache(maxsize=TAM_MEMO)
+def _indices(palabra):
+    return tuple(INDICE[f] for f in fonemas(palabra))
+
+
+def transcribir(verso):
+    """Fonemas consonánticos del verso separados por palabra: 'el suave' -> 'l s.b'."""
+    return " ".join(".".join(fonemas(p)) or "-" for p in RE_PALABRA.findall(verso.lower()))
+
+
+def densidades(versos):
+    """(densidad, fonema dominante) de cada verso, calculados en bloque.
+
+    La densidad es la fracción de consonantes del verso que son su fonema
+    más repetido; los versos con menos de MIN_CONSONANTES valen NaN.
+    """
+    ids, fila = [], []
+    for n, verso in enumerate(versos):
+        for palabra in RE_PALABRA.findall(verso.lower()):
+            codigos = _indices(palabra)
+            ids.extend(codigos)
+            fila.extend([n] * len(codigos))
+
+    conteos = np.zeros((len(versos), len(FONEMAS)), dtype=np.int32)
+    np.add.at(conteos, (np.asarray(fila, dtype=np.intp), np.asarray(ids, dtype=np.intp)), 1)
+    totales = conteos.sum(axis=1)
+    dominantes = conteos.argmax(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        densidad = conteos.max(axis=1) / totales
+    densidad[totales < MIN_CONSONANTES] = np.nan
+    return densidad, dominantes
+
+
+def puntuar_lote(poemas):
+    """Puntuación de aliteración de cada poema: media de la densidad de sus versos.
+
+    Vale NaN si ningún verso tiene MIN_CONSONANTES: quien la use debe
+    comprobarlo, porque NaN no es ni mayor ni menor que ningún umbral.
+    """
+    versos_por_poema = [[l.strip() for l in poema.split("\n") if l.strip()] for poema in poemas]
+    planos = [verso for versos in versos_por_poema for verso in versos]
+    densidad, _ = densidades(planos)
+
+    # Media por poema con reduceat sobre los tramos de versos consecutivos
+    longitudes = np.array([len(v) for v in versos_por_poema], dtype=np.intp)
+    puntuaciones = np.full(len(poemas), np.nan)
+    con_versos = longitudes > 0
+    if planos:
+        validos = ~np.isnan(densidad)
+        inicios = np.concatenate(([0], np.cumsum(longitudes)[:-1]))[con_versos]
+        sumas = np.add.reduceat(np.where(validos, densidad, 0.0), inicios)
+        cuenta = np.add.reduceat(validos.astype(np.int32), inicios)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            puntuaciones[con_versos] = sumas / cuenta
+    return puntuaciones
+
+
+def puntuar(poema):
+    return float(puntuar_lote([poema])[0])
+
+
+def ranking(raices, salida=None, limite=10):
+    """Ordena los poemas de aliteración de `raices` por puntuación, sin llamar a ningún modelo."""
+    from corpus.validar import buscar_archivos, poemas_de_archivo
+
+    registros = []
+    for figura, ruta in buscar_archivos(raices):
+        if figura != "aliteracion":
+            continue
+        for indice, (palabra, poema) in enumerate(poemas_de_archivo(ruta)):
+            registros.append({"archivo": ruta, "indice": indice, "palabra": palabra, "poema": poema})
+    if not registros:
+        print("✗ No hay lotes de aliteración en esas carpetas")
+        return []
+
+    puntuaciones = puntuar_lote([r["poema"] for r in registros])
+    for registro, puntuacion in zip(registros, puntuaciones):
+        registro["puntuacion"] = None if np.isnan(puntuacion) else round(float(puntuacion), 4)
+    registros.sort(key=lambda r: -1 if r["puntuacion"] is None else r["puntuacion"], reverse=True)
+
+    validas = puntuaciones[~np.isnan(puntuaciones)]
+    debiles = int((validas < MIN_DENSIDAD).sum())
+    print(f"{len(registros)} poemas | media {validas.mean():.3f} | mediana {np.median(validas):.3f} | "
+          f"débiles (< {MIN_DENSIDAD}): {debiles} ({debiles / max(len(validas), 1):.1%})")
+    for registro in registros[:limite]:
+        print(f"  {registro['puntuacion']:.3f}  «{registro['poema'].split(chr(10))[0][:70]}»")
+
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        print(f"✓ Ranking guardado en {salida}")
+    return registros
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcripción fonológica y puntuación de aliteración")
+    parser.add_argument("versos", nargs="*", help="Versos a puntuar (o stdin)")
+    parser.add_argument("--ranking", nargs="+", metavar="RAIZ", help="Ordenar los lotes de aliteración de estas carpetas")
+    parser.add_argument("--salida", help="JSONL con el ranking completo")
+    parser.add_argument("--top", type=int, default=10, help="Poemas a mostrar del ranking")
+    args = parser.parse_args()
+
+    if args.ranking:
+        ranking(args.ranking, args.salida, args.top)
+        return
+
+    versos = args.versos or [linea.rstrip("\n") for linea in sys.stdin if linea.strip()]
+    densidad, dominantes = densidades(versos)
+    for verso, d, dominante in zip(versos, densidad, dominantes):
+        valor = "  -  " if np.isnan(d) else f"{d:.2f} /{FONEMAS[dominante]}/"
+        print(f"{valor}  {transcribir(verso)}  ←  {verso}")
+
+
+if __name__ == "__main__":
+    main()
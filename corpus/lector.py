@@ -0,0 +1,98 @@
+"""Lector en streaming de los archivos de resultados (*_lote_NNN.txt).
+
+Entiende los dialectos que han ido escribiendo los generadores:
+
+- bloques cerrados por una línea de '=' (la de 47 de generacion.formato o
+  cualquiera de 10 o más), sin palabra: metáfora, aliteración, anáfora;
+- bloques abiertos por un encabezado '======[PALABRA]': el resto;
+
+y dentro de cada bloque los poemas separados por líneas '---'. Se lee línea
+a línea (de uno o varios archivos seguidos, como hacían los phrase.py al
+concatenarlos) y se devuelve cada poema en cuanto se cierra.
+"""
+import re
+
+RE_ENCABEZADO = re.compile(r"^={3,}\[(.*?)\]\s*$")
+RE_FIN_BLOQUE = re.compile(r"^={10,}\s*$")
+RE_SEPARADOR = re.compile(r"^-{3,}\s*$")
+
+
+def lineas(ruta):
+    """Líneas de `ruta` sin el salto final; en UTF-8 o, si una línea no lo es, en Windows-1252."""
+    with open(ruta, 'rb') as f:
+        for crudo in f:
+            try:
+                linea = crudo.decode('utf-8')
+            except UnicodeDecodeError:
+                # Algunos lotes antiguos (anáfora) se guardaron en Windows-1252
+                linea = crudo.decode('cp1252', errors='replace')
+            yield linea.rstrip('\r\n')
+
+
+def leer_poemas(rutas):
+    """Genera (palabra, bloque, poema) de uno o varios archivos de resultados.
+
+    `palabra` es la del encabezado ======[PALABRA] (en minúsculas) o None en
+    los dialectos sin encabezado; `bloque` numera los bloques no vacíos desde
+    0 y sigue contando de un archivo al siguiente, así que el bloque i
+    corresponde a la palabra i del lote. `poema` conserva sus líneas tal cual
+    (solo se recortan los extremos).
+    """
+    if isinstance(rutas, str):
+        rutas = [rutas]
+
+    palabra = None
+    bloque = -1          # Índice del bloque actual (se asigna al ver su primer contenido)
+    abierto = False      # El bloque actual ya tiene contenido
+    actual = []
+
+    def cerrar_poema():
+        texto = "\n".join(actual).strip()
+        actual.clear()
+        return texto
+
+    for ruta in rutas:
+        for linea in lineas(ruta):
+            limpia = linea.strip()
+            encabezado = RE_ENCABEZADO.match(limpia)
+            if encabezado or RE_FIN_BLOQUE.match(limpia):
+                poema = cerrar_poema()
+                if poema:
+                    yield palabra, bloque, poema
+                abierto = False
+                palabra = encabezado.group(1).lower() if encabezado else None
+                continue
+
+            if limpia and not abierto:
+                abierto = True
+                bloque += 1
+            if RE_SEPARADOR.match(limpia):
+                poema = cerrar_poema()
+                if poema:
+                    yield palabra, bloque, poema
+            else:
+                actual.append(linea)
+
+        # Un archivo nuevo no cierra el bloque (igual que al concatenarlos), pero sí el poema
+        poema = cerrar_poema()
+        if poema:
+            yield palabra, bloque, poema
+
+
+def alinear(palabras, registros):
+    """Empareja cada poema de `registros` (de leer_poemas) con su palabra del lote.
+
+    Si el bloque tiene encabezado ======[PALABRA] manda el encabezado, así que
+    una palabra saltada no desplaza a las siguientes. Si no lo tiene, el
+    bloque i es la palabra i, pero solo cuando el lote tiene exactamente un
+    bloque por palabra: con bloques de más o de menos no se sabe cuál falta,
+    y esos poemas van con palabra None. Genera [palabra, poema].
+    """
+    registros = list(registros)
+    posicional = {bloque for encabezado, bloque, _ in registros if not encabezado} == set(range(len(palabras)))
+    por_clave = {p.lower(): p for p in palabras}
+    for encabezado, bloque, poema in registros:
+        if encabezado:
+            yield [por_clave.get(encabezado, encabezado), poema]
+        else:
+            yield [palabras[bloque] if posicional else None, poema]
@@ -0,0 +1,141 @@
+"""Chequeo de palabra clave que acepta flexiones ("lloramos" por "llorar").
+
+Antes bastaba `palabra.lower() in poema.lower()`: "lunas" no contaba como
+"luna" (y se reintentaba el poema) pero "amargo" sí contaba como "mar". Ahora
+el poema se trocea en palabras sin tildes ni mayúsculas y cada una se
+compara con la clave por su forma, su plural o su lema. Los lemas salen de
+una tabla precalculada con spaCy (tools/lemas.py), así que el chequeo es
+O(palabras del poema) y no carga ningún modelo.
+
+Uso (desde la raíz del repo):
+    python -m corpus.lemas                  # Cuántos rechazos/reintentos cambian en el corpus
+    python -m corpus.lemas figures/SIMIL
+"""
+import os
+import re
+import json
+import argparse
+from collections import Counter
+from functools import lru_cache
+
+# --- CONFIGURACIÓN ---
+RAIZ_REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RUTA_LEMAS = os.path.join(RAIZ_REPO, "tools", "lemas.json")
+
+SIN_TILDES = str.maketrans("áéíóúüàèìòù", "aeiouuaeiou")   # La ñ se conserva
+RE_TOKEN = re.compile(r"[^\W\d_]+")
+
+_lemas = None
+
+
+def normalizar(texto):
+    return texto.lower().translate(SIN_TILDES)
+
+
+def cargar_lemas(ruta=RUTA_LEMAS):
+    """Tabla forma -> lema (normalizadas); vacía si todavía no se construyó con tools/lemas.py."""
+    global _lemas
+    if _lemas is None:
+        if os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                _lemas = json.load(f)
+        else:
+            _lemas = {}
+    return _lemas
+
+
+@lru_cache(maxsize=4096)
+def _formas_clave(palabra):
+    """(formas aceptadas literalmente, lema) de una palabra clave ya normalizada."""
+    formas = {palabra, palabra + "s", palabra + "es"}
+    if palabra.endswith("z"):
+        formas.add(palabra[:-1] + "ces")      # luz -> luces
+    return frozenset(formas), cargar_lemas().get(palabra, palabra)
+
+
+def buscar_palabra(poema, palabra):
+    """'exacta', 'flexion' o None según cómo aparece `palabra` en `poema`."""
+    clave = normalizar(palabra.strip())
+    texto = normalizar(poema)
+    if " " in clave:
+        # Claves de varias palabras: sin lemas, solo tildes y mayúsculas
+        return "exacta" if clave in texto else None
+
+    tokens = RE_TOKEN.findall(texto)
+    if clave in tokens:
+        return "exacta"
+    formas, lema = _formas_clave(clave)
+    lemas = cargar_lemas()
+    for token in tokens:
+        if token in formas or lemas.get(token, token) == lema:
+            return "flexion"
+    return None
+
+
+class EstadisticasPalabraClave:
+    """Cuenta cómo se resolvió cada chequeo y cuántos rechazos evita frente al `in` de antes."""
+
+    def __init__(self):
+        self.conteo = Counter()
+
+    def registrar(self, poema, palabra, resultado):
+        antes = palabra.lower() in poema.lower()
+        if resultado == "flexion" and not antes:
+            self.conteo["recuperadas"] += 1       # Antes era un rechazo (y un reintento)
+        elif resultado is None and antes:
+            self.conteo["solo subcadena"] += 1    # Antes pasaba por contener la clave dentro de otra palabra
+        self.conteo[resultado or "ausente"] += 1
+
+    def resumen(self):
+        total = sum(self.conteo[k] for k in ("exacta", "flexion", "ausente"))
+        if not total:
+            return "Palabra clave: sin chequeos"
+        antes = self.conteo["ausente"] - self.conteo["solo subcadena"] + self.conteo["recuperadas"]
+        return (f"Palabra clave: {self.conteo['exacta']} exactas, {self.conteo['flexion']} por flexión, "
+                f"{self.conteo['ausente']} ausentes | rechazo {self.conteo['ausente'] / total:.1%} "
+                f"(antes {antes / total:.1%}) | {self.conteo['recuperadas']} reintentos evitados")
+
+
+# Estadísticas del proceso (las imprime generacion.lote.imprimir_resumen)
+ESTADISTICAS = EstadisticasPalabraClave()
+
+
+def contiene_palabra(poema, palabra, estadisticas=ESTADISTICAS):
+    resultado = buscar_palabra(poema, palabra)
+    if estadisticas is not None:
+        estadisticas.registrar(poema, palabra, resultado)
+    return resultado is not None
+
+
+def main():
+    from corpus.validar import RAICES, buscar_archivos, poemas_de_archivo
+
+    parser = argparse.ArgumentParser(description="Compara el chequeo de palabra clave por lemas con el de subcadena")
+    parser.add_argument("raices", nargs="*", default=RAICES, help="Carpetas a recorrer")
+    parser.add_argument("--ejemplos", type=int, default=5, help="Ejemplos de cada cambio a mostrar")
+    args = parser.parse_args()
+
+    lemas = cargar_lemas()
+    print(f"Tabla de lemas: {len(lemas)} formas" if lemas else
+          f"✗ Sin tabla de lemas ({RUTA_LEMAS}); solo tildes, mayúsculas y plurales")
+
+    estadisticas = EstadisticasPalabraClave()
+    ejemplos = {"recuperadas": [], "solo subcadena": []}
+    for _, ruta in buscar_archivos(args.raices):
+        for palabra, poema in poemas_de_archivo(ruta):
+            if not palabra:
+                continue
+            previas = Counter(estadisticas.conteo)
+            contiene_palabra(poema, palabra, estadisticas)
+            for tipo, lista in ejemplos.items():
+                if estadisticas.conteo[tipo] > previas[tipo] and len(lista) < args.ejemplos:
+                    lista.append((palabra, poema.split("\n")[0]))
+
+    print(estadisticas.resumen())
+    for tipo, lista in ejemplos.items():
+        for palabra, verso in lista:
+            print(f"  {'✓' if tipo == 'recuperadas' else '✗'} [{palabra}] «{verso[:70]}»")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Manifiesto de fuentes para reconstruir los datasets de forma incremental.
+
+Por cada lote el manifiesto solo guarda el tamaño, la fecha y el SHA-1 de
+sus archivos (palabras y resultados). Lo que salió de ellos (en los
+constructores, los registros [palabra, poema, sílabas] y sus firmas MinHash)
+va en un shard de caché por lote, en la carpeta <manifiesto sin .json>/,
+que solo se lee cuando se procesa ese lote. En la siguiente ejecución solo
+se vuelven a leer los lotes cuyos archivos cambiaron. Si el tamaño y la
+fecha no cambiaron ni siquiera se vuelve a calcular el hash.
+"""
+import os
+import re
+import json
+import hashlib
+
+import numpy as np
+
+VERSION = 2
+TAM_BLOQUE = 1 << 20
+
+RE_NOMBRE = re.compile(r"[^\w-]+")   # Sin puntos: lo que va tras el primero es la extensión
+
+
+def huella_archivo(ruta, previa=None):
+    estado = os.stat(ruta)
+    if previa and previa["tamano"] == estado.st_size and previa["mtime"] == estado.st_mtime_ns:
+        return previa
+    sha1 = hashlib.sha1()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAM_BLOQUE), b""):
+            sha1.update(bloque)
+    return {"tamano": estado.st_size, "mtime": estado.st_mtime_ns, "sha1": sha1.hexdigest()}
+
+
+def guardar_cache(base, registros, firmas):
+    """Shard de caché de un lote: <base>.json (registros) y <base>.firmas.npy (una firma por registro)."""
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    with open(base + ".firmas.npy.tmp", 'wb') as f:
+        np.save(f, np.asarray(firmas, dtype=np.uint32))
+    with open(base + ".json.tmp", 'w', encoding='utf-8') as f:
+        json.dump(registros, f, ensure_ascii=False)
+    # El .json el último: existe_cache solo da por bueno un shard completo
+    os.replace(base + ".firmas.npy.tmp", base + ".firmas.npy")
+    os.replace(base + ".json.tmp", base + ".json")
+
+
+def cargar_cache(base):
+    with open(base + ".json", 'r', encoding='utf-8') as f:
+        registros = json.load(f)
+    return registros, np.load(base + ".firmas.npy")
+
+
+def existe_cache(base):
+    return os.path.exists(base + ".json") and os.path.exists(base + ".firmas.npy")
+
+
+class Manifiesto:
+    """Huellas de los archivos de cada lote y su shard de caché, válido mientras no cambien.
+
+    `parametros` describe cómo se calculó la caché (p. ej. las del MinHash);
+    si no coinciden con los guardados, todos los lotes se vuelven a leer.
+    """
+
+    def __init__(self, ruta, parametros=None):
+        self.ruta = ruta
+        self.carpeta = os.path.splitext(ruta)[0]
+        self.parametros = parametros or {}
+        self.lotes = {}
+        if os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            if datos.get("version") == VERSION and datos.get("parametros") == self.parametros:
+                self.lotes = datos["lotes"]
+        self._previas = {r: h for fuentes in self.lotes.values() for r, h in fuentes.items()}
+        self.vistos = set()
+        self.reutilizados = 0
+        self.releidos = 0
+        self._fuentes = {}
+
+    def huella(self, ruta):
+        """huella_archivo de `ruta`, sin volver a leerla si no cambió desde la ejecución anterior."""
+        self._previas[ruta] = huella_archivo(ruta, self._previas.get(ruta))
+        return self._previas[ruta]
+
+    def ruta_cache(self, clave):
+        """Ruta base del shard de caché del lote `clave`."""
+        return os.path.join(self.carpeta, RE_NOMBRE.sub("_", clave))
+
+    def vigente(self, clave, rutas):
+        """True si las `rutas` del lote `clave` no cambiaron y su shard de caché sigue ahí."""
+        self.vistos.add(clave)
+        fuentes = {ruta: self.huella(ruta) for ruta in rutas}
+        self._fuentes[clave] = fuentes
+        anteriores = self.lotes.get(clave)
+        if (anteriores is not None and existe_cache(self.ruta_cache(clave))
+                and {r: f["sha1"] for r, f in fuentes.items()} == {r: f["sha1"] for r, f in anteriores.items()}):
+            self.reutilizados += 1
+            return True
+        self.releidos += 1
+        return False
+
+    def actualizar(self, clave):
+        """Anota las huellas actuales del lote `clave` cuando su shard ya está escrito."""
+        self.lotes[clave] = self._fuentes.pop(clave)
+
+    def guardar(self):
+        # Los lotes que ya no existen salen del manifiesto, y sus shards de la caché
+        self.lotes = {clave: fuentes for clave, fuentes in self.lotes.items() if clave in self.vistos}
+        if os.path.isdir(self.carpeta):
+            vigentes = {os.path.basename(self.ruta_cache(clave)) for clave in self.lotes}
+            for nombre in os.listdir(self.carpeta):
+                if nombre.split(".")[0] not in vigentes:
+                    os.remove(os.path.join(self.carpeta, nombre))
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        temporal = self.ruta + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({"version": VERSION, "parametros": self.parametros, "lotes": self.lotes}, f, ensure_ascii=False)
+        os.replace(temporal, self.ruta)
+
+    def resumen(self):
+        return f"Manifiesto: {self.releidos} lotes releídos, {self.reutilizados} sin cambios ({self.ruta})"
@@ -0,0 +1,174 @@
+"""Relevancia semántica de cada poema respecto a su palabra clave (fastText).
+
+Cada poema se resume en la media de los vectores de sus palabras (sin las
+vacías ni la propia palabra clave, que siempre aparece) y se compara con el
+vector de la palabra clave. Solo se consulta fastText una vez por palabra
+distinta; los poemas se agregan con reduceat y las similitudes salen de
+productos de matrices por bloques de TAM_BLOQUE poemas (también se agregan
+por bloques, así que la memoria no crece con la figura); cientos de miles
+de poemas se puntúan en segundos. Los poemas sin ninguna palabra con vector
+no se puntúan (similitud NaN).
+
+Además de la similitud coseno se da el rango de la palabra propia entre
+todas las palabras clave de la figura (0 = es la más parecida al poema),
+que no depende de lo "genérico" que sea el vocabulario del poema.
+
+Uso (desde la raíz del repo; necesita tools/cc.es.300.bin):
+    python -m corpus.relevancia
+    python -m corpus.relevancia figures/SIMIL --umbral 0.3 --salida relevancia.jsonl
+"""
+import os
+import re
+import json
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+from corpus.validadores import VACIAS
+
+# --- CONFIGURACIÓN ---
+RAIZ_REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODELO_FASTTEXT = os.path.join(RAIZ_REPO, "tools", "cc.es.300.bin")
+UMBRAL = 0.3           # Similitud coseno mínima poema-palabra clave
+TAM_BLOQUE = 4096      # Poemas por producto de matrices (acota la memoria)
+
+RE_PALABRA = re.compile(r"[^\W\d_]+")
+
+_modelo = None
+
+
+def _cargar_fasttext(ruta=MODELO_FASTTEXT):
+    global _modelo
+    if _modelo is None:
+        import fasttext
+        print(f"Cargando modelo fastText {ruta} (esto puede tardar un poco)...")
+        _modelo = fasttext.load_model(ruta)
+    return _modelo
+
+
+def _normalizar_filas(matriz):
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    return np.divide(matriz, normas, out=np.zeros_like(matriz), where=normas > 0)
+
+
+class Relevancia:
+    """Puntúa lotes de (poema, palabra clave) con un único vocabulario de vectores."""
+
+    def __init__(self, ruta=MODELO_FASTTEXT, tam_bloque=TAM_BLOQUE):
+        self.modelo = _cargar_fasttext(ruta)
+        self.tam_bloque = tam_bloque
+        self.indice = {}
+        self.vectores = np.zeros((0, self.modelo.get_dimension()), dtype=np.float32)
+
+    def _ids(self, palabras):
+        """Índices de `palabras` en la tabla de vectores, consultando fastText solo por las nuevas."""
+        nuevas = [p for p in dict.fromkeys(palabras) if p not in self.indice]
+        if nuevas:
+            for p in nuevas:
+                self.indice[p] = len(self.indice)
+            bloque = np.array([self.modelo.get_word_vector(p) for p in nuevas], dtype=np.float32)
+            self.vectores = np.vstack([self.vectores, bloque])
+        return np.fromiter((self.indice[p] for p in palabras), dtype=np.intp, count=len(palabras))
+
+    def embeber(self, poemas, palabras):
+        """Matriz normalizada de poemas (media de sus palabras) e índices de las palabras clave.
+
+        Solo reúne los vectores de las palabras de estos poemas: puntuar la
+        llama bloque a bloque para no juntar los de toda la figura.
+        """
+        tokens, longitudes = [], []
+        for poema, palabra in zip(poemas, palabras):
+            clave = palabra.lower()
+            propias = [t for t in RE_PALABRA.findall(poema.lower()) if t not in VACIAS and t != clave]
+            tokens.extend(propias)
+            longitudes.append(len(propias))
+
+        ids = self._ids(tokens)
+        claves = self._ids([p.lower() for p in palabras])
+        longitudes = np.array(longitudes, dtype=np.intp)
+
+        poemas_vec = np.zeros((len(poemas), self.vectores.shape[1]), dtype=np.float32)
+        con_texto = longitudes > 0
+        if ids.size:
+            inicios = np.concatenate(([0], np.cumsum(longitudes)[:-1]))[con_texto]
+            sumas = np.add.reduceat(self.vectores[ids], inicios, axis=0)
+            poemas_vec[con_texto] = sumas / longitudes[con_texto, None]
+        return _normalizar_filas(poemas_vec), claves
+
+    def puntuar(self, poemas, palabras):
+        """(similitud, rango) por poema: coseno con su palabra y cuántas palabras del lote se le parecen más.
+
+        Los poemas sin vector (ninguna palabra con contenido, o palabra clave
+        sin vector) no se puntúan: similitud NaN y rango -1.
+        """
+        claves = self._ids([p.lower() for p in palabras])
+        distintas, propia = np.unique(claves, return_inverse=True)
+        unicas = _normalizar_filas(self.vectores[distintas])
+        clave_nula = ~unicas.any(axis=1)
+
+        similitud = np.empty(len(poemas), dtype=np.float32)
+        rango = np.empty(len(poemas), dtype=np.int32)
+        for inicio in range(0, len(poemas), self.tam_bloque):
+            fin = inicio + self.tam_bloque
+            poemas_vec, _ = self.embeber(poemas[inicio:fin], palabras[inicio:fin])
+            matriz = poemas_vec @ unicas.T      # Poemas del bloque × palabras clave distintas
+            suya = matriz[np.arange(matriz.shape[0]), propia[inicio:fin]]
+            sin_vector = ~poemas_vec.any(axis=1) | clave_nula[propia[inicio:fin]]
+            similitud[inicio:fin] = np.where(sin_vector, np.nan, suya)
+            rango[inicio:fin] = np.where(sin_vector, -1, (matriz > suya[:, None]).sum(axis=1))
+        return similitud, rango
+
+
+def main():
+    from corpus.validar import RAICES, buscar_archivos, poemas_de_archivo
+
+    parser = argparse.ArgumentParser(description="Puntúa la relevancia de cada poema respecto a su palabra clave")
+    parser.add_argument("raices", nargs="*", default=RAICES, help="Carpetas a recorrer")
+    parser.add_argument("--modelo", default=MODELO_FASTTEXT, help="Modelo fastText (.bin)")
+    parser.add_argument("--umbral", type=float, default=UMBRAL, help="Similitud mínima para aceptar el poema")
+    parser.add_argument("--salida", help="JSONL con la similitud y el rango de cada poema")
+    args = parser.parse_args()
+
+    # Solo los archivos con encabezado ======[PALABRA] saben a qué palabra responde cada poema
+    por_figura = defaultdict(list)
+    for figura, ruta in buscar_archivos(args.raices):
+        for indice, (palabra, poema) in enumerate(poemas_de_archivo(ruta)):
+            if palabra:
+                por_figura[figura].append({"archivo": ruta, "indice": indice, "palabra": palabra, "poema": poema})
+    if not por_figura:
+        print("✗ No hay poemas con palabra clave en esas carpetas")
+        return
+
+    relevancia = Relevancia(args.modelo)
+    f_salida = open(args.salida, 'w', encoding='utf-8') if args.salida else None
+    try:
+        for figura, registros in sorted(por_figura.items()):
+            similitud, rango = relevancia.puntuar([r["poema"] for r in registros],
+                                                  [r["palabra"] for r in registros])
+            puntuados = ~np.isnan(similitud)
+            if not puntuados.any():
+                print(f"\n{figura}: ✗ ningún poema con vector ({len(registros)} sin vocabulario)")
+                continue
+            aceptados = int((similitud[puntuados] >= args.umbral).sum())
+            print(f"\n{figura}: {aceptados}/{int(puntuados.sum())} sobre el umbral {args.umbral} "
+                  f"| similitud media {similitud[puntuados].mean():.3f} "
+                  f"| rango mediano {int(np.median(rango[puntuados]))}")
+            if not puntuados.all():
+                print(f"  ⚠️ {int((~puntuados).sum())} poemas sin vocabulario, no puntuados")
+            for i in np.argsort(similitud)[:min(3, int(puntuados.sum()))]:   # Los NaN quedan al final
+                print(f"  ✗ {similitud[i]:.3f} [{registros[i]['palabra']}] «{registros[i]['poema'].split(chr(10))[0][:60]}»")
+            if f_salida:
+                for registro, s, r in zip(registros, similitud, rango):
+                    f_salida.write(json.dumps({"figura": figura, "archivo": registro["archivo"],
+                                               "indice": registro["indice"], "palabra": registro["palabra"],
+                                               "similitud": None if np.isnan(s) else round(float(s), 4),
+                                               "rango": None if r < 0 else int(r)},
+                                              ensure_ascii=False) + "\n")
+    finally:
+        if f_salida:
+            f_salida.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Silabeo del español y cómputo métrico de versos.
+
+Separa en sílabas con diptongos, triptongos, hiatos (vocal débil tildada,
+dos fuertes seguidas) y diéresis poética (süave, ruïdo); la h entre vocales
+es muda y no las separa (ahu-ma-do, prohi-bir, bú-ho); el verso suma las
+sílabas de sus palabras, aplica sinalefa entre vocal final e inicial y
+ajusta según la última palabra (aguda +1, llana 0, esdrújula −1).
+
+El silabeo de cada palabra se memoriza en una tabla acotada (LRU), así que
+un corpus entero se recorre rápido: el vocabulario se repite mucho.
+
+Uso:
+    python -m corpus.silabas "Del salón en el ángulo oscuro"
+"""
+import re
+import sys
+from functools import lru_cache
+
+# --- CONFIGURACIÓN ---
+TAM_MEMO = 200_000   # Palabras distintas que se recuerdan silabeadas
+
+FUERTES = set("aeoáéóíú")    # La débil tildada (í, ú) rompe el diptongo como una fuerte
+DEBILES = set("iuü")
+VOCALES = FUERTES | DEBILES | {"ï"}
+TILDADAS = set("áéíóú")
+INSEPARABLES = {"pr", "br", "tr", "dr", "cr", "kr", "gr", "fr",
+                "pl", "bl", "cl", "kl", "gl", "fl"}
+
+RE_PALABRA = re.compile(r"[a-záéíóúüïñ]+")
+
+
+def _unidades(palabra):
+    """Divide la palabra en (texto, tipo, diéresis) con tipo 'V' o 'C'.
+
+    Los dígrafos (ch, ll, rr, qu, gu+e/i) son una sola consonante; la 'y'
+    final o aislada es vocal; la 'ü' fuera de güe/güi y la 'ï' son diéresis.
+    La h entre vocales no es unidad: va pegada a la vocal siguiente ('hu').
+    """
+    unidades = []
+    i, n = 0, len(palabra)
+    while i < n:
+        c = palabra[i]
+        dos = palabra[i:i + 2]
+        siguiente = palabra[i + 1] if i + 1 < n else ""
+        if dos in ("ch", "ll", "rr"):
+            unidades.append((dos, "C", False))
+            i += 2
+        elif dos == "qu" or (dos == "gu" and palabra[i + 2:i + 3] in ("e", "i", "é", "í")):
+            unidades.append((dos, "C", False))
+            i += 2
+        elif c == "y":
+            # 'y' + vocal es consonante (ya, mayo); al final o sola es vocal (rey, y)
+            if siguiente and siguiente in VOCALES:
+                unidades.append((c, "C", False))
+            else:
+                unidades.append((c, "V", False))
+            i += 1
+        elif c == "ü":
+            # En güe/güi la diéresis solo indica que suena la u
+            anterior = palabra[i - 1] if i else ""
+            unidades.append((c, "V", anterior != "g"))
+            i += 1
+        elif c in VOCALES:
+            unidades.append((c, "V", c == "ï"))
+            i += 1
+        elif (c == "h" and unidades and unidades[-1][1] == "V"
+              and siguiente in VOCALES and siguiente != "y"):
+            # Muda entre vocales: se une a la siguiente para que cuenten diptongos e hiatos
+            texto = palabra[i:i + 2]
+            unidades.append((texto, "V", siguiente in ("ï", "ü")))
+            i += 2
+        else:
+            unidades.append((c, "C", False))
+            i += 1
+    return unidades
+
+
+def _es_fuerte(vocal):
+    # La última letra: una vocal tras h muda llega como 'hu', 'ha'...
+    return vocal[-1] in FUERTES
+
+
+def _nucleos(vocales):
+    """Agrupa una racha de vocales en núcleos (diptongo/triptongo) o las separa (hiato)."""
+    nucleos = [[vocales[0]]]
+    for vocal in vocales[1:]:
+        actual = nucleos[-1]
+        texto_prev, _, dieresis_prev = actual[-1]
+        texto, _, dieresis = vocal
+        fuerte_en_nucleo = any(_es_fuerte(v[0]) for v in actual)
+        une = (not dieresis and not dieresis_prev
+               and not (_es_fuerte(texto) and fuerte_en_nucleo)
+               and not (texto[-1] == texto_prev[-1])
+               # Tras fuerte+débil solo puede venir otra débil cerrando triptongo
+               and not (_es_fuerte(texto) and len(actual) > 1))
+        if une:
+            actual.append(vocal)
+        else:
+            nucleos.append([vocal])
+    return nucleos
+
+
+def _repartir(consonantes):
+    """Cuántas consonantes de un grupo intervocálico se quedan en la sílaba anterior."""
+    k = len(consonantes)
+    if k <= 1:
+        return 0
+    final = "".join(c[0] for c in consonantes[-2:])
+    if k == 2:
+        return 0 if final in INSEPARABLES else 1
+    if k == 3:
+        return 1 if final in INSEPARABLES else 2
+    return k - 2
+
+
+@lru_cache(maxsize=TAM_MEMO)
+def silabas(palabra):
+    """Tupla con las sílabas de `palabra` (en minúsculas)."""
+    palabra = palabra.lower()
+    unidades = _unidades(palabra)
+    if not any(tipo == "V" for _, tipo, _ in unidades):
+        return (palabra,) if palabra else ()
+
+    # Rachas alternas de consonantes y vocales
+    rachas = []
+    for unidad in unidades:
+        if rachas and rachas[-1][0] == unidad[1]:
+            rachas[-1][1].append(unidad)
+        else:
+            rachas.append((unidad[1], [unidad]))
+
+    resultado = []
+    pendiente = ""   # Consonantes que abren la siguiente sílaba
+    for indice, (tipo, grupo) in enumerate(rachas):
+        if tipo == "V":
+            nucleos = _nucleos(grupo)
+            for j, nucleo in enumerate(nucleos):
+                texto = "".join(v[0] for v in nucleo)
+                resultado.append((pendiente if j == 0 else "") + texto)
+            pendiente = ""
+        elif not resultado:
+            pendiente = "".join(c[0] for c in grupo)
+        elif indice == len(rachas) - 1:
+            resultado[-1] += "".join(c[0] for c in grupo)
+        else:
+            corte = _repartir(grupo)
+            resultado[-1] += "".join(c[0] for c in grupo[:corte])
+            pendiente = "".join(c[0] for c in grupo[corte:])
+    return tuple(resultado)
+
+
+def tonica(palabra):
+    """Posición de la sílaba tónica contando desde el final (0 aguda, 1 llana, 2 esdrújula...)."""
+    partes = silabas(palabra)
+    for i, silaba in enumerate(partes):
+        if TILDADAS & set(silaba):
+            return len(partes) - 1 - i
+    if len(partes) == 1:
+        return 0
+    return 1 if palabra[-1] in "aeiouns" else 0
+
+
+def _empieza_vocal(palabra):
+    # hie-/hue- (hierba, huevo) suenan consonánticos y no admiten sinalefa
+    if palabra.startswith(("hie", "hue", "hia", "hui")):
+        return False
+    inicio = palabra[1:2] if palabra.startswith("h") else palabra[:1]
+    return inicio in VOCALES or palabra == "y"
+
+
+def _termina_vocal(palabra):
+    # La 'y' final ante vocal pasa a la sílaba siguiente (so-yun): no hay sinalefa
+    return palabra[-1:] in VOCALES or palabra == "y"
+
+
+def silabas_verso(verso, sinalefa=True):
+    """Sílabas fonológicas del verso, uniendo vocal final e inicial (sinalefa)."""
+    palabras = RE_PALABRA.findall(verso.lower())
+    total = 0
+    anterior_vocal = False
+    for palabra in palabras:
+        total += len(silabas(palabra))
+        if sinalefa and anterior_vocal and _empieza_vocal(palabra):
+            total -= 1
+        anterior_vocal = _termina_vocal(palabra)
+    return total
+
+
+def silabas_metricas(verso):
+    """Medida del verso: sílabas con sinalefa más el ajuste por acento final."""
+    palabras = RE_PALABRA.findall(verso.lower())
+    if not palabras:
+        return 0
+    return silabas_verso(verso) + 1 - tonica(palabras[-1])
+
+
+def medidas(poema):
+    """Medida métrica de cada verso no vacío del poema."""
+    return [silabas_metricas(linea) for linea in poema.split('\n') if linea.strip()]
+
+
+def dentro_de_metrica(poema, minimo, maximo):
+    """True si todos los versos miden entre `minimo` y `maximo` sílabas."""
+    return all(minimo <= m <= maximo for m in medidas(poema))
+
+
+def estadisticas_memo():
+    info = silabas.cache_info()
+    total = info.hits + info.misses
+    return (f"Memo de sílabas: {info.currsize}/{info.maxsize} palabras | "
+            f"aciertos {info.hits / total:.1%}" if total else "Memo de sílabas: vacía")
+
+
+def main():
+    versos = sys.argv[1:] or [linea.rstrip("\n") for linea in sys.stdin]
+    for verso in versos:
+        palabras = RE_PALABRA.findall(verso.lower())
+        silabeo = " ".join("-".join(silabas(p)) for p in palabras)
+        print(f"{silabeo}  →  {silabas_metricas(verso)} sílabas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Caché de entrenamiento pretokenizada y empaquetada para los LoRA.
+
+Cada entrada de los datasets ("Escribe un poema usando la figura retórica
+... Poema: ...") ronda los 100 tokens; entrenadas de una en una, casi toda
+la secuencia es relleno. Aquí el dataset se tokeniza una sola vez con el
+tokenizador del modelo base de models/LoRa/switch.py y se guarda en arrays
+NumPy con memory-map:
+
+    <base>.tokens.bin      todos los ids seguidos (uint32)
+    <base>.offsets.npy     documento i = tokens[offsets[i]:offsets[i + 1]]
+    <base>.figuras.npy     código de figura por documento (si el dataset la tiene)
+    <base>.meta.json       modelo, ids especiales, dtype y nombres de figura
+
+MuestreadorEmpaquetado agrupa varios documentos por secuencia (mejor ajuste
+decreciente), con position_ids que reinician en cada uno, así que las
+épocas no vuelven a tokenizar y las secuencias van casi llenas.
+
+Uso (desde la raíz del repo):
+    python -m corpus.tokens data/dataset_figuras-*.parquet     (o data/dataset_figuras.jsonl sin pyarrow)
+    python -m corpus.tokens figures/SIMIL/lotes/dataset_final_simil.jsonl --largo 1024
+"""
+import os
+import re
+import json
+import argparse
+from bisect import bisect_left, insort
+
+import numpy as np
+
+from corpus.escritor import leer_entradas
+
+# --- CONFIGURACIÓN ---
+MODELO_BASE = "unsloth/Llama-3.2-3B-Instruct"
+EOS = "<|eot_id|>"          # eos_token de Llama-3.2-Instruct (el que usa generate en switch.py)
+# Marcas de fin que los phrase.py dejaban como texto; se sustituyen por el id real
+MARCAS_EOS = ("<|endoftext|>", "<|eot_id|>", "<|end_of_text|>")
+
+LARGO_SECUENCIA = 2048
+TAM_LOTE_TOKENIZADOR = 1000
+DTYPE = np.uint32           # Vocabulario de 128k: no cabe en uint16
+IGNORAR = -100              # Etiqueta que la pérdida de transformers ignora
+
+RE_SHARD = re.compile(r"-\d{5}$")
+
+_tokenizadores = {}
+
+
+def _cargar_tokenizador(modelo=MODELO_BASE):
+    """transformers solo hace falta para tokenizar; se carga la primera vez."""
+    if modelo not in _tokenizadores:
+        from transformers import AutoTokenizer
+        _tokenizadores[modelo] = AutoTokenizer.from_pretrained(modelo)
+    return _tokenizadores[modelo]
+
+
+def quitar_eos(texto):
+    texto = texto.rstrip()
+    for marca in MARCAS_EOS:
+        if texto.endswith(marca):
+            return texto[:-len(marca)].rstrip()
+    return texto
+
+
+def _ruta(base, parte):
+    return f"{base}.{parte}"
+
+
+def tokenizar(rutas, base, modelo=MODELO_BASE, tokenizador=None, tam_lote=TAM_LOTE_TOKENIZADOR):
+    """Tokeniza las entradas de `rutas` (json, jsonl, arrow o parquet) en la caché `base`.
+
+    Cada documento queda como BOS + texto + EOS; la memoria usada es la de un
+    lote del tokenizador más los offsets (8 bytes por documento).
+    """
+    tokenizador = tokenizador or _cargar_tokenizador(modelo)
+    eos_id = tokenizador.eos_token_id
+    pad_id = tokenizador.pad_token_id if tokenizador.pad_token_id is not None else eos_id
+    os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+
+    offsets, figuras, nombres = [0], [], {}
+    pendientes = []
+
+    def volcar(destino):
+        textos = [quitar_eos(entrada["text"]) for entrada in pendientes]
+        lote = [ids + [eos_id] for ids in tokenizador(textos, add_special_tokens=True)["input_ids"]]
+        np.fromiter((t for ids in lote for t in ids), dtype=DTYPE).tofile(destino)
+        for ids in lote:
+            offsets.append(offsets[-1] + len(ids))
+        for entrada in pendientes:
+            if "figura" in entrada:
+                figuras.append(nombres.setdefault(entrada["figura"], len(nombres)))
+        pendientes.clear()
+
+    temporal = _ruta(base, "tokens.bin.tmp")
+    with open(temporal, 'wb') as destino:
+        for ruta in rutas:
+            for entrada in leer_entradas(ruta):
+                pendientes.append(entrada)
+                if len(pendientes) >= tam_lote:
+                    volcar(destino)
+        if pendientes:
+            volcar(destino)
+    os.replace(temporal, _ruta(base, "tokens.bin"))
+
+    np.save(_ruta(base, "offsets.npy"), np.asarray(offsets, dtype=np.int64))
+    if figuras:
+        if len(figuras) != len(offsets) - 1:
+            raise ValueError("Hay entradas con columna 'figura' y entradas sin ella")
+        np.save(_ruta(base, "figuras.npy"), np.asarray(figuras, dtype=np.uint8))
+    elif os.path.exists(_ruta(base, "figuras.npy")):
+        os.remove(_ruta(base, "figuras.npy"))
+
+    meta = {
+        "modelo": modelo,
+        "dtype": np.dtype(DTYPE).name,
+        "bos_id": tokenizador.bos_token_id,
+        "eos_id": eos_id,
+        "pad_id": pad_id,
+        "documentos": len(offsets) - 1,
+        "tokens": offsets[-1],
+        "figuras": sorted(nombres, key=nombres.get),
+    }
+    with open(_ruta(base, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return CacheTokens(base)
+
+
+class CacheTokens:
+    """Documentos tokenizados de una caché, leídos con memory-map (no se copian a RAM)."""
+
+    def __init__(self, base):
+        with open(_ruta(base, "meta.json"), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.base = base
+        self.offsets = np.load(_ruta(base, "offsets.npy"), mmap_mode='r')
+        self.tokens = np.memmap(_ruta(base, "tokens.bin"), dtype=self.meta["dtype"], mode='r',
+                                shape=(self.meta["tokens"],))
+        ruta_figuras = _ruta(base, "figuras.npy")
+        self.figuras = np.load(ruta_figuras, mmap_mode='r') if os.path.exists(ruta_figuras) else None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.tokens[self.offsets[i]:self.offsets[i + 1]]
+
+    def largos(self):
+        return np.diff(self.offsets)
+
+    def documentos(self, figura=None):
+        """Índices de los documentos (de una figura concreta, p. ej. para entrenar solo su adaptador)."""
+        if figura is None:
+            return np.arange(len(self))
+        if self.figuras is None or figura not in self.meta["figuras"]:
+            raise ValueError(f"La caché {self.base} no tiene documentos de la figura '{figura}'")
+        return np.flatnonzero(self.figuras == self.meta["figuras"].index(figura))
+
+    def resumen(self):
+        largos = self.largos()
+        return (f"Caché: {len(self)} documentos, {self.meta['tokens']} tokens "
+                f"(media {largos.mean():.0f}, máx {largos.max()}) con {self.meta['modelo']}")
+
+
+def empaquetar(largos, largo_secuencia=LARGO_SECUENCIA):
+    """Reparte documentos en secuencias de como mucho `largo_secuencia` tokens.
+
+    Mejor ajuste decreciente: de mayor a menor, cada documento va a la
+    secuencia abierta con menos hueco en la que cabe. Devuelve una lista de
+    listas de posiciones en `largos`.
+    """
+    secuencias = []
+    huecos = []   # (tokens libres, secuencia), ordenada
+    for doc in np.argsort(-np.asarray(largos), kind='stable'):
+        largo = min(int(largos[doc]), largo_secuencia)   # Los que no caben se truncan
+        i = bisect_left(huecos, (largo, -1))
+        if i < len(huecos):
+            libres, secuencia = huecos.pop(i)
+        else:
+            libres, secuencia = largo_secuencia, len(secuencias)
+            secuencias.append([])
+        secuencias[secuencia].append(int(doc))
+        if libres - largo:
+            insort(huecos, (libres - largo, secuencia))
+    return secuencias
+
+
+class MuestreadorEmpaquetado:
+    """Lotes de secuencias empaquetadas a partir de una CacheTokens.
+
+    Cada lote es un dict de arrays (tam_lote × largo_secuencia) con
+    input_ids, labels (IGNORAR en el relleno y en el primer token de cada
+    documento, para no aprender a predecir un poema desde el anterior),
+    attention_mask y position_ids reiniciados por documento (con
+    flash_attention_2, transformers no mezcla la atención entre documentos
+    gracias a ellos), listos para torch.from_numpy. El empaquetado se calcula una vez; cada época solo
+    baraja el orden de las secuencias.
+    """
+
+    def __init__(self, cache, largo_secuencia=LARGO_SECUENCIA, tam_lote=8, figura=None, semilla=0):
+        self.cache = cache
+        self.largo_secuencia = largo_secuencia
+        self.tam_lote = tam_lote
+        self.semilla = semilla
+        self.pad_id = cache.meta["pad_id"]
+        documentos = cache.documentos(figura)
+        largos = cache.largos()[documentos]
+        self.secuencias = [[int(documentos[i]) for i in secuencia]
+                           for secuencia in empaquetar(largos, largo_secuencia)]
+        self.tokens_utiles = int(np.minimum(largos, largo_secuencia).sum())
+
+    def __len__(self):
+        return -(-len(self.secuencias) // self.tam_lote)
+
+    def utilizacion(self):
+        return self.tokens_utiles / (len(self.secuencias) * self.largo_secuencia)
+
+    def _lote(self, secuencias):
+        forma = (len(secuencias), self.largo_secuencia)
+        input_ids = np.full(forma, self.pad_id, dtype=np.int64)
+        labels = np.full(forma, IGNORAR, dtype=np.int64)
+        position_ids = np.zeros(forma, dtype=np.int64)
+        attention_mask = np.zeros(forma, dtype=np.int64)
+        for fila, secuencia in enumerate(secuencias):
+            inicio = 0
+            for doc in secuencia:
+                ids = self.cache[doc][:self.largo_secuencia - inicio]
+                fin = inicio + len(ids)
+                input_ids[fila, inicio:fin] = ids
+                labels[fila, inicio + 1:fin] = ids[1:]
+                position_ids[fila, inicio:fin] = np.arange(len(ids))
+                attention_mask[fila, inicio:fin] = 1
+                inicio = fin
+        return {"input_ids": input_ids, "labels": labels,
+                "attention_mask": attention_mask, "position_ids": position_ids}
+
+    def epoca(self, numero=0):
+        orden = np.random.default_rng(self.semilla + numero).permutation(len(self.secuencias))
+        for i in range(0, len(orden), self.tam_lote):
+            yield self._lote([self.secuencias[j] for j in orden[i:i + self.tam_lote]])
+
+    def __iter__(self):
+        return self.epoca(0)
+
+    def resumen(self):
+        return (f"Empaquetado: {self.tokens_utiles} tokens en {len(self.secuencias)} secuencias de "
+                f"{self.largo_secuencia} | utilización {self.utilizacion():.1%} | {len(self)} lotes de {self.tam_lote}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokeniza una vez un dataset y lo guarda como caché empaquetable")
+    parser.add_argument("entradas", nargs="+", help="Dataset(s) .json, .jsonl, .arrow o .parquet")
+    parser.add_argument("--salida", help="Ruta base de la caché (por defecto, la de la primera entrada)")
+    parser.add_argument("--modelo", default=MODELO_BASE, help="Modelo base cuyo tokenizador se usa")
+    parser.add_argument("--largo", type=int, default=LARGO_SECUENCIA, help="Tokens por secuencia empaquetada")
+    args = parser.parse_args()
+
+    # dataset_figuras-00000.parquet -> dataset_figuras
+    base = args.salida or RE_SHARD.sub("", os.path.splitext(args.entradas[0])[0])
+    cache = tokenizar(args.entradas, base, args.modelo)
+    print(f"✓ {cache.resumen()} → {base}.*")
+    muestreador = MuestreadorEmpaquetado(cache, args.largo)
+    print(f"  {muestreador.resumen()} (sin empaquetar: {len(cache) * args.largo} tokens por época)")
+    for figura in cache.meta["figuras"]:
+        print(f"  {figura}: {MuestreadorEmpaquetado(cache, args.largo, figura=figura).resumen()}")
+
+
+if __name__ == "__main__":
+    main()
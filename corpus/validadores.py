@@ -0,0 +1,271 @@
+"""Validadores de figura retórica por lotes (los usan los generadores y corpus.validar).
+
+Paralelismo y epíteto se revisan por categorías gramaticales con spaCy, que
+es una dependencia opcional:
+
+    pip install spacy
+    python -m spacy download es_core_news_md
+
+Sin spaCy (o sin el modelo) esas dos figuras se quedan en los chequeos de
+estructura, basura y palabra clave, y se avisa una sola vez.
+"""
+import re
+from difflib import SequenceMatcher
+
+import numpy as np
+
+from corpus.basura import revisar_basura
+from corpus.fonetica import MIN_DENSIDAD, puntuar_lote
+from corpus.lemas import contiene_palabra
+from corpus.silabas import silabas_metricas
+
+# --- CONFIGURACIÓN ---
+VERSOS = 4
+MODELO_SPACY = "es_core_news_md"
+MIN_CONJUNCIONES = 2       # Polisíndeton: conjunciones por verso
+MIN_COMAS = 2              # Asíndeton: comas por verso
+MIN_SIMILITUD_POS = 0.7    # Paralelismo: parecido entre esqueletos gramaticales
+MIN_PARES_PARALELOS = 2    # Paralelismo: pares de versos con el mismo esqueleto
+
+# Patrones precompilados (se reutilizan en todos los poemas de un lote)
+RE_PALABRA = re.compile(r"[^\W\d_]+")
+RE_POLISINDETON = re.compile(r"\b(?:y|e|ni)\b")
+RE_CONJUNCION = re.compile(r"\b(?:y|e|o|u|ni)\b")
+RE_SIMIL = re.compile(r"\b(?:como|cual|cuales)\b")
+
+# Palabras que por sí solas no hacen anáfora ("El mar... / El viento...")
+VACIAS = frozenset("""el la los las un una unos unas lo al del de en a y e o u ni
+que se su sus mi mis tu tus con por para sin sobre""".split())
+
+_nlp = None     # False si spaCy o su modelo no están instalados
+
+
+def versos(poema):
+    return [linea.strip() for linea in poema.split('\n') if linea.strip()]
+
+
+def _palabras(verso):
+    return RE_PALABRA.findall(verso.lower())
+
+
+# --- CHEQUEOS POR FIGURA ---
+# Cada uno devuelve None si el poema es válido o el motivo del rechazo.
+
+def revisar_versos(lineas):
+    if len(lineas) < VERSOS:
+        return f"menos de {VERSOS} versos"
+    return None
+
+
+def revisar_anafora(lineas):
+    iniciales = [_palabras(verso) for verso in lineas[:VERSOS]]
+    comun = 0
+    for palabras in zip(*iniciales):
+        if len(set(palabras)) > 1:
+            break
+        comun += 1
+    repetido = iniciales[0][:comun] if iniciales and iniciales[0] else []
+    if not any(p not in VACIAS for p in repetido):
+        return "sin repetición al inicio de verso"
+    return None
+
+
+# Chequeos de un verso suelto: los usan revisar_* y, verso a verso, las reglas de streaming
+
+def verso_polisindeton(verso):
+    if len(RE_POLISINDETON.findall(verso.lower())) < MIN_CONJUNCIONES:
+        return "verso con pocas conjunciones"
+    return None
+
+
+def verso_asindeton(verso):
+    if RE_CONJUNCION.search(verso.lower()):
+        return "conjunción en verso"
+    if verso.count(',') < MIN_COMAS:
+        return "verso con pocas comas"
+    return None
+
+
+def verso_simil(verso):
+    if not RE_SIMIL.search(verso.lower()):
+        return "verso sin 'como'/'cual'"
+    return None
+
+
+def _primer_motivo(revisar, lineas):
+    for verso in lineas[:VERSOS]:
+        motivo = revisar(verso)
+        if motivo:
+            return motivo
+    return None
+
+
+def revisar_polisindeton(lineas):
+    return _primer_motivo(verso_polisindeton, lineas)
+
+
+def revisar_asindeton(lineas):
+    return _primer_motivo(verso_asindeton, lineas)
+
+
+def revisar_simil(lineas):
+    return _primer_motivo(verso_simil, lineas)
+
+
+def revisar_aliteracion(poemas_versos):
+    """Densidad de la consonante dominante de cada poema, puntuada en bloque con NumPy."""
+    puntuaciones = puntuar_lote(["\n".join(lineas[:VERSOS]) for lineas in poemas_versos])
+    motivos = []
+    for puntuacion in puntuaciones:
+        if np.isnan(puntuacion):
+            # Ningún verso llega a MIN_CONSONANTES: la densidad no se puede medir
+            motivos.append("muy pocas consonantes para medir la aliteración")
+        elif puntuacion < MIN_DENSIDAD:
+            motivos.append("aliteración débil")
+        else:
+            motivos.append(None)
+    return motivos
+
+
+def _cargar_spacy():
+    """Modelo de spaCy, o None (avisando solo la primera vez) si no está disponible."""
+    global _nlp
+    if _nlp is None:
+        try:
+            import spacy
+            _nlp = spacy.load(MODELO_SPACY, disable=["ner", "parser", "lemmatizer"])
+        except (ImportError, OSError) as e:
+            print(f"⚠️ Sin spaCy/{MODELO_SPACY} ({e}): paralelismo y epíteto sin chequeo gramatical. "
+                  f"Instalar con: pip install spacy && python -m spacy download {MODELO_SPACY}")
+            _nlp = False
+    return _nlp or None
+
+
+def _analizar(poemas_versos):
+    """Etiqueta POS de todos los versos de un lote en una sola pasada de spaCy (None sin spaCy)."""
+    nlp = _cargar_spacy()
+    if nlp is None:
+        return None
+    planos = [verso for lineas in poemas_versos for verso in lineas[:VERSOS]]
+    docs = iter(nlp.pipe(planos, batch_size=1000))
+    return [[next(docs) for _ in lineas[:VERSOS]] for lineas in poemas_versos]
+
+
+def revisar_paralelismo(docs):
+    esqueletos = [[t.pos_ for t in doc if not t.is_punct] for doc in docs]
+    pares = sum(
+        1 for a, b in zip(esqueletos, esqueletos[1:])
+        if SequenceMatcher(None, a, b, autojunk=False).ratio() >= MIN_SIMILITUD_POS
+    )
+    if pares < MIN_PARES_PARALELOS:
+        return "esqueletos gramaticales distintos"
+    return None
+
+
+def revisar_epiteto(docs):
+    for doc in docs:
+        etiquetas = [t.pos_ for t in doc if not t.is_punct]
+        if not any({a, b} == {"ADJ", "NOUN"} for a, b in zip(etiquetas, etiquetas[1:])):
+            return "verso sin adjetivo junto a sustantivo"
+    return None
+
+
+CHEQUEOS_TEXTO = {
+    "anafora": revisar_anafora,
+    "polisindeton": revisar_polisindeton,
+    "asindeton": revisar_asindeton,
+    "simil": revisar_simil,
+}
+CHEQUEOS_VERSO = {
+    "polisindeton": verso_polisindeton,
+    "asindeton": verso_asindeton,
+    "simil": verso_simil,
+}
+CHEQUEOS_POS = {
+    "paralelismo": revisar_paralelismo,
+    "epiteto": revisar_epiteto,
+}
+# Reciben los versos de todos los poemas pendientes y devuelven un motivo por poema
+CHEQUEOS_LOTE = {
+    "aliteracion": revisar_aliteracion,
+}
+# Metáfora, hipérbole y pleonasmo: solo estructura y palabra clave
+FIGURAS = sorted(set(CHEQUEOS_TEXTO) | set(CHEQUEOS_POS) | set(CHEQUEOS_LOTE)
+                 | {"metafora", "hiperbole", "pleonasmo"})
+
+
+def revisar_metrica(lineas, minimo, maximo):
+    for verso in lineas[:VERSOS]:
+        if not minimo <= silabas_metricas(verso) <= maximo:
+            return "verso fuera de métrica"
+    return None
+
+
+def regla_versos(figura):
+    """Los chequeos por verso de `figura` como regla de generacion.vigilancia.
+
+    Solo juzga versos completos (o todos cuando `final`), así que en modo
+    --streaming se aborta exactamente lo que validar_lote rechazaría.
+    """
+    revisar = CHEQUEOS_VERSO[figura]
+
+    def regla(texto, final):
+        lineas = texto.split('\n')
+        if not final:
+            lineas = lineas[:-1]     # La última línea sigue escribiéndose
+        return _primer_motivo(revisar, versos("\n".join(lineas)))
+    return regla
+
+
+def validar_lote(figura, poemas, palabras=None, metrica=None):
+    """Valida una lista de poemas de `figura` y devuelve un motivo (o None) por poema.
+
+    Con `palabras` (una por poema) también se exige la palabra clave (o una
+    flexión suya, ver corpus.lemas) y con
+    `metrica` = (mín, máx) que cada verso mida eso en sílabas. Los chequeos
+    gramaticales etiquetan todo el lote con spaCy de una vez.
+    """
+    if figura not in FIGURAS:
+        raise ValueError(f"Figura sin validador: {figura}")
+    poemas_versos = [versos(poema or "") for poema in poemas]
+    motivos = [revisar_versos(lineas) for lineas in poemas_versos]
+
+    # Basura y fugas del modelo (otra escritura, inglés, "Nota:", numeración, versos de más)
+    for i, poema in enumerate(poemas):
+        if motivos[i] is None:
+            motivos[i] = revisar_basura(poema, palabras[i] if palabras is not None else None)
+
+    if palabras is not None:
+        for i, (poema, palabra) in enumerate(zip(poemas, palabras)):
+            if motivos[i] is None and palabra and not contiene_palabra(poema, palabra):
+                motivos[i] = "falta la palabra clave"
+
+    if metrica is not None:
+        for i, lineas in enumerate(poemas_versos):
+            if motivos[i] is None:
+                motivos[i] = revisar_metrica(lineas, *metrica)
+
+    if figura in CHEQUEOS_TEXTO:
+        revisar = CHEQUEOS_TEXTO[figura]
+        for i, lineas in enumerate(poemas_versos):
+            if motivos[i] is None:
+                motivos[i] = revisar(lineas)
+    elif figura in CHEQUEOS_POS:
+        pendientes = [i for i, motivo in enumerate(motivos) if motivo is None]
+        analizados = _analizar([poemas_versos[i] for i in pendientes])
+        # Sin spaCy se quedan con los chequeos anteriores
+        for i, docs in zip(pendientes, analizados or []):
+            motivos[i] = CHEQUEOS_POS[figura](docs)
+    elif figura in CHEQUEOS_LOTE:
+        pendientes = [i for i, motivo in enumerate(motivos) if motivo is None]
+        revisados = CHEQUEOS_LOTE[figura]([poemas_versos[i] for i in pendientes])
+        for i, motivo in zip(pendientes, revisados):
+            motivos[i] = motivo
+    return motivos
+
+
+def validador(figura, palabra_clave=True, metrica=None):
+    """Validador de un solo poema con la firma que usan los generadores: (poema, palabra) -> bool."""
+    def validar(poema, palabra):
+        return validar_lote(figura, [poema], [palabra] if palabra_clave else None, metrica)[0] is None
+    return validar
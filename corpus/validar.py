@@ -0,0 +1,93 @@
+"""Pasa los validadores de figura por todo el corpus ya generado.
+
+Recorre los *_lote_NNN.txt de figures/ y prompts/ (la figura sale del nombre
+del archivo), reparte un archivo por tarea entre todos los núcleos e imprime
+la tasa de poemas válidos y los motivos de rechazo por figura.
+
+Uso (desde la raíz del repo):
+    python -m corpus.validar
+    python -m corpus.validar figures/SIMIL --rechazados rechazados.jsonl
+    python -m corpus.validar prompts/1METAFORAA --metrica 7 11
+"""
+import os
+import re
+import json
+import argparse
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus.lector import leer_poemas
+from corpus.validadores import FIGURAS, validar_lote
+
+RAICES = ["figures", "prompts"]
+RE_ARCHIVO = re.compile(r"^(\w+?)_lote_\d+\.txt$")
+
+
+def poemas_de_archivo(ruta):
+    """Genera (palabra o None, poema) de un archivo de resultados, con los versos ya recortados."""
+    for palabra, _, poema in leer_poemas(ruta):
+        versos = [linea.strip() for linea in poema.split("\n") if linea.strip()]
+        if versos:
+            yield palabra, "\n".join(versos)
+
+
+def buscar_archivos(raices):
+    archivos = []
+    for raiz in raices:
+        for carpeta, _, nombres in os.walk(raiz):
+            for nombre in sorted(nombres):
+                encontrado = RE_ARCHIVO.match(nombre)
+                if encontrado and encontrado.group(1) in FIGURAS:
+                    archivos.append((encontrado.group(1), os.path.join(carpeta, nombre)))
+    return sorted(archivos)
+
+
+def validar_archivo(tarea):
+    figura, ruta, metrica = tarea
+    poemas = list(poemas_de_archivo(ruta))
+    palabras = [palabra for palabra, _ in poemas]
+    motivos = validar_lote(figura, [poema for _, poema in poemas],
+                           palabras if all(palabras) else None, metrica)
+    rechazados = [{"archivo": ruta, "indice": i, "palabra": palabras[i], "motivo": motivo}
+                  for i, motivo in enumerate(motivos) if motivo]
+    return figura, len(poemas), Counter(m for m in motivos if m), rechazados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valida las figuras del corpus generado")
+    parser.add_argument("raices", nargs="*", default=RAICES, help="Carpetas a recorrer")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="Procesos en paralelo")
+    parser.add_argument("--rechazados", help="JSONL donde guardar cada poema rechazado y su motivo")
+    parser.add_argument("--metrica", type=int, nargs=2, metavar=("MIN", "MAX"),
+                        help="Rechaza poemas con algún verso fuera de ese rango de sílabas")
+    args = parser.parse_args()
+
+    metrica = tuple(args.metrica) if args.metrica else None
+    archivos = [(figura, ruta, metrica) for figura, ruta in buscar_archivos(args.raices)]
+    print(f"Validando {len(archivos)} archivos con {args.procesos} procesos...")
+
+    totales = Counter()
+    motivos = defaultdict(Counter)
+    f_rechazados = open(args.rechazados, 'w', encoding='utf-8') if args.rechazados else None
+    try:
+        with ProcessPoolExecutor(max_workers=args.procesos) as pool:
+            for figura, total, conteo, rechazados in pool.map(validar_archivo, archivos, chunksize=4):
+                totales[figura] += total
+                motivos[figura].update(conteo)
+                if f_rechazados:
+                    for registro in rechazados:
+                        f_rechazados.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    finally:
+        if f_rechazados:
+            f_rechazados.close()
+
+    for figura in sorted(totales):
+        rechazos = sum(motivos[figura].values())
+        validos = totales[figura] - rechazos
+        print(f"\n{figura}: {validos}/{totales[figura]} válidos ({validos / max(totales[figura], 1):.1%})")
+        for motivo, n in motivos[figura].most_common():
+            print(f"  ✗ {motivo}: {n}")
+
+
+if __name__ == "__main__":
+    main()
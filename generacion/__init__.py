@@ -0,0 +1 @@
+"""Utilidades compartidas por los generadores de poemas (prompts/*)."""
@@ -0,0 +1,77 @@
+import time
+
+# --- PARÁMETROS ---
+SUAVIZADO = 0.3          # Peso de la última latencia en la media exponencial
+VETO_INICIAL = 2.0       # Segundos fuera de rotación tras un error
+VETO_MAXIMO = 120.0
+
+
+def normalizar_url(url):
+    """Acepta 'http://host:puerto' o la URL completa de /api/generate."""
+    url = url.rstrip('/')
+    if not url.endswith('/api/generate'):
+        url += '/api/generate'
+    return url
+
+
+class Endpoint:
+    """Estado de un daemon de Ollama: carga actual, latencia reciente y errores."""
+
+    def __init__(self, url):
+        self.url = normalizar_url(url)
+        self.en_vuelo = 0
+        self.latencia = None
+        self.completados = 0
+        self.errores = 0
+        self.veto = 0.0
+        self.vetado_hasta = 0.0
+
+    def puntuacion(self):
+        # Tiempo estimado hasta atender una petición más. Los endpoints sin
+        # latencia medida van primero (repartidos por carga) para sondearlos.
+        return ((self.en_vuelo + 1) * (self.latencia or 0.0), self.en_vuelo)
+
+
+class Balanceador:
+    """Reparte las peticiones al endpoint menos cargado y salta los que fallan."""
+
+    def __init__(self, urls):
+        if isinstance(urls, str):
+            urls = [urls]
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.inicio = time.monotonic()
+
+    def elegir(self, excluir=()):
+        """Devuelve el mejor endpoint no probado aún, o None si no queda ninguno."""
+        candidatos = [ep for ep in self.endpoints if ep not in excluir]
+        if not candidatos:
+            return None
+        ahora = time.monotonic()
+        sanos = [ep for ep in candidatos if ep.vetado_hasta <= ahora]
+        if sanos:
+            return min(sanos, key=Endpoint.puntuacion)
+        # Todos vetados: se prueba el que antes sale del veto
+        return min(candidatos, key=lambda ep: ep.vetado_hasta)
+
+    def registrar(self, endpoint, latencia, ok):
+        if ok:
+            endpoint.completados += 1
+            endpoint.veto = 0.0
+            if endpoint.latencia is None:
+                endpoint.latencia = latencia
+            else:
+                endpoint.latencia += SUAVIZADO * (latencia - endpoint.latencia)
+        else:
+            endpoint.errores += 1
+            endpoint.veto = min(VETO_MAXIMO, max(VETO_INICIAL, endpoint.veto * 2))
+            endpoint.vetado_hasta = time.monotonic() + endpoint.veto
+
+    def resumen(self):
+        minutos = (time.monotonic() - self.inicio) / 60.0
+        lineas = []
+        for ep in self.endpoints:
+            ritmo = ep.completados / minutos if minutos > 0 else 0.0
+            latencia = f"{ep.latencia:.2f} s" if ep.latencia is not None else "-"
+            lineas.append(f"{ep.url}: {ep.completados} poemas ({ritmo:.1f}/min) | "
+                          f"latencia {latencia} | errores {ep.errores}")
+        return "\n  ".join(lineas)
@@ -0,0 +1,124 @@
+"""Benchmark de rendimiento de los generadores contra el simulador de Ollama.
+
+Ejecuta el motor real (procesar_lote_figura) con la FIGURA de cada script
+prompts/*/poemas_*.py (sus validadores, reintentos y planificador de
+enfoques) sobre un lote sintético y mide poemas/s, latencia
+de cola, sobrecoste de reintentos, huecos sin ningún poema válido y tiempo
+acumulado esperando al control de ritmo (suma de las esperas de todas las
+tareas, puede superar al tiempo total). Debajo de la tabla va el ahorro de
+prefill de cada figura.
+
+Uso:
+    python -m generacion.banco --palabras 20 --latencia 0.2 --tps 80 --fallos 0.05
+"""
+import io
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+from generacion.cliente import ClienteOllama
+from generacion.diario import Diario
+from generacion.figuras import SCRIPTS, cargar_figura
+from generacion.lote import procesar_lote_figura
+from generacion.planificador import RUTA_TASAS, planificador_de
+from generacion.simulador import ConfigSimulador, arrancar_simulador
+
+PALABRAS = ["luna", "mar", "fuego", "sombra", "viento", "silencio", "alba", "tierra",
+            "llanto", "río", "niebla", "verso", "tiempo", "olvido", "brisa", "ceniza"]
+
+
+def percentil(valores, q):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+
+
+async def _ejecutar(figura, cliente, palabras, out_file, multiple, tmp):
+    # Las tasas de enfoque del banco van al directorio temporal, no junto al script
+    planificador = planificador_de(figura, os.path.join(tmp, RUTA_TASAS))
+    async with cliente:
+        await procesar_lote_figura(cliente, figura, palabras, out_file, diario=Diario(out_file),
+                                   multiple=multiple, planificador=planificador)
+
+
+def medir_figura(nombre, url, palabras, en_vuelo, streaming, multiple=False):
+    figura = cargar_figura(nombre)
+    cliente = ClienteOllama(url, en_vuelo=en_vuelo, streaming=streaming)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_file = figura.archivo_salida(1, base=tmp)
+        os.makedirs(os.path.dirname(out_file))
+
+        t0 = time.monotonic()
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(_ejecutar(figura, cliente, palabras, out_file, multiple, tmp))
+        duracion = time.monotonic() - t0
+
+        # Un '---' por poema escrito en ambos formatos de salida (también el texto_fallo de los huecos)
+        with open(out_file, encoding='utf-8') as f:
+            poemas = sum(1 for linea in f if linea.strip() == "---")
+
+    ritmo = cliente.ritmo
+    if figura.texto_fallo:
+        poemas -= cliente.huecos
+    # Peticiones mínimas sin reintentos: una por hueco (con poema o sin él), o una por palabra con --multiple
+    minimas = len(palabras) if multiple else poemas + cliente.huecos
+    return {
+        "figura": nombre,
+        "poemas": poemas,
+        "poemas_s": poemas / duracion if duracion else 0.0,
+        "p50": percentil(ritmo.latencias, 0.50),
+        "p95": percentil(ritmo.latencias, 0.95),
+        "p99": percentil(ritmo.latencias, 0.99),
+        "reintentos": (cliente.peticiones / minimas - 1.0) if minimas else 0.0,
+        "errores": cliente.errores,
+        "vacios": cliente.huecos,
+        "espera": ritmo.espera_total,
+        "duracion": duracion,
+        "prefill": cliente.prefill.resumen(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los generadores contra el simulador")
+    parser.add_argument("--figuras", nargs="+", default=list(SCRIPTS), choices=list(SCRIPTS))
+    parser.add_argument("--palabras", type=int, default=10, help="Palabras del lote sintético")
+    parser.add_argument("--en-vuelo", type=int, default=8)
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--multiple", action="store_true", help="Varios poemas por petición (JSON)")
+    parser.add_argument("--latencia", type=float, default=0.2)
+    parser.add_argument("--tps", type=float, default=80.0)
+    parser.add_argument("--paralelo", type=int, default=4)
+    parser.add_argument("--fallos", type=float, default=0.0)
+    parser.add_argument("--sin-palabra", type=float, default=0.1)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    palabras = [PALABRAS[i % len(PALABRAS)] for i in range(args.palabras)]
+    config = ConfigSimulador(args.latencia, args.tps, args.paralelo, args.fallos,
+                             args.sin_palabra, semilla=args.semilla)
+    servidor, url = arrancar_simulador(0, config)
+
+    print(f"{'figura':<13} {'poemas':>6} {'poemas/s':>9} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+          f"{'reint.':>7} {'errores':>7} {'vacíos':>6} {'espera ac.':>10} {'total s':>8}")
+    prefills = []
+    try:
+        for nombre in args.figuras:
+            r = medir_figura(nombre, url, palabras, args.en_vuelo, args.streaming, args.multiple)
+            prefills.append(r["prefill"])
+            print(f"{r['figura']:<13} {r['poemas']:>6} {r['poemas_s']:>9.2f} {r['p50']:>7.2f} "
+                  f"{r['p95']:>7.2f} {r['p99']:>7.2f} {r['reintentos']:>6.0%} {r['errores']:>7} "
+                  f"{r['vacios']:>6} {r['espera']:>10.1f} {r['duracion']:>8.1f}")
+    finally:
+        servidor.shutdown()
+    print()
+    for prefill in prefills:
+        print(f"  {prefill}")
+
+
+if __name__ == "__main__":
+    main()
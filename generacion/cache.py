@@ -0,0 +1,92 @@
+import json
+import time
+import sqlite3
+import hashlib
+
+# --- CONFIGURACIÓN POR DEFECTO ---
+RUTA_CACHE = "cache_generacion.sqlite"
+MAX_MB = 512
+
+
+class CacheGeneracion:
+    """Caché en disco (SQLite) de respuestas de Ollama.
+
+    La clave es un hash de modelo, prompt, opciones de muestreo (incluida la
+    semilla si la hay) y `variante`. La variante (índice del poema, intento)
+    distingue peticiones idénticas: varios poemas con el mismo prompt o los
+    reintentos de un poema rechazado no deben recibir la misma respuesta.
+
+    Cuando el tamaño supera `max_mb` se expulsan las entradas usadas hace
+    más tiempo (LRU) hasta bajar al 90 %.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE, max_mb=MAX_MB):
+        self.ruta = ruta
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsadas = 0
+        self._conn = sqlite3.connect(ruta)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS respuestas (
+            clave TEXT PRIMARY KEY,
+            respuesta TEXT NOT NULL,
+            bytes INTEGER NOT NULL,
+            ultimo_uso REAL NOT NULL)""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_uso ON respuestas(ultimo_uso)")
+        self._conn.commit()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM respuestas").fetchone()[0]
+
+    @staticmethod
+    def clave(payload, variante=0):
+        contenido = {
+            "model": payload.get("model"),
+            "prompt": payload.get("prompt"),
+            "system": payload.get("system"),
+            "format": payload.get("format"),
+            "options": payload.get("options", {}),
+            "variante": variante,
+        }
+        datos = json.dumps(contenido, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+    def obtener(self, clave):
+        fila = self._conn.execute("SELECT respuesta FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+        if fila is None:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        self._conn.execute("UPDATE respuestas SET ultimo_uso = ? WHERE clave = ?", (time.time(), clave))
+        self._conn.commit()
+        return fila[0]
+
+    def guardar(self, clave, respuesta):
+        tam = len(respuesta.encode('utf-8')) + len(clave)
+        previa = self._conn.execute("SELECT bytes FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+        self._conn.execute("INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?)",
+                           (clave, respuesta, tam, time.time()))
+        self._bytes += tam - (previa[0] if previa else 0)
+        if self._bytes > self.max_bytes:
+            self._expulsar()
+        self._conn.commit()
+
+    def _expulsar(self):
+        objetivo = int(self.max_bytes * 0.9)
+        filas = self._conn.execute("SELECT clave, bytes FROM respuestas ORDER BY ultimo_uso")
+        expulsar = []
+        for clave, tam in filas:
+            if self._bytes <= objetivo:
+                break
+            expulsar.append((clave,))
+            self._bytes -= tam
+        self._conn.executemany("DELETE FROM respuestas WHERE clave = ?", expulsar)
+        self.expulsadas += len(expulsar)
+
+    def resumen(self):
+        total = self.aciertos + self.fallos
+        tasa = 100.0 * self.aciertos / total if total else 0.0
+        return (f"Caché: {self.aciertos} aciertos / {self.fallos} fallos ({tasa:.0f} %) | "
+                f"{self._bytes / 1024 / 1024:.1f} MB | expulsadas: {self.expulsadas}")
+
+    def cerrar(self):
+        self._conn.close()
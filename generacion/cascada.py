@@ -0,0 +1,56 @@
+import re
+from collections import Counter
+
+
+def coste_por_defecto(modelo):
+    """Coste relativo de una petición: miles de millones de parámetros del tag ("qwen2.5:7b" → 7)."""
+    encontrado = re.search(r"(\d+(?:\.\d+)?)b\b", modelo.lower())
+    return float(encontrado.group(1)) if encontrado else 1.0
+
+
+class Cascada:
+    """Lista ordenada de modelos: se empieza por el más barato y solo se
+    escala al siguiente cuando el validador de la figura rechaza el poema.
+
+    Cuenta qué fracción de poemas sirve cada nivel y el coste medio por
+    poema aceptado (sumando también los intentos rechazados).
+    """
+
+    def __init__(self, modelos, costes=None):
+        self.modelos = list(modelos)
+        costes = costes or {}
+        self.costes = {m: costes.get(m, coste_por_defecto(m)) for m in self.modelos}
+        self.intentos = Counter()
+        self.aceptados = Counter()
+        self.sin_aceptar = 0
+        self.coste_total = 0.0
+
+    def modelo(self, intento):
+        # Agotada la cascada, los reintentos se quedan en el modelo mayor
+        return self.modelos[min(intento, len(self.modelos) - 1)]
+
+    def intentos_minimos(self, reintentos):
+        return max(reintentos + 1, len(self.modelos))
+
+    def registrar(self, modelo, aceptado):
+        self.intentos[modelo] += 1
+        self.coste_total += self.costes[modelo]
+        if aceptado:
+            self.aceptados[modelo] += 1
+
+    def registrar_fallo(self):
+        self.sin_aceptar += 1
+
+    def resumen(self):
+        aceptados = sum(self.aceptados.values())
+        total = aceptados + self.sin_aceptar
+        if not total:
+            return "Cascada: sin poemas"
+        niveles = " | ".join(
+            f"{m}: {self.aceptados[m] / total:.0%} ({self.aceptados[m]}/{self.intentos[m]} intentos)"
+            for m in self.modelos
+        )
+        coste_medio = self.coste_total / aceptados if aceptados else float('inf')
+        return (f"Cascada: {niveles} | sin aceptar: {self.sin_aceptar / total:.0%} | "
+                f"coste medio por poema aceptado: {coste_medio:.2f} "
+                f"(solo {self.modelos[-1]}: ≥ {self.costes[self.modelos[-1]]:.2f})")
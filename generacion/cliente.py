@@ -0,0 +1,172 @@
+import json
+import asyncio
+import time
+import aiohttp
+
+from generacion.balanceo import Balanceador
+from generacion.prefijo import PrefillPorFigura
+from generacion.ritmo import ControlRitmo
+from generacion.vigilancia import EstadisticasVigilancia, revisar
+
+# --- CONFIGURACIÓN POR DEFECTO ---
+OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
+EN_VUELO = 8
+TIMEOUT = 300
+
+
+def _clase(payload):
+    # Peticiones comparables en latencia: mismo modelo, largo y tipo de respuesta
+    return (payload.get('model'), payload.get('options', {}).get('num_predict'), 'format' in payload)
+
+
+class ClienteOllama:
+    """Cliente asíncrono de /api/generate con una sesión HTTP reutilizada.
+
+    `urls` puede ser una URL o una lista de daemons de Ollama: cada petición
+    va al menos cargado (peticiones en vuelo × latencia reciente) y, si falla
+    (5xx, conexión, timeout o stream corrupto), se reintenta en el siguiente;
+    un 4xx es culpa de la petición y no se reintenta. `en_vuelo` es el techo por endpoint; el
+    número real de peticiones simultáneas lo regula un ControlRitmo (AIMD).
+
+    Con `streaming=True` las respuestas se leen token a token y se comprueban
+    con las reglas de generacion.vigilancia: si una regla falla se corta la
+    conexión (Ollama deja de generar) y el intento cuenta como rechazado.
+
+    Con una `cache` (generacion.cache.CacheGeneracion) cada petición se busca
+    primero en disco y solo se envía a Ollama si no estaba.
+    """
+
+    def __init__(self, urls=OLLAMA_URL, en_vuelo=EN_VUELO, timeout=TIMEOUT, streaming=False,
+                 cache=None):
+        self.balanceador = Balanceador(urls)
+        self.en_vuelo = en_vuelo * len(self.balanceador.endpoints)
+        self.streaming = streaming
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.peticiones = 0
+        self.errores = 0
+        self.huecos = 0             # Poemas sin ningún intento válido (ver generacion.lote)
+        self.ritmo = ControlRitmo(maximo=self.en_vuelo)
+        self.vigilancia = EstadisticasVigilancia()
+        self.prefill = PrefillPorFigura()   # Ahorro de prefill de cada figura por separado
+        self.tokens_generados = 0   # eval_count acumulado (coste de salida)
+        self.cache = cache
+        self._sesion = None
+
+    async def __aenter__(self):
+        # Un conector por cliente: las conexiones keep-alive se reutilizan
+        conector = aiohttp.TCPConnector(limit=self.en_vuelo)
+        self._sesion = aiohttp.ClientSession(connector=conector, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._sesion.close()
+        if self.cache:
+            self.cache.cerrar()
+
+    async def generar(self, payload, reglas=None, variante=0):
+        """Envía `payload` a Ollama y devuelve el texto generado (o None si falla).
+
+        `reglas` solo se usa en modo streaming; un poema abortado devuelve None.
+        `variante` distingue en la caché peticiones con el mismo payload.
+        """
+        if self.cache is None:
+            return await self._generar_remoto(payload, reglas)
+
+        clave = self.cache.clave(payload, variante)
+        guardado = self.cache.obtener(clave)
+        if guardado is not None:
+            return guardado
+        texto = await self._generar_remoto(payload, reglas)
+        if texto:
+            self.cache.guardar(clave, texto)
+        return texto
+
+    async def _generar_remoto(self, payload, reglas):
+        usar_stream = self.streaming and reglas
+        payload = dict(payload, stream=bool(usar_stream))
+
+        async with self.ritmo:
+            self.peticiones += 1
+            t0 = time.monotonic()
+            probados = []
+            while True:
+                endpoint = self.balanceador.elegir(excluir=probados)
+                if endpoint is None:
+                    # Ningún endpoint respondió
+                    self.errores += 1
+                    self.ritmo.registrar(time.monotonic() - t0, ok=False)
+                    return None
+                probados.append(endpoint)
+
+                t_endpoint = time.monotonic()
+                endpoint.en_vuelo += 1
+                try:
+                    texto = await self._enviar(endpoint.url, payload, usar_stream, reglas)
+                except aiohttp.ClientResponseError as e:
+                    if 400 <= e.status < 500:
+                        # Error de la petición (p. ej. 404, modelo sin descargar): el
+                        # endpoint está sano, no se veta ni se frena el ritmo
+                        self.errores += 1
+                        print(f"Petición rechazada por {endpoint.url}: {e.status} {e.message}")
+                        return None
+                    self.balanceador.registrar(endpoint, time.monotonic() - t_endpoint, ok=False)
+                    print(f"Error del servidor {endpoint.url}: {e.status} {e.message}")
+                    continue
+                except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError) as e:
+                    # JSONDecodeError: línea truncada o corrupta del stream, como un corte de conexión
+                    self.balanceador.registrar(endpoint, time.monotonic() - t_endpoint, ok=False)
+                    print(f"Error de conexión con {endpoint.url}: {e!r}")
+                    continue
+                finally:
+                    endpoint.en_vuelo -= 1
+
+                if texto is None:
+                    # Abortado: no es una latencia representativa para el ritmo
+                    return None
+                self.balanceador.registrar(endpoint, time.monotonic() - t_endpoint, ok=True)
+                self.ritmo.registrar(time.monotonic() - t0, ok=True, clase=_clase(payload))
+                return texto.strip()
+
+    async def _enviar(self, url, payload, usar_stream, reglas):
+        async with self._sesion.post(url, json=payload) as response:
+            response.raise_for_status()
+            if usar_stream:
+                return await self._leer_stream(response, payload, reglas)
+            datos = await response.json()
+            self._registrar_metricas(datos)
+            return datos.get('response', '')
+
+    def _registrar_metricas(self, datos):
+        self.prefill.registrar(datos)
+        self.tokens_generados += datos.get('eval_count') or 0
+
+    async def _leer_stream(self, response, payload, reglas):
+        partes = []
+        recibidos = 0
+        async for linea in response.content:
+            if not linea.strip():
+                continue
+            fragmento = json.loads(linea)
+            partes.append(fragmento.get('response', ''))
+            recibidos += 1
+            final = fragmento.get('done', False)
+
+            motivo = revisar(reglas, "".join(partes).lstrip(), final=final)
+            if motivo:
+                self.vigilancia.tokens_recibidos += recibidos
+                num_predict = payload.get('options', {}).get('num_predict', recibidos)
+                self.vigilancia.registrar_aborto(motivo, recibidos, num_predict)
+                # Cerrar la conexión es lo que cancela la generación en Ollama
+                response.close()
+                return None
+            if final:
+                # El último fragmento trae las métricas (prompt_eval_count, ...)
+                self._registrar_metricas(fragmento)
+                break
+        else:
+            # El stream se cortó antes del fragmento final: el poema está incompleto
+            self.vigilancia.tokens_recibidos += recibidos
+            raise aiohttp.ClientPayloadError("stream cortado antes de done")
+
+        self.vigilancia.tokens_recibidos += recibidos
+        return "".join(partes)
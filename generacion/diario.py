@@ -0,0 +1,83 @@
+import os
+import json
+
+
+class Diario:
+    """Diario JSONL que acompaña a cada resultados/<figura>_lote_NNN.txt.
+
+    Registra cada poema terminado (orden de la palabra en el lote, palabra,
+    índice del poema, enfoque y texto) y, al escribir el bloque de una
+    palabra, el tamaño del archivo de salida. Al reanudar:
+      - el archivo de salida se recorta al último bloque confirmado, así un
+        bloque a medio escribir nunca queda duplicado;
+      - las palabras con bloque confirmado se saltan;
+      - los poemas ya generados de la palabra interrumpida se reutilizan.
+    """
+
+    def __init__(self, out_file, reiniciar=False):
+        self.out_file = out_file
+        self.ruta = out_file + ".diario"
+        self.poemas = {}
+        self.bloques = set()
+        self.fin_confirmado = 0
+
+        if reiniciar and os.path.exists(self.ruta):
+            os.remove(self.ruta)
+        self._cargar()
+        self._preparar_salida()
+        self._f = open(self.ruta, 'a', encoding='utf-8')
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta):
+            return
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    # Última línea cortada por el crash: se ignora
+                    break
+                clave = (registro["orden"], registro["palabra"])
+                if registro["tipo"] == "poema":
+                    self.poemas[clave + (registro["indice"],)] = (registro["enfoque"], registro["poema"])
+                elif registro["tipo"] == "bloque":
+                    self.bloques.add(clave)
+                    self.fin_confirmado = registro["fin"]
+
+    def _preparar_salida(self):
+        # Sin diario previo se empieza de cero, como antes
+        with open(self.out_file, 'ab') as f:
+            f.truncate(self.fin_confirmado)
+
+    def _escribir(self, registro):
+        self._f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def completado(self, orden, palabra):
+        return (orden, palabra) in self.bloques
+
+    def poema(self, orden, palabra, indice, enfoque):
+        """Devuelve el poema ya generado para ese hueco, o None si falta (o cambió el enfoque)."""
+        guardado = self.poemas.get((orden, palabra, indice))
+        if guardado and guardado[0] == enfoque:
+            return guardado[1]
+        return None
+
+    def enfoque(self, orden, palabra, indice):
+        """Enfoque con el que se generó el poema guardado en ese hueco (o None)."""
+        guardado = self.poemas.get((orden, palabra, indice))
+        return guardado[0] if guardado else None
+
+    def registrar_poema(self, orden, palabra, indice, enfoque, poema):
+        self.poemas[(orden, palabra, indice)] = (enfoque, poema)
+        self._escribir({"tipo": "poema", "orden": orden, "palabra": palabra,
+                        "indice": indice, "enfoque": enfoque, "poema": poema})
+
+    def registrar_bloque(self, orden, palabra, fin):
+        self.bloques.add((orden, palabra))
+        self.fin_confirmado = fin
+        self._escribir({"tipo": "bloque", "orden": orden, "palabra": palabra, "fin": fin})
+
+    def cerrar(self):
+        self._f.close()
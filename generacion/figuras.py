@@ -0,0 +1,61 @@
+import os
+import importlib.util
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cada script define su FIGURA; aquí solo se indica dónde está
+SCRIPTS = {
+    "metafora": "prompts/1METAFORAA/metafora/poemas_metafora.py",
+    "aliteracion": "prompts/3ALITERACION/poemas_aliteracion.py",
+    "paralelismo": "prompts/4_PARALELISMO/poemas_paralelismo.py",
+    "polisindeton": "prompts/5_POLISINDETON/poemas_poli.py",
+    "asindeton": "prompts/6_ASINDETON/poemas_asi.py",
+    "simil": "prompts/8_SIMIL/poemas_simil.py",
+    "epiteto": "prompts/EPITETO_HIPERBOLE/epiteto.py",
+    "hiperbole": "prompts/EPITETO_HIPERBOLE/hiperbole.py",
+}
+
+
+class Figura:
+    """Todo lo que distingue a una figura: prompt y opciones (vía `generar`),
+    enfoques, validador, formato de salida y rutas de lotes/resultados.
+
+    Las rutas son plantillas relativas a `directorio` (la carpeta del script)
+    que se rellenan con el número de lote.
+    """
+
+    def __init__(self, nombre, directorio, generar, validar, enfoques, poemas_por_palabra,
+                 escribir_bloque, salida, lotes="lotes/lote_{:03d}.txt", reintentos=0,
+                 texto_fallo=None, generar_multiple=None, cascada=None):
+        self.nombre = nombre
+        self.directorio = directorio
+        self.generar = generar
+        self.validar = validar
+        self.enfoques = enfoques
+        self.poemas_por_palabra = poemas_por_palabra
+        self.escribir_bloque = escribir_bloque
+        self.salida = salida
+        self.lotes = lotes
+        self.reintentos = reintentos
+        self.texto_fallo = texto_fallo
+        self.generar_multiple = generar_multiple
+        self.cascada = cascada
+
+    def archivo_lote(self, lote_num, base=None):
+        return os.path.join(self.directorio if base is None else base, self.lotes.format(lote_num))
+
+    def archivo_salida(self, lote_num, base=None):
+        return os.path.join(self.directorio if base is None else base, self.salida.format(lote_num))
+
+
+def cargar_figura(nombre):
+    """Importa el script de la figura y devuelve su FIGURA."""
+    ruta = os.path.join(RAIZ_REPO, SCRIPTS[nombre])
+    spec = importlib.util.spec_from_file_location(f"figura_{nombre}", ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo.FIGURA
+
+
+def cargar_registro(nombres=None):
+    return {nombre: cargar_figura(nombre) for nombre in (nombres or SCRIPTS)}
@@ -0,0 +1,19 @@
+# Formatos de bloque de los archivos resultados/*_lote_NNN.txt.
+# Los builders phrase.py dependen de estos separadores: no cambiarlos.
+
+SEPARADOR_TEMA = "==============================================="
+
+
+def bloque_separador(palabra, poemas):
+    """Formato de metáfora/aliteración: '---' antes de cada poema y línea de '=' al cerrar."""
+    partes = [f"---\n{poema}\n\n" for poema in poemas if poema]
+    partes.append(f"\n{SEPARADOR_TEMA}\n\n")
+    return "".join(partes)
+
+
+def bloque_encabezado(palabra, poemas):
+    """Formato '======[PALABRA]' del resto de figuras, con '---' después de cada poema."""
+    partes = [f"======[{palabra.upper()}]\n\n"]
+    partes += [f"{poema}\n\n---\n\n" for poema in poemas if poema]
+    partes.append("\n")
+    return "".join(partes)
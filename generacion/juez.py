@@ -0,0 +1,276 @@
+"""Verificación por lotes con un LLM juez para las figuras que las reglas no cubren.
+
+Metáfora, paralelismo, hipérbole... no se pueden comprobar del todo con
+expresiones regulares. En vez de una petición por poema, se empaquetan de 20
+a 50 poemas de los *_lote_NNN.txt en una sola petición con salida JSON
+estructurada y se guarda un veredicto por poema junto al archivo
+(<archivo>.juez.jsonl). Los poemas ya juzgados no se vuelven a enviar, y los
+phrase.py descartan los que el juez rechazó.
+
+Uso (desde la raíz del repo):
+    python -m generacion.juez prompts/1METAFORAA/META figures/PARALELISMO --por-peticion 30
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+
+from corpus.validar import buscar_archivos, poemas_de_archivo
+from generacion.prefijo import FIGURA_EN_CURSO
+
+# --- CONFIGURACIÓN ---
+MODELO_JUEZ = "qwen2.5:7b"
+POR_PETICION = 30                # Poemas por petición al juez (20-50 va bien con contextos de 8k)
+TOKENS_POR_VEREDICTO = 30        # Salida por poema: {"id", "valido", "motivo"}
+SUFIJO_VEREDICTOS = ".juez.jsonl"
+
+DEFINICIONES = {
+    "metafora": "identifica un término real con uno imaginario sin usar nexos comparativos (no 'como').",
+    "anafora": "repite la misma palabra o grupo de palabras al comienzo de varios versos.",
+    "aliteracion": "repite de forma evidente un mismo sonido consonante en muchas palabras de cada verso.",
+    "paralelismo": "repite la misma estructura gramatical en versos consecutivos cambiando las palabras.",
+    "polisindeton": "usa conjunciones ('y', 'ni') más de lo necesario entre los elementos de cada verso.",
+    "asindeton": "enumera elementos separados solo por comas, sin conjunciones.",
+    "simil": "compara dos elementos de forma explícita con 'como' o 'cual' en cada verso.",
+    "epiteto": "añade adjetivos que expresan una cualidad propia e inherente del sustantivo (la blanca nieve).",
+    "hiperbole": "exagera de forma desmesurada una cualidad o acción.",
+    "pleonasmo": "añade palabras redundantes que no aportan información (lo vi con mis propios ojos).",
+}
+
+INSTRUCCIONES = """Eres un profesor de literatura que corrige ejercicios de figuras retóricas.
+
+Te daré varios poemas numerados. Para cada uno decide si usa de forma clara y
+correcta la figura indicada, si está escrito en español y si es un poema (no
+un comentario, una negativa o una explicación).
+
+Responde solo con JSON: {"veredictos": [{"id": 1, "valido": true, "motivo": "..."}]}
+con un veredicto por poema, en el mismo orden y con el mismo id. El motivo es
+una frase corta que explique el rechazo (o "ok")."""
+
+
+def huella(poema):
+    """Identificador estable del poema (no depende de espacios ni de su posición en el archivo)."""
+    limpio = "\n".join(linea.strip() for linea in poema.split("\n") if linea.strip())
+    return hashlib.sha1(limpio.encode("utf-8")).hexdigest()[:16]
+
+
+def esquema_veredictos(n):
+    """Esquema JSON para el parámetro `format` de Ollama: exactamente n veredictos."""
+    return {
+        "type": "object",
+        "properties": {
+            "veredictos": {
+                "type": "array",
+                "minItems": n,
+                "maxItems": n,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer"},
+                        "valido": {"type": "boolean"},
+                        "motivo": {"type": "string"},
+                    },
+                    "required": ["id", "valido"],
+                },
+            }
+        },
+        "required": ["veredictos"],
+    }
+
+
+def prompt_juez(figura, poemas):
+    # Instrucciones fijas delante para reutilizar el prefijo en caché; los poemas al final
+    lista = "\n\n".join(f"[{i + 1}]\n{poema}" for i, poema in enumerate(poemas))
+    return f"""{INSTRUCCIONES}
+
+FIGURA: {figura.upper()}: {DEFINICIONES[figura]}
+
+POEMAS:
+{lista}
+
+Veredictos:"""
+
+
+def payload_juez(figura, poemas, modelo=MODELO_JUEZ):
+    return {
+        "model": modelo,
+        "prompt": prompt_juez(figura, poemas),
+        "stream": False,
+        "format": esquema_veredictos(len(poemas)),
+        "options": {
+            "temperature": 0.0,
+            "num_predict": len(poemas) * TOKENS_POR_VEREDICTO + 50,
+        },
+    }
+
+
+def veredictos_de_respuesta(texto, n):
+    """Lista de n (valido, motivo), con None en los poemas que el juez no devolvió bien."""
+    resultado = [None] * n
+    try:
+        items = json.loads(texto).get("veredictos", []) if texto else []
+    except (ValueError, AttributeError):
+        return resultado
+    if not isinstance(items, list):
+        return resultado
+
+    for posicion, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("valido"), bool):
+            continue
+        indice = item.get("id")
+        # Si el id no cuadra se asigna por posición
+        if not isinstance(indice, int) or not 1 <= indice <= n or resultado[indice - 1] is not None:
+            indice = posicion + 1
+        if indice <= n and resultado[indice - 1] is None:
+            resultado[indice - 1] = (item["valido"], str(item.get("motivo", "")).strip())
+    return resultado
+
+
+def ruta_veredictos(ruta):
+    return ruta + SUFIJO_VEREDICTOS
+
+
+def cargar_veredictos(ruta):
+    """{huella: valido} de los poemas ya juzgados de un archivo de resultados ({} si no hay)."""
+    veredictos = {}
+    archivo = ruta_veredictos(ruta)
+    if not os.path.exists(archivo):
+        return veredictos
+    with open(archivo, 'r', encoding='utf-8') as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                continue   # Línea a medio escribir si se cortó el proceso
+            veredictos[registro["huella"]] = registro["valido"]
+    return veredictos
+
+
+class EstadisticasJuez:
+    """Cuenta poemas juzgados y mide el coste del juez (tokens y tiempo).
+
+    El tiempo se da de dos formas: latencia media de cada petición (lo que
+    tarda el modelo en juzgar un paquete) y reloj de toda la ejecución
+    repartido entre los poemas juzgados, que con peticiones en paralelo es
+    mucho menor.
+    """
+
+    def __init__(self):
+        self.peticiones = 0
+        self.enviados = 0
+        self.juzgados = 0
+        self.validos = 0
+        self.tokens_prompt = 0
+        self.tokens_salida = 0
+        self.segundos = 0.0     # Reloj de toda la ejecución
+        self.latencias = []     # De cada petición a Ollama (sin la espera del ControlRitmo)
+
+    def registrar(self, enviados, veredictos):
+        self.peticiones += 1
+        self.enviados += enviados
+        juzgados = [v for v in veredictos if v is not None]
+        self.juzgados += len(juzgados)
+        self.validos += sum(1 for valido, _ in juzgados if valido)
+
+    def _ms_por_peticion(self):
+        if not self.latencias:
+            return "- ms"
+        return f"{sum(self.latencias) / len(self.latencias) * 1000:.0f} ms"
+
+    def resumen(self):
+        if not self.juzgados:
+            return "Juez: sin veredictos"
+        return (f"Juez: {self.juzgados}/{self.enviados} poemas juzgados en {self.peticiones} peticiones "
+                f"({self.enviados / self.peticiones:.1f} poemas/petición) | válidos {self.validos / self.juzgados:.1%} | "
+                f"coste ≈ {self.tokens_prompt / self.juzgados:.0f} tokens de prompt + "
+                f"{self.tokens_salida / self.juzgados:.0f} de salida por poema | "
+                f"latencia {self._ms_por_peticion()} por petición | "
+                f"reloj {self.segundos / self.juzgados * 1000:.0f} ms por poema juzgado (peticiones en paralelo)")
+
+
+async def juzgar_archivo(cliente, figura, ruta, por_peticion=POR_PETICION, modelo=MODELO_JUEZ,
+                         estadisticas=None):
+    """Juzga los poemas de `ruta` que aún no tienen veredicto y los añade a <ruta>.juez.jsonl."""
+    FIGURA_EN_CURSO.set(figura)
+    ya_juzgados = cargar_veredictos(ruta)
+    pendientes, vistos = [], set()
+    for poema in (poema for _, poema in poemas_de_archivo(ruta)):
+        h = huella(poema)
+        if h not in ya_juzgados and h not in vistos:
+            vistos.add(h)
+            pendientes.append((h, poema))
+    if not pendientes:
+        return 0
+
+    paquetes = [pendientes[i:i + por_peticion] for i in range(0, len(pendientes), por_peticion)]
+
+    async def juzgar_paquete(paquete):
+        poemas = [poema for _, poema in paquete]
+        texto = await cliente.generar(payload_juez(figura, poemas, modelo))
+        veredictos = veredictos_de_respuesta(texto, len(poemas))
+        if estadisticas:
+            estadisticas.registrar(len(poemas), veredictos)
+        return [(h, v) for (h, _), v in zip(paquete, veredictos) if v is not None]
+
+    resultados = await asyncio.gather(*(juzgar_paquete(p) for p in paquetes))
+    nuevos = 0
+    with open(ruta_veredictos(ruta), 'a', encoding='utf-8') as f:
+        for lista in resultados:
+            for h, (valido, motivo) in lista:
+                f.write(json.dumps({"huella": h, "valido": valido, "motivo": motivo}, ensure_ascii=False) + "\n")
+                nuevos += 1
+    print(f"  ✓ {ruta}: {nuevos}/{len(pendientes)} veredictos nuevos")
+    return nuevos
+
+
+async def juzgar(archivos, cliente, por_peticion=POR_PETICION, modelo=MODELO_JUEZ):
+    estadisticas = EstadisticasJuez()
+    async with cliente:
+        t0 = time.monotonic()
+        tokens_prompt, tokens_salida = cliente.prefill.tokens_evaluados, cliente.tokens_generados
+        latencias_previas = len(cliente.ritmo.latencias)
+        await asyncio.gather(*(juzgar_archivo(cliente, figura, ruta, por_peticion, modelo, estadisticas)
+                               for figura, ruta in archivos))
+        estadisticas.segundos = time.monotonic() - t0
+        estadisticas.latencias = cliente.ritmo.latencias[latencias_previas:]
+        estadisticas.tokens_prompt = cliente.prefill.tokens_evaluados - tokens_prompt
+        estadisticas.tokens_salida = cliente.tokens_generados - tokens_salida
+    return estadisticas
+
+
+def main():
+    # El cliente (aiohttp) solo hace falta para juzgar, no para leer veredictos desde los phrase.py
+    from generacion.cliente import ClienteOllama, EN_VUELO, OLLAMA_URL
+
+    parser = argparse.ArgumentParser(description="Juzga con un LLM los poemas ya generados, muchos por petición")
+    parser.add_argument("raices", nargs="+", help="Carpetas o archivos *_lote_NNN.txt a juzgar")
+    parser.add_argument("--figuras", nargs="+", choices=sorted(DEFINICIONES), help="Solo estas figuras")
+    parser.add_argument("--por-peticion", type=int, default=POR_PETICION, help="Poemas por petición al juez")
+    parser.add_argument("--modelo", default=MODELO_JUEZ, help="Modelo de Ollama que hace de juez")
+    parser.add_argument("--urls", nargs="+", default=[OLLAMA_URL], help="Uno o varios daemons de Ollama")
+    parser.add_argument("--en-vuelo", type=int, default=EN_VUELO, help="Máximo de peticiones simultáneas por daemon")
+    args = parser.parse_args()
+
+    archivos = [(figura, ruta) for figura, ruta in buscar_archivos(
+                    [r for r in args.raices if os.path.isdir(r)])
+                if not args.figuras or figura in args.figuras]
+    # Archivos sueltos: la figura sale del nombre, igual que en buscar_archivos
+    for ruta in (r for r in args.raices if os.path.isfile(r)):
+        figura = os.path.basename(ruta).split("_lote_")[0]
+        if figura in DEFINICIONES and (not args.figuras or figura in args.figuras):
+            archivos.append((figura, ruta))
+    if not archivos:
+        print("✗ No hay archivos de resultados que juzgar")
+        return
+
+    print(f"Juzgando {len(archivos)} archivos con {args.modelo} ({args.por_peticion} poemas por petición)...")
+    cliente = ClienteOllama(args.urls, en_vuelo=args.en_vuelo)
+    estadisticas = asyncio.run(juzgar(archivos, cliente, args.por_peticion, args.modelo))
+    print(f"\n{estadisticas.resumen()}")
+    print(f"  {cliente.prefill.resumen()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import os
+import asyncio
+
+from corpus.lemas import ESTADISTICAS as ESTADISTICAS_CLAVE
+from generacion.multiple import EstadisticasMultiples
+from generacion.prefijo import FIGURA_EN_CURSO
+
+
+async def generar_con_reintentos(cliente, generar, validar, palabra, enfoque,
+                                 reintentos=0, texto_fallo=None, indice=0, cascada=None,
+                                 tasas=None):
+    """Genera un poema y lo regenera hasta `reintentos` veces si `validar` lo rechaza.
+
+    Si ningún intento pasa la validación (o todos se abortan en streaming) el
+    hueco queda en `texto_fallo`, en los dos modos: un poema rechazado no se
+    escribe. Los huecos se cuentan en `cliente.huecos`. Con una
+    `cascada` cada rechazo escala al siguiente modelo de la lista. Con `tasas`
+    se anota cada intento como aceptado o rechazado para su enfoque.
+    """
+    intentos = cascada.intentos_minimos(reintentos) if cascada else reintentos + 1
+    for intento in range(intentos):
+        if cascada:
+            modelo = cascada.modelo(intento)
+            poema = await generar(cliente, palabra, enfoque, variante=(indice, intento), modelo=modelo)
+        else:
+            poema = await generar(cliente, palabra, enfoque, variante=(indice, intento))
+        aceptado = bool(poema) and validar(poema, palabra)
+        if cascada:
+            cascada.registrar(modelo, aceptado)
+        if tasas:
+            tasas.registrar(enfoque, aceptado)
+        if aceptado:
+            return poema
+        if intento < intentos - 1:
+            print(f"    [R] Reintento {intento + 1}/{intentos - 1} para '{palabra}'...")
+
+    if cascada:
+        cascada.registrar_fallo()
+    cliente.huecos += 1
+    print(f"  ✗ ERROR: Ningún poema válido para '{palabra}'.")
+    return texto_fallo
+
+
+async def _procesar_palabra(cliente, generar, validar, orden, palabra, enfoques,
+                            poemas_por_palabra, reintentos, texto_fallo, diario, cascada,
+                            plan, tasas):
+    async def un_poema(i):
+        enfoque = plan[(orden, i)] if plan else enfoques[i % len(enfoques)]
+        if diario:
+            guardado = diario.poema(orden, palabra, i, enfoque)
+            if guardado is not None:
+                return guardado
+
+        poema = await generar_con_reintentos(
+            cliente, generar, validar, palabra, enfoque,
+            reintentos=reintentos, texto_fallo=texto_fallo, indice=i, cascada=cascada,
+            tasas=tasas
+        )
+        # Los huecos no se registran: se reintentan al reanudar
+        if diario and poema and poema != texto_fallo:
+            diario.registrar_poema(orden, palabra, i, enfoque, poema)
+        return poema
+
+    return await asyncio.gather(*(un_poema(i) for i in range(poemas_por_palabra)))
+
+
+async def _procesar_palabra_multiple(cliente, generar_multiple, validar, orden, palabra,
+                                     enfoques, poemas_por_palabra, reintentos, texto_fallo,
+                                     diario, estadisticas, cascada, plan, tasas):
+    """Pide todos los poemas de la palabra en una sola petición JSON.
+
+    Cada poema se valida por separado; en los reintentos solo se vuelven a
+    pedir los huecos que fallaron.
+    """
+    enfoque_de = [plan[(orden, i)] if plan else enfoques[i % len(enfoques)]
+                  for i in range(poemas_por_palabra)]
+    poemas = [diario.poema(orden, palabra, i, enfoque_de[i]) if diario else None
+              for i in range(poemas_por_palabra)]
+    pendientes = [i for i, poema in enumerate(poemas) if poema is None]
+
+    intentos = cascada.intentos_minimos(reintentos) if cascada else reintentos + 1
+    for intento in range(intentos):
+        if not pendientes:
+            break
+        estadisticas.registrar(len(pendientes), intento > 0)
+        enfoques_pendientes = [enfoque_de[i] for i in pendientes]
+        if cascada:
+            modelo = cascada.modelo(intento)
+            respuesta = await generar_multiple(cliente, palabra, enfoques_pendientes,
+                                               variante=(tuple(pendientes), intento), modelo=modelo)
+        else:
+            respuesta = await generar_multiple(cliente, palabra, enfoques_pendientes,
+                                               variante=(tuple(pendientes), intento))
+        fallidos = []
+        for i, poema in zip(pendientes, respuesta):
+            aceptado = bool(poema) and validar(poema, palabra)
+            if cascada:
+                cascada.registrar(modelo, aceptado)
+            if tasas:
+                tasas.registrar(enfoque_de[i], aceptado)
+            if aceptado:
+                poemas[i] = poema
+                if diario:
+                    diario.registrar_poema(orden, palabra, i, enfoque_de[i], poema)
+                continue
+            fallidos.append(i)
+        pendientes = fallidos
+        if pendientes and intento < intentos - 1:
+            print(f"    [R] Reintento {intento + 1}/{intentos - 1} para '{palabra}' "
+                  f"({len(pendientes)} huecos)...")
+
+    # Misma política que generar_con_reintentos: los huecos sin poema válido quedan en texto_fallo
+    for i in pendientes:
+        if cascada:
+            cascada.registrar_fallo()
+        poemas[i] = texto_fallo
+    cliente.huecos += len(pendientes)
+    if pendientes:
+        print(f"  ✗ ERROR: {len(pendientes)} huecos sin poema válido para '{palabra}'.")
+    return poemas
+
+
+async def procesar_lote(cliente, palabras, out_file, escribir_bloque, generar, validar,
+                        enfoques, poemas_por_palabra, reintentos=0, texto_fallo=None,
+                        diario=None, generar_multiple=None, cascada=None, etiqueta="",
+                        multiples=None, resumen=True, plan=None, tasas=None):
+    """Genera todos los poemas de un lote con varias peticiones en vuelo.
+
+    Las palabras se lanzan a la vez (el ControlRitmo del cliente decide
+    cuántas peticiones van realmente en paralelo), pero los bloques se
+    escriben en `out_file` en el mismo orden que `palabras`, en cuanto cada
+    palabra está completa. Con un `diario` se saltan las palabras ya escritas
+    en una ejecución anterior y solo se genera lo que falta. Con
+    `generar_multiple` los poemas de cada palabra se piden juntos en una
+    sola petición con salida JSON. Con una `cascada` se empieza por el modelo
+    más barato y solo se escala cuando el validador rechaza el poema.
+
+    `plan` ({(orden, indice): enfoque}, ver Planificador) sustituye a la
+    rotación `enfoques[i % len(enfoques)]`; `tasas` acumula la aceptación por
+    enfoque y se guarda al terminar.
+
+    `etiqueta` antepone un nombre a cada línea de progreso y `resumen=False`
+    omite las estadísticas finales (útil cuando varios lotes comparten cliente).
+    """
+    pendientes = [
+        (orden, palabra) for orden, palabra in enumerate(palabras)
+        if not (diario and diario.completado(orden, palabra))
+    ]
+    if len(pendientes) < len(palabras):
+        print(f"  ↻ {etiqueta}Reanudando: {len(palabras) - len(pendientes)} palabras ya completas en el diario")
+
+    multiples = multiples or EstadisticasMultiples()
+    if generar_multiple:
+        tareas = [
+            asyncio.ensure_future(_procesar_palabra_multiple(
+                cliente, generar_multiple, validar, orden, palabra, enfoques,
+                poemas_por_palabra, reintentos, texto_fallo, diario, multiples, cascada,
+                plan, tasas
+            ))
+            for orden, palabra in pendientes
+        ]
+    else:
+        tareas = [
+            asyncio.ensure_future(_procesar_palabra(
+                cliente, generar, validar, orden, palabra, enfoques,
+                poemas_por_palabra, reintentos, texto_fallo, diario, cascada,
+                plan, tasas
+            ))
+            for orden, palabra in pendientes
+        ]
+
+    try:
+        # Binario para que tell() sea un desplazamiento real en bytes (lo usa el diario)
+        with open(out_file, 'ab') as f_out:
+            for (orden, palabra), tarea in zip(pendientes, tareas):
+                poemas = await tarea
+                f_out.write(escribir_bloque(palabra, poemas).encode('utf-8'))
+                f_out.flush()
+                if diario:
+                    os.fsync(f_out.fileno())
+                    diario.registrar_bloque(orden, palabra, f_out.tell())
+                generados = sum(1 for p in poemas if p and p != texto_fallo)
+                print(f"  ✓ {etiqueta}[{orden + 1}/{len(palabras)}] '{palabra}': {generados}/{poemas_por_palabra} poemas")
+        if resumen:
+            imprimir_resumen(cliente, multiples if generar_multiple else None, cascada)
+    finally:
+        # Si algo falla (o Ctrl-C) no dejamos peticiones huérfanas
+        for tarea in tareas:
+            tarea.cancel()
+        if diario:
+            diario.cerrar()
+        if tasas:
+            tasas.guardar()
+
+
+def imprimir_resumen(cliente, multiples=None, cascada=None, planificador=None):
+    print(f"  {cliente.ritmo.resumen()}")
+    print(f"  {cliente.prefill.resumen()}")
+    if multiples:
+        print(f"  {multiples.resumen()}")
+    if cascada:
+        print(f"  {cascada.resumen()}")
+    if planificador:
+        print(f"  {planificador.resumen()}")
+    if cliente.cache:
+        print(f"  {cliente.cache.resumen()}")
+    if len(cliente.balanceador.endpoints) > 1:
+        print(f"  {cliente.balanceador.resumen()}")
+    if cliente.streaming:
+        print(f"  {cliente.vigilancia.resumen()}")
+    if ESTADISTICAS_CLAVE.conteo:
+        print(f"  {ESTADISTICAS_CLAVE.resumen()}")
+
+
+async def procesar_lote_figura(cliente, figura, palabras, out_file, diario=None, multiple=False,
+                               cascada=None, planificador=None, **opciones):
+    """procesar_lote() con los parámetros de una Figura del registro.
+
+    Con un `planificador` los enfoques de cada poema salen de su plan en vez
+    de la rotación fija. Las peticiones del lote se miden en el prefill de
+    `figura.nombre` (ver generacion.prefijo).
+    """
+    FIGURA_EN_CURSO.set(figura.nombre)
+    if planificador:
+        opciones["plan"] = planificador.planificar(palabras, figura.poemas_por_palabra, diario)
+        opciones["tasas"] = planificador.tasas
+    await procesar_lote(
+        cliente, palabras, out_file, figura.escribir_bloque,
+        generar=figura.generar,
+        validar=figura.validar,
+        enfoques=figura.enfoques,
+        poemas_por_palabra=figura.poemas_por_palabra,
+        reintentos=figura.reintentos,
+        texto_fallo=figura.texto_fallo,
+        diario=diario,
+        generar_multiple=figura.generar_multiple if multiple else None,
+        cascada=cascada,
+        **opciones
+    )
+    if planificador and opciones.get("resumen", True):
+        print(f"  {planificador.resumen()}")
@@ -0,0 +1,109 @@
+"""Motor unificado: genera cualquier mezcla de figuras y lotes con un único cliente.
+
+Todos los (figura, lote, palabra, poema) pendientes comparten la misma
+ventana de peticiones en vuelo, así que el backend no se queda ocioso
+entre un script y el siguiente.
+
+Uso (desde la raíz del repo):
+    python -m generacion.motor simil:1-3 epiteto:1,4 polisindeton:2 --urls http://gpu1:11434 http://gpu2:11434
+"""
+import os
+import asyncio
+import argparse
+
+from generacion.cache import CacheGeneracion
+from generacion.cascada import Cascada
+from generacion.cliente import ClienteOllama, EN_VUELO, OLLAMA_URL
+from generacion.diario import Diario
+from generacion.figuras import SCRIPTS, cargar_registro
+from generacion.lote import imprimir_resumen, procesar_lote_figura
+from generacion.multiple import EstadisticasMultiples
+from generacion.planificador import planificador_de
+
+
+def parsear_trabajo(texto):
+    """'simil:1-3,5' → ('simil', [1, 2, 3, 5])."""
+    nombre, _, rangos = texto.partition(":")
+    if nombre not in SCRIPTS:
+        raise argparse.ArgumentTypeError(f"Figura desconocida: {nombre} (disponibles: {', '.join(SCRIPTS)})")
+    lotes = []
+    for rango in (rangos or "1").split(","):
+        inicio, _, fin = rango.partition("-")
+        lotes.extend(range(int(inicio), int(fin or inicio) + 1))
+    return nombre, lotes
+
+
+async def _procesar_trabajo(cliente, figura, lote_num, desde_cero, multiple, cascada, multiples,
+                            planificador):
+    lote_file = figura.archivo_lote(lote_num)
+    out_file = figura.archivo_salida(lote_num)
+    etiqueta = f"{figura.nombre}/{lote_num:03d} "
+
+    if not os.path.exists(lote_file):
+        print(f"[ERROR] No existe el archivo: {lote_file}. Saltando...")
+        return
+    os.makedirs(os.path.dirname(out_file), exist_ok=True)
+
+    with open(lote_file, 'r', encoding='utf-8') as f_in:
+        palabras = [line.strip() for line in f_in if line.strip()]
+
+    diario = Diario(out_file, reiniciar=desde_cero)
+    await procesar_lote_figura(
+        cliente, figura, palabras, out_file,
+        diario=diario, multiple=multiple, cascada=cascada, planificador=planificador,
+        etiqueta=etiqueta, multiples=multiples, resumen=False
+    )
+    print(f">>> {etiqueta}finalizado. Salida en: {out_file}")
+
+
+async def procesar_trabajos(trabajos, cliente, desde_cero=False, multiple=False, modelos=None):
+    """Lanza todos los lotes a la vez sobre el mismo cliente (pool compartido)."""
+    registro = cargar_registro(sorted({nombre for nombre, _ in trabajos}))
+    cascadas = {}
+    if modelos is not None:
+        cascadas = {nombre: Cascada(modelos or figura.cascada) for nombre, figura in registro.items()}
+    multiples = EstadisticasMultiples()
+    # Un plan de enfoques por figura para todos sus lotes; las tasas viven junto al script
+    planificadores = {nombre: planificador_de(figura) for nombre, figura in registro.items()}
+
+    async with cliente:
+        resultados = await asyncio.gather(*(
+            _procesar_trabajo(cliente, registro[nombre], lote_num, desde_cero, multiple,
+                              cascadas.get(nombre), multiples, planificadores[nombre])
+            for nombre, lotes in trabajos for lote_num in lotes
+        ), return_exceptions=True)
+
+    for (nombre, lote_num), resultado in zip(
+            [(n, l) for n, lotes in trabajos for l in lotes], resultados):
+        if isinstance(resultado, Exception):
+            print(f"✗ {nombre}/{lote_num:03d}: {resultado!r}")
+
+    imprimir_resumen(cliente, multiples if multiple else None)
+    for nombre, cascada in cascadas.items():
+        print(f"  [{nombre}] {cascada.resumen()}")
+    for nombre, planificador in planificadores.items():
+        print(f"  [{nombre}] {planificador.resumen()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera varias figuras y lotes con un pool compartido")
+    parser.add_argument("trabajos", nargs="+", type=parsear_trabajo, help="figura:lotes, p. ej. simil:1-3,5")
+    parser.add_argument("--urls", nargs="+", default=[OLLAMA_URL], help="Uno o varios daemons de Ollama (se reparte la carga)")
+    parser.add_argument("--en-vuelo", type=int, default=EN_VUELO, help="Máximo de peticiones simultáneas por daemon")
+    parser.add_argument("--desde-cero", action="store_true", help="Ignorar los diarios y regenerar los lotes completos")
+    parser.add_argument("--streaming", action="store_true", help="Leer token a token y abortar los poemas que rompan las reglas")
+    parser.add_argument("--sin-cache", action="store_true", help="No consultar ni guardar respuestas en la caché en disco")
+    parser.add_argument("--cache-mb", type=int, default=512, help="Tamaño máximo de la caché antes de expulsar entradas")
+    parser.add_argument("--multiple", action="store_true", help="Pedir todos los poemas de cada palabra en una sola petición JSON")
+    parser.add_argument("--cascada", nargs="*", metavar="MODELO", help="Cascada de modelos (por defecto la de cada figura)")
+    args = parser.parse_args()
+
+    cache = None if args.sin_cache else CacheGeneracion(max_mb=args.cache_mb)
+    cliente = ClienteOllama(args.urls, en_vuelo=args.en_vuelo, streaming=args.streaming, cache=cache)
+    asyncio.run(procesar_trabajos(args.trabajos, cliente, args.desde_cero, args.multiple, args.cascada))
+
+    print(f"\n[PROCESO COMPLETO]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import json
+
+# Sustituye al enfoque único en construir_prompt(): la lista va al final del prompt
+ENFOQUE_MULTIPLE = "Uno distinto para cada poema, según la lista del final"
+
+# Tokens de salida extra por poema para la sintaxis JSON (llaves, comillas, enfoque)
+TOKENS_JSON_POR_POEMA = 40
+
+
+def esquema_poemas(n):
+    """Esquema JSON para el parámetro `format` de Ollama: n poemas de 4 versos."""
+    return {
+        "type": "object",
+        "properties": {
+            "poemas": {
+                "type": "array",
+                "minItems": n,
+                "maxItems": n,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "enfoque": {"type": "string"},
+                        "versos": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "minItems": 4,
+                            "maxItems": 4,
+                        },
+                    },
+                    "required": ["enfoque", "versos"],
+                },
+            }
+        },
+        "required": ["poemas"],
+    }
+
+
+def prompt_multiple(prompt, enfoques):
+    """Convierte el prompt de un poema en uno que pide un poema por enfoque."""
+    if prompt.endswith("Poema:"):
+        prompt = prompt[:-len("Poema:")].rstrip()
+    lista = "\n".join(f"{i + 1}. {enfoque}" for i, enfoque in enumerate(enfoques))
+    return f"""{prompt}
+
+VARIOS POEMAS: escribe {len(enfoques)} poemas distintos, cada uno de exactamente 4 versos
+y cumpliendo todas las reglas anteriores, uno por cada enfoque y en este orden:
+{lista}
+Responde solo con JSON: {{"poemas": [{{"enfoque": "...", "versos": ["...", "...", "...", "..."]}}]}}"""
+
+
+def payload_multiple(payload, enfoques):
+    """Adapta el payload de un poema para pedir len(enfoques) poemas en JSON."""
+    n = len(enfoques)
+    opciones = dict(payload.get("options", {}))
+    # Las paradas de un poema ("\n\n", "Nota:"...) cortarían el JSON a medias
+    opciones.pop("stop", None)
+    if "num_predict" in opciones:
+        opciones["num_predict"] = n * (opciones["num_predict"] + TOKENS_JSON_POR_POEMA)
+    return dict(payload, prompt=prompt_multiple(payload["prompt"], enfoques),
+                format=esquema_poemas(n), options=opciones)
+
+
+def poemas_de_respuesta(texto, enfoques):
+    """Extrae un poema por enfoque de la respuesta JSON (None en los huecos fallidos).
+
+    Los poemas se asignan por su etiqueta de enfoque y, si el modelo la
+    altera, por posición.
+    """
+    huecos = [None] * len(enfoques)
+    if not texto:
+        return huecos
+    try:
+        poemas = json.loads(texto).get("poemas", [])
+    except (ValueError, AttributeError):
+        return huecos
+    if not isinstance(poemas, list):
+        return huecos
+
+    sin_etiqueta = []
+    for posicion, item in enumerate(poemas):
+        if not isinstance(item, dict) or not isinstance(item.get("versos"), list):
+            continue
+        versos = [str(v).strip() for v in item["versos"] if str(v).strip()]
+        if not versos:
+            continue
+        poema = "\n".join(versos)
+        etiqueta = str(item.get("enfoque", "")).strip().lower()
+        libre = [i for i, e in enumerate(enfoques)
+                 if huecos[i] is None and e.strip().lower() == etiqueta]
+        if libre:
+            huecos[libre[0]] = poema
+        else:
+            sin_etiqueta.append((posicion, poema))
+
+    for posicion, poema in sin_etiqueta:
+        if posicion < len(huecos) and huecos[posicion] is None:
+            huecos[posicion] = poema
+        else:
+            libre = [i for i, h in enumerate(huecos) if h is None]
+            if libre:
+                huecos[libre[0]] = poema
+    return huecos
+
+
+class EstadisticasMultiples:
+    """Cuenta peticiones y huecos re-pedidos del modo varios-poemas-por-petición."""
+
+    def __init__(self):
+        self.peticiones = 0
+        self.poemas_pedidos = 0
+        self.huecos_repetidos = 0
+
+    def registrar(self, pedidos, reintento):
+        self.peticiones += 1
+        self.poemas_pedidos += pedidos
+        if reintento:
+            self.huecos_repetidos += pedidos
+
+    def resumen(self):
+        if not self.peticiones:
+            return "Modo múltiple: sin peticiones"
+        return (f"Modo múltiple: {self.peticiones} peticiones para {self.poemas_pedidos} poemas "
+                f"({self.poemas_pedidos / self.peticiones:.1f} poemas/petición) | "
+                f"huecos re-pedidos: {self.huecos_repetidos}")
@@ -0,0 +1,111 @@
+import os
+import json
+
+# Junto al script de cada figura (figura.directorio), no en el directorio de trabajo
+RUTA_TASAS = "tasas_enfoques.json"
+
+
+class TasasEnfoque:
+    """Intentos y poemas aceptados por enfoque, guardados entre ejecuciones.
+
+    El archivo agrupa por figura ({figura: {enfoque: [intentos, aceptados]}})
+    para que varias figuras puedan compartir carpeta.
+    """
+
+    def __init__(self, figura, ruta=RUTA_TASAS):
+        self.figura = figura
+        self.ruta = ruta
+        self.conteos = self._leer().get(figura, {})
+
+    def _leer(self):
+        if not os.path.exists(self.ruta):
+            return {}
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def registrar(self, enfoque, aceptado):
+        intentos, aceptados = self.conteos.get(enfoque, (0, 0))
+        self.conteos[enfoque] = [intentos + 1, aceptados + int(aceptado)]
+
+    def tasa(self, enfoque):
+        # Suavizado de Laplace: un enfoque sin historial cuenta como 50%
+        intentos, aceptados = self.conteos.get(enfoque, (0, 0))
+        return (aceptados + 1) / (intentos + 2)
+
+    def aceptados(self, enfoque):
+        return self.conteos.get(enfoque, (0, 0))[1]
+
+    def guardar(self):
+        # Se relee para no pisar lo que otras figuras hayan guardado en el mismo archivo
+        datos = self._leer()
+        datos[self.figura] = self.conteos
+        temporal = self.ruta + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, indent=1)
+        os.replace(temporal, self.ruta)
+
+
+class Planificador:
+    """Decide qué enfoque lleva cada poema de un conjunto de lotes.
+
+    Dentro de una palabra no repite enfoque mientras queden libres, y en
+    todo el corpus reparte los huecos para igualar los poemas *aceptados*
+    esperados por enfoque: los enfoques que el validador rechaza más reciben
+    más huecos. Se parte de los aceptados históricos de `tasas`, así que el
+    equilibrio se mantiene entre ejecuciones.
+    """
+
+    def __init__(self, enfoques, tasas=None, reintentos=0):
+        self.enfoques = list(dict.fromkeys(enfoques))
+        self.tasas = tasas
+        self.reintentos = reintentos
+        self.esperados = {e: float(tasas.aceptados(e)) if tasas else 0.0 for e in self.enfoques}
+        self.asignados = dict.fromkeys(self.enfoques, 0)
+
+    def rendimiento(self, enfoque):
+        """Probabilidad de que un hueco con este enfoque acabe aceptado (con reintentos)."""
+        if not self.tasas:
+            return 1.0
+        return 1.0 - (1.0 - self.tasas.tasa(enfoque)) ** (self.reintentos + 1)
+
+    def _asignar(self, enfoque):
+        self.asignados[enfoque] += 1
+        self.esperados[enfoque] += self.rendimiento(enfoque)
+        return enfoque
+
+    def planificar(self, palabras, poemas_por_palabra, diario=None):
+        """Devuelve {(orden, indice): enfoque} para un lote.
+
+        Los huecos que ya tienen poema en el `diario` conservan su enfoque
+        para que la reanudación no regenere lo ya hecho; las palabras que el
+        diario ya da por completas no se planifican (ni cuentan en el reparto).
+        """
+        plan = {}
+        for orden, palabra in enumerate(palabras):
+            if diario and diario.completado(orden, palabra):
+                continue
+            usados = set()
+            for indice in range(poemas_por_palabra):
+                fijado = diario.enfoque(orden, palabra, indice) if diario else None
+                if fijado in self.esperados:
+                    enfoque = fijado
+                else:
+                    libres = [e for e in self.enfoques if e not in usados] or self.enfoques
+                    enfoque = min(libres, key=lambda e: self.esperados[e])
+                plan[(orden, indice)] = self._asignar(enfoque)
+                usados.add(enfoque)
+        return plan
+
+    def resumen(self):
+        usados = sum(1 for n in self.asignados.values() if n)
+        if not usados:
+            return "Enfoques: sin plan"
+        return (f"Enfoques: {usados}/{len(self.enfoques)} usados | huecos por enfoque: "
+                f"{min(self.asignados.values())}–{max(self.asignados.values())} | "
+                f"aceptados esperados: {min(self.esperados.values()):.1f}–{max(self.esperados.values()):.1f}")
+
+
+def planificador_de(figura, ruta=None):
+    """Planificador de la figura con sus tasas en `ruta` (por defecto RUTA_TASAS junto a su script)."""
+    ruta = ruta or os.path.join(figura.directorio, RUTA_TASAS)
+    return Planificador(figura.enfoques, TasasEnfoque(figura.nombre, ruta), figura.reintentos)
@@ -0,0 +1,77 @@
+import contextvars
+from collections import defaultdict
+
+# Figura de las peticiones en curso: procesar_lote_figura (y el juez) la fijan
+# y las tareas de asyncio que lanzan la heredan, porque copian el contexto
+FIGURA_EN_CURSO = contextvars.ContextVar("figura_en_curso", default=None)
+
+
+class MedidorPrefill:
+    """Mide cuánto prefill se ahorra al reutilizar el prefijo fijo del prompt.
+
+    Ollama solo evalúa (y reporta en `prompt_eval_count`) los tokens del
+    prompt que no estaban ya en su caché KV. La petición más cara vista
+    aproxima el prompt completo en frío; en las demás, la diferencia son
+    tokens reutilizados, que se valoran al coste por token medido en frío.
+    """
+
+    def __init__(self):
+        self.poemas = 0
+        self.tokens_evaluados = 0
+        self.ns_evaluados = 0
+        self.tokens_completos = 0
+        self.ns_por_token_frio = 0.0
+
+    def registrar(self, datos):
+        tokens = datos.get('prompt_eval_count')
+        ns = datos.get('prompt_eval_duration')
+        if not tokens or ns is None:
+            return
+        self.poemas += 1
+        self.tokens_evaluados += tokens
+        self.ns_evaluados += ns
+        if tokens >= self.tokens_completos:
+            self.tokens_completos = tokens
+            self.ns_por_token_frio = ns / tokens
+
+    def tokens_reutilizados_por_poema(self):
+        if not self.poemas:
+            return 0.0
+        return self.tokens_completos - self.tokens_evaluados / self.poemas
+
+    def ms_ahorrados_por_poema(self):
+        return self.tokens_reutilizados_por_poema() * self.ns_por_token_frio / 1e6
+
+    def resumen(self, etiqueta="Prefill"):
+        if not self.poemas:
+            return f"{etiqueta}: sin datos de Ollama"
+        ms_medio = self.ns_evaluados / self.poemas / 1e6
+        return (f"{etiqueta}: {ms_medio:.0f} ms/poema evaluando "
+                f"{self.tokens_evaluados / self.poemas:.0f} de {self.tokens_completos} tokens | "
+                f"reutilizados ≈ {self.tokens_reutilizados_por_poema():.0f} tokens/poema | "
+                f"ahorro ≈ {self.ms_ahorrados_por_poema():.0f} ms/poema")
+
+
+class PrefillPorFigura:
+    """Un MedidorPrefill por figura (la de FIGURA_EN_CURSO al registrar).
+
+    Cada figura tiene su propio prefijo fijo: con un solo medidor, el prompt
+    más largo de todas pasaría por el "prompt en frío" de las demás y su
+    diferencia por tokens reutilizados.
+    """
+
+    def __init__(self):
+        self.medidores = defaultdict(MedidorPrefill)
+
+    def registrar(self, datos):
+        self.medidores[FIGURA_EN_CURSO.get()].registrar(datos)
+
+    @property
+    def tokens_evaluados(self):
+        return sum(m.tokens_evaluados for m in self.medidores.values())
+
+    def resumen(self):
+        if not self.medidores:
+            return "Prefill: sin datos de Ollama"
+        return "\n  ".join(medidor.resumen(f"Prefill [{figura}]" if figura else "Prefill")
+                           for figura, medidor in sorted(self.medidores.items(), key=lambda m: m[0] or ""))
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+# --- PARÁMETROS AIMD ---
+TOLERANCIA_LATENCIA = 2.0   # Latencia aceptable = TOLERANCIA × mejor latencia observada (por clase)
+FACTOR_RECORTE = 0.5        # Decremento multiplicativo ante errores o congestión
+PAUSA_INICIAL = 1.0         # Backoff (s) tras el primer error consecutivo
+PAUSA_MAXIMA = 60.0
+
+
+class ControlRitmo:
+    """Controla cuántas peticiones van en vuelo con AIMD (como la ventana de TCP).
+
+    - Respuesta rápida: la ventana crece en 1/ventana (≈ +1 por ronda completa).
+    - Error HTTP, timeout o latencia > TOLERANCIA × mínima: la ventana se
+      reduce a la mitad (una vez por ronda) y se aplica un backoff exponencial.
+
+    La latencia mínima se guarda por `clase` de petición (modelo, num_predict,
+    ...): una respuesta del 7b no es congestión por tardar más que la del 1.5b.
+
+    Sustituye a las esperas fijas (TIEMPO_ESPERA) entre poemas: si Ollama
+    está libre se le envía trabajo sin pausas.
+    """
+
+    def __init__(self, maximo, minimo=1, inicial=1):
+        self.maximo = maximo
+        self.minimo = minimo
+        self.ventana = float(min(max(inicial, minimo), maximo))
+        self.latencia_minima = {}   # clase de petición -> mejor latencia observada
+        self.completados = 0
+        self.latencias = []
+        self.errores = 0
+        self.recortes = 0
+        self.espera_total = 0.0
+        self.inicio = time.monotonic()
+        self._en_vuelo = 0
+        self._condicion = asyncio.Condition()
+        self._ultimo_recorte = 0.0
+        self._pausa = 0.0
+        self._pausa_hasta = 0.0
+
+    async def __aenter__(self):
+        t0 = time.monotonic()
+        while True:
+            pausa = self._pausa_hasta - time.monotonic()
+            if pausa > 0:
+                await asyncio.sleep(pausa)
+            async with self._condicion:
+                await self._condicion.wait_for(lambda: self._en_vuelo < int(self.ventana))
+                if self._pausa_hasta <= time.monotonic():
+                    self._en_vuelo += 1
+                    break
+        self.espera_total += time.monotonic() - t0
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._condicion:
+            self._en_vuelo -= 1
+            self._condicion.notify_all()
+
+    def registrar(self, latencia, ok, clase=None):
+        """Actualiza la ventana con el resultado de una petición de la `clase` dada."""
+        ahora = time.monotonic()
+        if ok:
+            self.completados += 1
+            self.latencias.append(latencia)
+            self._pausa = 0.0
+            minima = min(latencia, self.latencia_minima.get(clase, latencia))
+            self.latencia_minima[clase] = minima
+            if latencia <= TOLERANCIA_LATENCIA * minima:
+                self.ventana = min(self.maximo, self.ventana + 1.0 / self.ventana)
+                return
+        else:
+            self.errores += 1
+            self._pausa = min(PAUSA_MAXIMA, max(PAUSA_INICIAL, self._pausa * 2))
+            self._pausa_hasta = ahora + self._pausa
+
+        # Un solo recorte por ronda: varias respuestas lentas de la misma
+        # tanda no deben hundir la ventana hasta el mínimo
+        if ahora - self._ultimo_recorte >= latencia:
+            self.ventana = max(self.minimo, self.ventana * FACTOR_RECORTE)
+            self._ultimo_recorte = ahora
+            self.recortes += 1
+
+    def poemas_por_minuto(self):
+        transcurrido = time.monotonic() - self.inicio
+        return 60.0 * self.completados / transcurrido if transcurrido > 0 else 0.0
+
+    def resumen(self):
+        return (f"Ritmo sostenido: {self.poemas_por_minuto():.1f} poemas/min | "
+                f"ventana final: {self.ventana:.1f} en vuelo | "
+                f"errores: {self.errores} | recortes: {self.recortes} | "
+                f"espera acumulada: {self.espera_total:.1f} s")
@@ -0,0 +1,206 @@
+"""Servidor que imita /api/generate de Ollama para medir el pipeline sin GPU.
+
+Uso:
+    python -m generacion.simulador --puerto 11434 --latencia 0.3 --tps 60 --fallos 0.05
+"""
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Palabra objetivo en la cola del prompt ("Palabra objetivo: luna",
+# "Palabra obligatoria: 'luna'", "Palabra: 'luna'")
+PATRON_PALABRA = re.compile(r"Palabra[^:\n]*:\s*'?([^'\n(]+?)'?\s*(?:\(|y usar|\.|\n|$)")
+
+PLANTILLAS = [
+    # Sirven (o no) a los distintos validadores para que haya reintentos reales
+    "El {p} es como un río de ceniza,\nla tarde cae como un pájaro herido,\nel viento suena como un viejo tambor,\ny la noche como un mar sin orillas.",
+    "Y el {p} y el viento y el frío y la noche,\ny llora y grita y calla y espera,\ny la sombra y el miedo y el sueño y el vacío,\ny todo se acaba y nada se olvida.",
+    "El {p}, la piedra, la sal, la herida,\ncorre, tiembla, calla, espera,\nla sombra, el hierro, el humo, el polvo,\ntodo se quiebra, nada se nombra, el fin.",
+    "La blanca {p} yace en la llanura,\nla fría noche se extiende callada,\nel lento río reposa en la piedra,\nel viejo monte permanece en calma.",
+]
+
+
+class ConfigSimulador:
+    def __init__(self, latencia=0.2, tps=60.0, paralelo=4, fallos=0.0, sin_palabra=0.1,
+                 prefill_tps=2000.0, semilla=None):
+        self.latencia = latencia          # Segundos fijos por petición
+        self.tps = tps                    # Tokens generados por segundo
+        self.paralelo = paralelo          # Peticiones atendidas a la vez (OLLAMA_NUM_PARALLEL)
+        self.fallos = fallos              # Probabilidad de responder HTTP 500
+        self.sin_palabra = sin_palabra    # Probabilidad de "olvidar" la palabra clave
+        self.prefill_tps = prefill_tps    # Tokens de prompt evaluados por segundo
+        self.aleatorio = random.Random(semilla)
+
+
+def _tokens(texto):
+    return re.findall(r"\S+\s*|\s+", texto)
+
+
+def _poema(config, prompt):
+    encontrada = PATRON_PALABRA.findall(prompt)
+    palabra = encontrada[-1].strip() if encontrada else "tiempo"
+    if config.aleatorio.random() < config.sin_palabra:
+        palabra = "silencio"
+    return config.aleatorio.choice(PLANTILLAS).format(p=palabra)
+
+
+def _poemas_json(config, prompt, formato):
+    # Respuesta con `format`: tantos poemas como pida el esquema (ver generacion.multiple)
+    n = formato.get("properties", {}).get("poemas", {}).get("minItems", 1)
+    poemas = [{"enfoque": f"enfoque {i + 1}", "versos": _poema(config, prompt).split("\n")}
+              for i in range(n)]
+    return json.dumps({"poemas": poemas}, ensure_ascii=False)
+
+
+def _veredictos_json(config, formato):
+    # Respuesta del juez (ver generacion.juez): un veredicto por poema, ~80 % válidos
+    n = formato.get("properties", {}).get("veredictos", {}).get("minItems", 1)
+    veredictos = [{"id": i + 1, "valido": config.aleatorio.random() < 0.8, "motivo": "ok"}
+                  for i in range(n)]
+    return json.dumps({"veredictos": veredictos}, ensure_ascii=False)
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+    semaforo = None
+    cache_prefijo = {"prompt": ""}
+
+    def log_message(self, *args):
+        pass
+
+    def _enviar_json(self, codigo, datos):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _prefill(self, prompt):
+        # Caché KV simulada: solo se "evalúa" lo que no comparte prefijo con la anterior
+        anterior = self.cache_prefijo["prompt"]
+        comun = 0
+        for a, b in zip(anterior, prompt):
+            if a != b:
+                break
+            comun += 1
+        self.cache_prefijo["prompt"] = prompt
+        tokens = max(1, (len(prompt) - comun) // 4)
+        return tokens, tokens / self.config.prefill_tps
+
+    def _fragmento(self, datos):
+        linea = (json.dumps(datos, ensure_ascii=False) + "\n").encode('utf-8')
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(linea), linea))
+        self.wfile.flush()
+
+    def do_POST(self):
+        if self.path.rstrip('/') != "/api/generate":
+            self._enviar_json(404, {"error": "not found"})
+            return
+        largo = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(largo))
+        config = self.config
+
+        with self.semaforo:
+            if config.aleatorio.random() < config.fallos:
+                time.sleep(config.latencia)
+                self._enviar_json(500, {"error": "fallo simulado"})
+                return
+
+            prompt = payload.get("prompt", "")
+            tokens_prompt, t_prefill = self._prefill(prompt)
+            time.sleep(config.latencia + t_prefill)
+
+            formato = payload.get("format")
+            if isinstance(formato, dict) and "veredictos" in formato.get("properties", {}):
+                texto = _veredictos_json(config, formato)
+            elif isinstance(formato, dict):
+                texto = _poemas_json(config, prompt, formato)
+            else:
+                texto = _poema(config, prompt)
+            tokens = _tokens(texto)
+            num_predict = payload.get("options", {}).get("num_predict")
+            if num_predict:
+                tokens = tokens[:num_predict]
+            metricas = {
+                "done": True,
+                "prompt_eval_count": tokens_prompt,
+                "prompt_eval_duration": int(t_prefill * 1e9),
+                "eval_count": len(tokens),
+                "eval_duration": int(len(tokens) / config.tps * 1e9),
+            }
+
+            if not payload.get("stream", True):
+                time.sleep(len(tokens) / config.tps)
+                self._enviar_json(200, dict(metricas, model=payload.get("model"), response="".join(tokens)))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for token in tokens:
+                    time.sleep(1.0 / config.tps)
+                    self._fragmento({"model": payload.get("model"), "response": token, "done": False})
+                self._fragmento(dict(metricas, model=payload.get("model"), response=""))
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # El cliente abortó el stream: como Ollama, se deja de generar
+                self.close_connection = True
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Un cliente que corta (stream abortado, keep-alive cerrado) no es un
+        # error del simulador: sin traza, para no ensuciar la salida del banco
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def arrancar_simulador(puerto=0, config=None):
+    """Arranca el simulador en un hilo y devuelve (servidor, url de /api/generate)."""
+    config = config or ConfigSimulador()
+    manejador = type("Manejador", (_Manejador,), {
+        "config": config,
+        "semaforo": threading.Semaphore(config.paralelo),
+        "cache_prefijo": {"prompt": ""},
+    })
+    servidor = _Servidor(("127.0.0.1", puerto), manejador)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/api/generate"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de /api/generate de Ollama")
+    parser.add_argument("--puerto", type=int, default=11434)
+    parser.add_argument("--latencia", type=float, default=0.2, help="Segundos fijos por petición")
+    parser.add_argument("--tps", type=float, default=60.0, help="Tokens generados por segundo")
+    parser.add_argument("--paralelo", type=int, default=4, help="Peticiones atendidas a la vez")
+    parser.add_argument("--fallos", type=float, default=0.0, help="Probabilidad de HTTP 500")
+    parser.add_argument("--sin-palabra", type=float, default=0.1, help="Probabilidad de omitir la palabra clave")
+    parser.add_argument("--semilla", type=int, default=None)
+    args = parser.parse_args()
+
+    config = ConfigSimulador(args.latencia, args.tps, args.paralelo, args.fallos,
+                             args.sin_palabra, semilla=args.semilla)
+    servidor, url = arrancar_simulador(args.puerto, config)
+    print(f"Simulador de Ollama escuchando en {url} (Ctrl-C para salir)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
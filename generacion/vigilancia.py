@@ -0,0 +1,69 @@
+from collections import Counter
+
+from corpus.lemas import buscar_palabra
+
+# Reglas incrementales para el modo streaming.
+# Cada regla recibe el texto generado hasta ahora y `final` (True cuando Ollama
+# terminó) y devuelve el motivo de rechazo, o None si todavía puede ser válido.
+# Solo se juzgan versos completos (seguidos de salto de línea) salvo en `final`.
+# Los chequeos propios de cada figura salen de corpus.validadores (regla_versos),
+# para que el streaming no aborte lo que la validación final aceptaría.
+
+
+def _versos(texto, final):
+    lineas = texto.split('\n')
+    if not final:
+        # La última línea sigue escribiéndose
+        lineas = lineas[:-1]
+    return [l.strip() for l in lineas if l.strip()]
+
+
+def max_versos(n):
+    def regla(texto, final):
+        if len(_versos(texto, final)) > n:
+            return f"más de {n} versos"
+    return regla
+
+
+def min_versos(n):
+    def regla(texto, final):
+        if final and len(_versos(texto, final)) < n:
+            return f"menos de {n} versos"
+    return regla
+
+
+def palabra_clave(palabra, versos=4):
+    """La palabra (o una flexión suya) debe haber aparecido cuando se cierra el último verso."""
+    def regla(texto, final):
+        completos = _versos(texto, final)
+        if (final or len(completos) >= versos) and buscar_palabra(texto, palabra) is None:
+            return "falta palabra clave"
+    return regla
+
+
+def revisar(reglas, texto, final=False):
+    for regla in reglas:
+        motivo = regla(texto, final)
+        if motivo:
+            return motivo
+    return None
+
+
+class EstadisticasVigilancia:
+    """Cuenta abortos por motivo y tokens que no llegaron a generarse."""
+
+    def __init__(self):
+        self.abortos = Counter()
+        self.tokens_recibidos = 0
+        self.tokens_ahorrados = 0
+
+    def registrar_aborto(self, motivo, recibidos, num_predict):
+        self.abortos[motivo] += 1
+        # Estimación: el rechazo posterior habría consumido hasta num_predict
+        self.tokens_ahorrados += max(0, num_predict - recibidos)
+
+    def resumen(self):
+        total = sum(self.abortos.values())
+        detalle = ", ".join(f"{m}: {n}" for m, n in self.abortos.most_common()) or "ninguno"
+        return (f"Streaming: {total} abortos tempranos ({detalle}) | "
+                f"~{self.tokens_ahorrados} tokens ahorrados de {self.tokens_recibidos} recibidos")
@@ -1,7 +1,11 @@
 import os
 import glob
 import re
-from datasets import Dataset
+import sys
+
+# Permite importar el paquete 'corpus' desde la raíz del repo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from corpus.constructor import ConstructorDataset
 
 # --- CONFIGURACIÓN DE RUTAS (AUTOMÁTICA) ---
 
@@ -22,8 +26,8 @@ else:
 print(f"📂 Directorio de Lotes: {path_lotes}")
 print(f"📂 Directorio de Resultados: {path_resultados}")
 
-tokenizer_eos = "<|endoftext|>"
-dataset_list = []
+# Filtros (juez, métrica, duplicados, relevancia) y formatos de salida: corpus/constructor.py
+constructor = ConstructorDataset("dataset_final_anafora")
 
 # Función para extraer el número del lote (ej: "005" de "lote_005.txt")
 def get_lote_id(filename):
@@ -50,61 +54,19 @@ for archivo_palabras in archivos_lotes:
         # print(f"⚠️ Salta Lote {lote_id}: No hay resultados aún.") 
         continue
 
-    # 3. Leer las PALABRAS
-    with open(archivo_palabras, 'r', encoding='utf-8', errors='ignore') as f:
-        palabras = [line.strip() for line in f if line.strip()]
-
-    # 4. Leer y juntar los POEMAS
-    contenido_poemas_completo = ""
-    for ap in archivos_poemas:
-        try:
-            with open(ap, 'r', encoding='utf-8') as f:
-                contenido_poemas_completo += "\n" + f.read()
-        except UnicodeDecodeError:
-            with open(ap, 'r', encoding='cp1252') as f:
-                contenido_poemas_completo += "\n" + f.read()
-
-    # Separar por los bloques de TEMA (===)
-    bloques_poemas = [b.strip() for b in contenido_poemas_completo.split("===============================================") if b.strip()]
-
-    # 5. VALIDACIÓN Y EMPAREJAMIENTO
-    cantidad_procesar = min(len(palabras), len(bloques_poemas))
-    
-    if cantidad_procesar == 0:
-        continue
+    registros, _ = constructor.procesar_lote("anáfora", lote_id, archivos_poemas, archivo_palabras)
 
-    print(f"✅ Lote {lote_id}: {cantidad_procesar} pares")
-
-    # 6. CREAR LAS ENTRADAS DEL DATASET
-    for i in range(cantidad_procesar):
-        palabra_clave = palabras[i]
-        bloque_texto = bloques_poemas[i]
-        
-        versiones_poema = [p.strip() for p in bloque_texto.split("---") if p.strip()]
-        
-        for poema in versiones_poema:
-            entry = {
-                "text": 
-f"""Escribe un poema usando la figura retórica "anáfora" con la palabra "{palabra_clave}".
-Poema:
-{poema}
-{tokenizer_eos}"""
-            }
-            dataset_list.append(entry)
+    # VALIDACIÓN
+    cantidad_procesar = len({palabra for palabra, _, _ in registros if palabra})
+    if cantidad_procesar:
+        print(f"✅ Lote {lote_id}: {cantidad_procesar} pares")
 
 # --- RESUMEN FINAL ---
+constructor.cerrar()
+
 print("\n" + "="*40)
-print(f"TOTAL EJEMPLOS GENERADOS: {len(dataset_list)}")
+print(f"TOTAL EJEMPLOS GENERADOS: {constructor.escritor.filas}")
+print(constructor.resumen())
 print("="*40)
-
-# GUARDAR JSON PARA LUEGO SUBIRLO A COLAB
-# Como estás en local, no podemos crear la variable 'hf_dataset' directamente si no tienes
-# la librería 'datasets' instalada. Mejor guardamos un JSON.
-import json
-
-output_file = "dataset_final_anafora.json"
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(dataset_list, f, ensure_ascii=False, indent=2)
-
-print(f"¡Listo! Se ha creado el archivo '{output_file}'")
-print("Sube este archivo a tu Google Drive para entrenar.")
\ No newline at end of file
+print(f"¡Listo! {constructor.escritor.resumen()}")
+print("Sube estos archivos a tu Google Drive para entrenar.")
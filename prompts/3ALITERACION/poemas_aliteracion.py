@@ -1,20 +1,37 @@
 import os
 import sys
-import time
-import json
-import requests
+import asyncio
 import argparse
 
+# Permite importar los paquetes compartidos ('generacion', 'corpus') desde la raíz del repo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from corpus.basura import regla_streaming
+from corpus.validadores import validador
+from generacion.cache import CacheGeneracion
+from generacion.cascada import Cascada
+from generacion.cliente import ClienteOllama
+from generacion.diario import Diario
+from generacion.figuras import Figura
+from generacion.formato import bloque_separador
+from generacion.lote import procesar_lote_figura
+from generacion.multiple import ENFOQUE_MULTIPLE, payload_multiple, poemas_de_respuesta
+from generacion.planificador import planificador_de
+from generacion.vigilancia import max_versos, palabra_clave
+
 # --- CONFIGURACIÓN ---
 OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
 MODELO = "qwen2.5:7b"
+# Con --cascada: del modelo más barato al más caro, se escala solo si el validador rechaza
+CASCADA = ["qwen2.5:1.5b", "qwen2.5:3b", MODELO]
 POEMAS_POR_PALABRA = 7
-TIEMPO_ESPERA = 10
 
 # Configuración de reintentos
 USAR_REINTENTOS = False   
 MAX_REINTENTOS = 3       
 
+# Máximo de peticiones simultáneas por daemon; el ritmo real lo ajusta ControlRitmo
+EN_VUELO = 8
+
 ENFOQUES = [
     "Atmósfera: Melancólica y suave (sugiere sonidos suaves como S, L, M)",
     "Atmósfera: Violenta y de odio (sugiere sonidos fuertes como R, T, G, Z, P)",
@@ -28,16 +45,16 @@ ENFOQUES = [
     "Tono: Nostálgico (sonidos lentos y arrastrados)"
 ]
 
-def generar_poema(palabra, enfoque):
-    # --- PROMPT DISEÑADO PARA ALITERACIÓN ---
-    prompt = f"""Eres un poeta experto en fonética y recursos sonoros.
+# --- PROMPT DISEÑADO PARA ALITERACIÓN ---
+# Bloque fijo del prompt: es idéntico en todas las peticiones para que Ollama
+# reutilice el prefijo ya procesado (caché KV). Lo variable va al final.
+INSTRUCCIONES = """Eres un poeta experto en fonética y recursos sonoros.
 
-OBJETIVO: Escribir un poema de 4 versos con fuerte ALITERACIÓN sobre: '{palabra}'.
+OBJETIVO: Escribir un poema de 4 versos con fuerte ALITERACIÓN sobre la PALABRA OBJETIVO indicada al final.
 DEFINICIÓN: La aliteración consiste en repetir el mismo sonido consonante al principio de las palabras o dentro de ellas para crear un efecto musical o rítmico.
 
 INSTRUCCIONES DE ESTILO:
-Contexto: {enfoque}
-* Basado en el contexto anterior, elige UNA letra o sonido dominante (ej: la 'R' para fuerza, la 'S' para silencio) y satura el poema con ella.
+* Basado en el CONTEXTO indicado al final, elige UNA letra o sonido dominante (ej: la 'R' para fuerza, la 'S' para silencio) y satura el poema con ella.
 
 EJEMPLO PERFECTO (Si la palabra fuera 'VIENTO' y el sonido 'S'):
 El suave susurro silba su secreto
@@ -46,18 +63,24 @@ Sopla sereno sin soltar su aliento
 Siseando sueños de sabiduría
 
 REGLAS ABSOLUTAS:
-1. La palabra '{palabra}' DEBE aparecer escrita literalmente dentro del poema.
-2. NO pongas comillas alrededor de la palabra '{palabra}'.
+1. La palabra objetivo DEBE aparecer escrita literalmente dentro del poema.
+2. NO pongas comillas alrededor de la palabra objetivo.
 3. Longitud: Exactamente 4 líneas.
 4. PRIORIDAD: Maximiza la repetición de sonidos consonantes similares en cada verso. Que el poema tenga una musicalidad evidente al leerse en voz alta.
-5. No inventes palabras.
+5. No inventes palabras."""
+
+def construir_prompt(palabra, enfoque):
+    return f"""{INSTRUCCIONES}
+
+Contexto: {enfoque}
 
 TU TURNO.
 Palabra objetivo: {palabra}
 Poema:"""
 
-    payload = {
-        "model": MODELO,
+def crear_payload(prompt, modelo=MODELO):
+    return {
+        "model": modelo,
         "prompt": prompt,
         "stream": False,
         "options": {
@@ -69,17 +92,58 @@ Poema:"""
         }
     }
 
-    try:
-        response = requests.post(OLLAMA_URL, json=payload)
-        response.raise_for_status()
-        return response.json().get('response', '').strip()
-    except requests.exceptions.RequestException as e:
-        print(f"Error de conexión con Ollama: {e}")
-        return None
+async def generar_poema(cliente, palabra, enfoque, variante=0, modelo=MODELO):
+    payload = crear_payload(construir_prompt(palabra, enfoque), modelo)
+
+    # La caché en disco se consulta primero (ver ClienteOllama.generar)
+    return await cliente.generar(payload, reglas=reglas_streaming(palabra), variante=variante)
+
+async def generar_poemas(cliente, palabra, enfoques, variante=0, modelo=MODELO):
+    # Modo --multiple: un poema por enfoque en una sola petición con salida JSON
+    payload = payload_multiple(crear_payload(construir_prompt(palabra, ENFOQUE_MULTIPLE), modelo), enfoques)
+    return poemas_de_respuesta(await cliente.generar(payload, variante=variante), enfoques)
+
+def reglas_streaming(palabra):
+    # Versión incremental de la validación para abortar en modo --streaming
+    return [regla_streaming(palabra), max_versos(4), palabra_clave(palabra)]
+
+# Especificación de la figura para el motor unificado (generacion/motor.py)
+FIGURA = Figura(
+    nombre="aliteracion",
+    directorio=os.path.dirname(os.path.abspath(__file__)),
+    generar=generar_poema,
+    validar=validador("aliteracion"),
+    enfoques=ENFOQUES,
+    poemas_por_palabra=POEMAS_POR_PALABRA,
+    escribir_bloque=bloque_separador,
+    salida="resultados_aliteracion/aliteracion_lote_{:03d}.txt",
+    reintentos=MAX_REINTENTOS if USAR_REINTENTOS else 0,
+    generar_multiple=generar_poemas,
+    cascada=CASCADA,
+)
+
+async def procesar(palabras, out_file, cliente, desde_cero=False, multiple=False, cascada=None):
+    # Reparte los enfoques según su tasa de aceptación histórica
+    planificador = planificador_de(FIGURA)
+    # Reanuda desde el diario del lote (o empieza de cero con --desde-cero)
+    diario = Diario(out_file, reiniciar=desde_cero)
+    async with cliente:
+        await procesar_lote_figura(
+            cliente, FIGURA, palabras, out_file,
+            diario=diario, multiple=multiple, cascada=cascada, planificador=planificador
+        )
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("lote_num", type=int, nargs="?", default=1)
+    parser.add_argument("--urls", nargs="+", default=[OLLAMA_URL], help="Uno o varios daemons de Ollama (se reparte la carga)")
+    parser.add_argument("--en-vuelo", type=int, default=EN_VUELO, help="Máximo de peticiones simultáneas por daemon")
+    parser.add_argument("--desde-cero", action="store_true", help="Ignorar el diario y regenerar el lote completo")
+    parser.add_argument("--streaming", action="store_true", help="Leer token a token y abortar los poemas que rompan las reglas")
+    parser.add_argument("--sin-cache", action="store_true", help="No consultar ni guardar respuestas en la caché en disco")
+    parser.add_argument("--cache-mb", type=int, default=512, help="Tamaño máximo de la caché antes de expulsar entradas")
+    parser.add_argument("--multiple", action="store_true", help="Pedir todos los poemas de cada palabra en una sola petición JSON")
+    parser.add_argument("--cascada", nargs="*", metavar="MODELO", help="Empezar por un modelo barato y escalar solo si el validador falla (por defecto CASCADA)")
     args = parser.parse_args()
 
     str_lote = f"{args.lote_num:03d}"
@@ -94,55 +158,16 @@ def main():
     if not os.path.exists("resultados_aliteracion"):
         os.makedirs("resultados_aliteracion")
 
-    # Limpiar archivo de salida al inicio
-    with open(out_file, 'w', encoding='utf-8') as f:
-        pass
-
     modo_txt = "CON REINTENTOS" if USAR_REINTENTOS else "SIN REINTENTOS"
     print(f"Iniciando generación de ALITERACIONES ({modo_txt})...")
 
     with open(lote_file, 'r', encoding='utf-8') as f_in:
         palabras = [line.strip() for line in f_in if line.strip()]
 
-    with open(out_file, 'a', encoding='utf-8') as f_out:
-        for palabra in palabras:
-            print(f"=== Procesando: '{palabra}' ===")
-            
-            for i in range(POEMAS_POR_PALABRA):
-                idx_enfoque = i % len(ENFOQUES)
-                enfoque_actual = ENFOQUES[idx_enfoque]
-
-                poema = ""
-                intentos = 0
-                
-                while True:
-                    poema = generar_poema(palabra, enfoque_actual)
-                    
-                    if not poema:
-                        print("  ✗ ERROR: Respuesta vacía.")
-                        break
-
-                    # Chequeo si contiene la palabra
-                    if palabra.lower() in poema.lower():
-                        break
-                    else:
-                        if USAR_REINTENTOS and intentos < MAX_REINTENTOS:
-                            intentos += 1
-                            print(f"    [R] Falta palabra clave. Reintentando ({intentos}/{MAX_REINTENTOS})...")
-                            continue 
-                        else:
-                            print(f"    [!] Alerta: El modelo olvidó usar la palabra '{palabra}'.")
-                            break 
-
-                if poema:
-                    f_out.write("---\n")
-                    f_out.write(f"{poema}\n\n")
-                    f_out.flush()
-                    print(f"  ✓ Poema {i+1} generado ({enfoque_actual})")
-                
-                time.sleep(TIEMPO_ESPERA)
-
-            f_out.write("\n===============================================\n\n")
+    cache = None if args.sin_cache else CacheGeneracion(max_mb=args.cache_mb)
+    cascada = Cascada(args.cascada or CASCADA) if args.cascada is not None else None
+    cliente = ClienteOllama(args.urls, en_vuelo=args.en_vuelo, streaming=args.streaming, cache=cache)
+    asyncio.run(procesar(palabras, out_file, cliente, args.desde_cero, args.multiple, cascada))
 
     print(f"Proceso finalizado. Salida en: {out_file}")
 
@@ -1,19 +1,36 @@
 import os
 import sys
-import time
-import json
-import requests
+import asyncio
 import argparse
 
+# Permite importar los paquetes compartidos ('generacion', 'corpus') desde la raíz del repo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from corpus.basura import regla_streaming
+from corpus.validadores import validador
+from generacion.cache import CacheGeneracion
+from generacion.cascada import Cascada
+from generacion.cliente import ClienteOllama
+from generacion.diario import Diario
+from generacion.figuras import Figura
+from generacion.formato import bloque_encabezado
+from generacion.lote import procesar_lote_figura
+from generacion.multiple import ENFOQUE_MULTIPLE, payload_multiple, poemas_de_respuesta
+from generacion.planificador import planificador_de
+from generacion.vigilancia import max_versos, palabra_clave
+
 # --- CONFIGURACIÓN ---
 OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
 MODELO = "qwen2.5:7b"
+# Con --cascada: del modelo más barato al más caro, se escala solo si el validador rechaza
+CASCADA = ["qwen2.5:1.5b", "qwen2.5:3b", MODELO]
 POEMAS_POR_PALABRA = 7
-TIEMPO_ESPERA = 1
 
 USAR_REINTENTOS = True  
 MAX_REINTENTOS = 3      
 
+# Máximo de peticiones simultáneas por daemon; el ritmo real lo ajusta ControlRitmo
+EN_VUELO = 8
+
 ENFOQUES = [
     "Estructura: Comparativa (Como X... como Y...)",
     "Estructura: Condicional (Si X... entonces Y... / Si A... entonces B...)",
@@ -27,10 +44,11 @@ ENFOQUES = [
     "Tono: Volitivo (Deseo X / Anhelo Y)"
 ]
 
-def generar_poema(palabra, enfoque):
-    prompt = f"""Eres un poeta experto en retórica y gramática española.
+# Bloque fijo del prompt: es idéntico en todas las peticiones para que Ollama
+# reutilice el prefijo ya procesado (caché KV). Lo variable va al final.
+INSTRUCCIONES = """Eres un poeta experto en retórica y gramática española.
 
-OBJETIVO: Escribir un poema de 4 versos con PARALELISMO RIGUROSO sobre: '{palabra}'.
+OBJETIVO: Escribir un poema de 4 versos con PARALELISMO RIGUROSO sobre la PALABRA OBLIGATORIA indicada al final.
 
 REGLAS DE ORO (ESTRICTO):
 1. PROHIBICIÓN LÉXICA: No inventes palabras. Usa solo términos existentes en el diccionario de la RAE.
@@ -39,21 +57,25 @@ REGLAS DE ORO (ESTRICTO):
 4. COHERENCIA LÓGICA: Las imágenes deben ser elegantes y tener sentido. No mezcles anatomía con objetos mundanos sin sentido lírico.
 5. PARALELISMO: Cada verso debe tener la misma estructura gramatical que el anterior.
 
-INSTRUCCIONES ESPECÍFICAS:
-Contexto/Estructura: {enfoque}
-Palabra obligatoria: '{palabra}' (puede ir en cualquier posición).
-
 EJEMPLO DE ESTRUCTURA RIGUROSA:
 En el silencio nace la duda,
 en el estruendo muere la calma,
 en el olvido crece la sombra,
-en el recuerdo brilla la llama.
+en el recuerdo brilla la llama."""
+
+def construir_prompt(palabra, enfoque):
+    return f"""{INSTRUCCIONES}
+
+INSTRUCCIONES ESPECÍFICAS:
+Contexto/Estructura: {enfoque}
+Palabra obligatoria: '{palabra}' (puede ir en cualquier posición).
 
 TU TURNO (Escribe solo el poema de 4 versos):
 Poema:"""
 
-    payload = {
-        "model": MODELO,
+def crear_payload(prompt, modelo=MODELO):
+    return {
+        "model": modelo,
         "prompt": prompt,
         "stream": False,
         "options": {
@@ -65,76 +87,87 @@ Poema:"""
         }
     }
 
-    try:
-        response = requests.post(OLLAMA_URL, json=payload)
-        response.raise_for_status()
-        return response.json().get('response', '').strip()
-    except requests.exceptions.RequestException as e:
-        print(f"Error de conexión: {e}")
-        return None
+async def generar_poema(cliente, palabra, enfoque, variante=0, modelo=MODELO):
+    payload = crear_payload(construir_prompt(palabra, enfoque), modelo)
+
+    # La caché en disco se consulta primero (ver ClienteOllama.generar)
+    return await cliente.generar(payload, reglas=reglas_streaming(palabra), variante=variante)
+
+async def generar_poemas(cliente, palabra, enfoques, variante=0, modelo=MODELO):
+    # Modo --multiple: un poema por enfoque en una sola petición con salida JSON
+    payload = payload_multiple(crear_payload(construir_prompt(palabra, ENFOQUE_MULTIPLE), modelo), enfoques)
+    return poemas_de_respuesta(await cliente.generar(payload, variante=variante), enfoques)
+
+def reglas_streaming(palabra):
+    # Versión incremental de la validación para abortar en modo --streaming
+    return [regla_streaming(palabra), max_versos(4), palabra_clave(palabra)]
+
+# Especificación de la figura para el motor unificado (generacion/motor.py)
+FIGURA = Figura(
+    nombre="paralelismo",
+    directorio=os.path.dirname(os.path.abspath(__file__)),
+    generar=generar_poema,
+    validar=validador("paralelismo"),
+    enfoques=ENFOQUES,
+    poemas_por_palabra=POEMAS_POR_PALABRA,
+    escribir_bloque=bloque_encabezado,
+    salida="resultados_paralelismo/paralelismo_lote_{:03d}.txt",
+    reintentos=MAX_REINTENTOS if USAR_REINTENTOS else 0,
+    generar_multiple=generar_poemas,
+    cascada=CASCADA,
+)
+
+async def procesar_lotes(lote_nums, cliente, desde_cero=False, multiple=False, cascada=None):
+    out_dir = "resultados_paralelismo"
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    # Reparte los enfoques entre todos los lotes según su tasa de aceptación
+    planificador = planificador_de(FIGURA)
+
+    async with cliente:
+        for lote_num in lote_nums:
+            str_lote = f"{lote_num:03d}"
+            lote_file = f"lotes/lote_{str_lote}.txt"
+            out_file = f"{out_dir}/paralelismo_lote_{str_lote}.txt"
+
+            if not os.path.exists(lote_file):
+                print(f"[ERROR] No existe el archivo: {lote_file}. Saltando lote...")
+                continue
+
+            # Reanuda desde el diario del lote (o empieza de cero con --desde-cero)
+            diario = Diario(out_file, reiniciar=desde_cero)
+
+            print(f"\n>>> PROCESANDO LOTE: {str_lote}")
+
+            with open(lote_file, 'r', encoding='utf-8') as f_in:
+                palabras = [line.strip() for line in f_in if line.strip()]
+
+            await procesar_lote_figura(
+                cliente, FIGURA, palabras, out_file,
+                diario=diario, multiple=multiple, cascada=cascada, planificador=planificador
+            )
+
+            print(f"Lote {str_lote} finalizado. Salida en: {out_file}")
 
 def main():
     parser = argparse.ArgumentParser()
     # nargs='+' permite capturar uno o más números de lote
     parser.add_argument("lote_nums", type=int, nargs="+", help="Lista de números de lote (ej: 1 2 3)")
+    parser.add_argument("--urls", nargs="+", default=[OLLAMA_URL], help="Uno o varios daemons de Ollama (se reparte la carga)")
+    parser.add_argument("--en-vuelo", type=int, default=EN_VUELO, help="Máximo de peticiones simultáneas por daemon")
+    parser.add_argument("--desde-cero", action="store_true", help="Ignorar el diario y regenerar el lote completo")
+    parser.add_argument("--streaming", action="store_true", help="Leer token a token y abortar los poemas que rompan las reglas")
+    parser.add_argument("--sin-cache", action="store_true", help="No consultar ni guardar respuestas en la caché en disco")
+    parser.add_argument("--cache-mb", type=int, default=512, help="Tamaño máximo de la caché antes de expulsar entradas")
+    parser.add_argument("--multiple", action="store_true", help="Pedir todos los poemas de cada palabra en una sola petición JSON")
+    parser.add_argument("--cascada", nargs="*", metavar="MODELO", help="Empezar por un modelo barato y escalar solo si el validador falla (por defecto CASCADA)")
     args = parser.parse_args()
 
-    out_dir = "resultados_paralelismo"
-    if not os.path.exists(out_dir):
-        os.makedirs(out_dir)
-
-    for lote_num in args.lote_nums:
-        str_lote = f"{lote_num:03d}"
-        lote_file = f"lotes/lote_{str_lote}.txt"
-        out_file = f"{out_dir}/paralelismo_lote_{str_lote}.txt"
-
-        if not os.path.exists(lote_file):
-            print(f"[ERROR] No existe el archivo: {lote_file}. Saltando lote...")
-            continue
-
-        # Limpiar archivo de salida antes de empezar el lote
-        with open(out_file, 'w', encoding='utf-8') as f:
-            pass
-
-        print(f"\n>>> PROCESANDO LOTE: {str_lote}")
-
-        with open(lote_file, 'r', encoding='utf-8') as f_in:
-            palabras = [line.strip() for line in f_in if line.strip()]
-
-        with open(out_file, 'a', encoding='utf-8') as f_out:
-            for palabra in palabras:
-                print(f"=== Palabra: {palabra} ===")
-                
-                f_out.write(f"======[{palabra.upper()}]\n\n")
-                
-                for i in range(POEMAS_POR_PALABRA):
-                    enfoque_actual = ENFOQUES[i % len(ENFOQUES)]
-                    poema = ""
-                    intentos = 0
-                    
-                    while True:
-                        poema = generar_poema(palabra, enfoque_actual)
-                        if not poema: break
-                        
-                        if palabra.lower() in poema.lower():
-                            break
-                            
-                        if USAR_REINTENTOS and intentos < MAX_REINTENTOS:
-                            intentos += 1
-                            continue 
-                        break 
-
-                    if poema:
-                        f_out.write(f"{poema}\n\n")
-                        f_out.write("---\n\n")
-                        f_out.flush()
-                        print(f"  ✓ [{i+1}/{POEMAS_POR_PALABRA}] Generado")
-                    
-                    time.sleep(TIEMPO_ESPERA)
-
-                f_out.write("\n")
-
-        print(f"Lote {str_lote} finalizado. Salida en: {out_file}")
+    cache = None if args.sin_cache else CacheGeneracion(max_mb=args.cache_mb)
+    cascada = Cascada(args.cascada or CASCADA) if args.cascada is not None else None
+    cliente = ClienteOllama(args.urls, en_vuelo=args.en_vuelo, streaming=args.streaming, cache=cache)
+    asyncio.run(procesar_lotes(args.lote_nums, cliente, args.desde_cero, args.multiple, cascada))
 
     print("\n[PROCESO COMPLETO]")
 
@@ -1,20 +1,36 @@
 import os
 import sys
-import time
-import json
-import requests
+import asyncio
 import argparse
-import string
+
+# Permite importar los paquetes compartidos ('generacion', 'corpus') desde la raíz del repo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from corpus.basura import regla_streaming
+from corpus.validadores import regla_versos, validador
+from generacion.cache import CacheGeneracion
+from generacion.cascada import Cascada
+from generacion.cliente import ClienteOllama
+from generacion.diario import Diario
+from generacion.figuras import Figura
+from generacion.formato import bloque_encabezado
+from generacion.lote import procesar_lote_figura
+from generacion.multiple import ENFOQUE_MULTIPLE, payload_multiple, poemas_de_respuesta
+from generacion.planificador import planificador_de
+from generacion.vigilancia import min_versos
 
 # --- CONFIGURACIÓN ---
 OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
 MODELO = "qwen2.5:7b"
+# Con --cascada: del modelo más barato al más caro, se escala solo si el validador rechaza
+CASCADA = ["qwen2.5:1.5b", "qwen2.5:3b", MODELO]
 POEMAS_POR_PALABRA = 7
-TIEMPO_ESPERA = 1
 
 USAR_REINTENTOS = True  
 MAX_REINTENTOS = 3      
 
+# Máximo de peticiones simultáneas por daemon; el ritmo real lo ajusta ControlRitmo
+EN_VUELO = 8
+
 ENFOQUES = [
     "Tono: Agotamiento y pesadez",
     "Tono: Enumeración infinita",
@@ -25,29 +41,36 @@ ENFOQUES = [
     "Estilo: Ansiedad urbana"
 ]
 
-def generar_poema(palabra, enfoque):
-    # Prompt diseñado para Asíndeton: eliminación de nexos
-    prompt = f"""Eres un poeta experto en retórica.
-OBJETIVO: Escribir un poema de 4 versos con ASÍNDETON sobre: '{palabra}'.
+# Prompt diseñado para Asíndeton: eliminación de nexos
+# Bloque fijo del prompt: es idéntico en todas las peticiones para que Ollama
+# reutilice el prefijo ya procesado (caché KV). Lo variable va al final.
+INSTRUCCIONES = """Eres un poeta experto en retórica.
+OBJETIVO: Escribir un poema de 4 versos con ASÍNDETON sobre la PALABRA indicada al final.
 
 DEFINICIÓN DE ASÍNDETON: Eliminar todas las conjunciones (y, o, ni) y sustituirlas por comas para crear un ritmo rápido y directo.
 
 REGLAS ABSOLUTAS:
 1. OMISIÓN: No uses nunca las palabras 'y', 'o' o 'ni' para unir conceptos. Usa solo comas.
 2. ESTRUCTURA: 4 versos exactamente. Cada verso debe ser una lista de acciones o imágenes separadas por comas.
-3. TEMA: El poema debe girar en torno a '{palabra}'.
+3. TEMA: El poema debe girar en torno a la palabra indicada.
 4. No incluyas notas ni comentarios.
 
-EJEMPLO:
-El {palabra}, el viento, el frío, la noche,
+EJEMPLO (con la palabra 'mar'):
+El mar, el viento, el frío, la noche,
 llora, grita, calla, espera,
 la sombra, el miedo, el sueño, el vacío,
-todo se acaba, nada se olvida, el fin.
+todo se acaba, nada se olvida, el fin."""
+
+def construir_prompt(palabra, enfoque):
+    # El prompt de asíndeton no usa el enfoque
+    return f"""{INSTRUCCIONES}
 
+Palabra: '{palabra}'
 Poema:"""
 
-    payload = {
-        "model": MODELO,
+def crear_payload(prompt, modelo=MODELO):
+    return {
+        "model": modelo,
         "prompt": prompt,
         "stream": False,
         "options": {
@@ -58,104 +81,91 @@ Poema:"""
         }
     }
 
-    try:
-        response = requests.post(OLLAMA_URL, json=payload)
-        response.raise_for_status()
-        return response.json().get('response', '').strip()
-    except requests.exceptions.RequestException as e:
-        print(f"Error de conexión: {e}")
-        return None
-
-def validar_asindeton(poema):
-    """Verifica la ausencia de conjunciones y la presencia de comas."""
-    lineas = [l.strip().lower() for l in poema.split('\n') if l.strip()]
-    if len(lineas) < 4:
-        return False
-        
-    conjunciones_prohibidas = [' y ', ' e ', ' o ', ' u ', ' ni ']
-    
-    for linea in lineas[:4]:
-        # 1. Comprobar que no existan conjunciones
-        if any(conj in f" {linea} " for conj in conjunciones_prohibidas):
-            return False
-        
-        # 2. Comprobar que haya al menos dos comas por verso para garantizar el recurso
-        if linea.count(',') < 2:
-            return False
-            
-    return True
+async def generar_poema(cliente, palabra, enfoque, variante=0, modelo=MODELO):
+    payload = crear_payload(construir_prompt(palabra, enfoque), modelo)
+
+    # La caché en disco se consulta primero (ver ClienteOllama.generar)
+    return await cliente.generar(payload, reglas=reglas_streaming(palabra), variante=variante)
+
+async def generar_poemas(cliente, palabra, enfoques, variante=0, modelo=MODELO):
+    # Modo --multiple: un poema por enfoque en una sola petición con salida JSON
+    payload = payload_multiple(crear_payload(construir_prompt(palabra, ENFOQUE_MULTIPLE), modelo), enfoques)
+    return poemas_de_respuesta(await cliente.generar(payload, variante=variante), enfoques)
+
+def reglas_streaming(palabra):
+    # Versión incremental de la validación para abortar en modo --streaming
+    return [
+        regla_streaming(palabra),
+        regla_versos("asindeton"),
+        min_versos(4),
+    ]
+
+# Especificación de la figura para el motor unificado (generacion/motor.py)
+FIGURA = Figura(
+    nombre="asindeton",
+    directorio=os.path.dirname(os.path.abspath(__file__)),
+    generar=generar_poema,
+    validar=validador("asindeton", palabra_clave=False),
+    enfoques=ENFOQUES,
+    poemas_por_palabra=POEMAS_POR_PALABRA,
+    escribir_bloque=bloque_encabezado,
+    salida="resultados_asindeton/asindeton_lote_{:03d}.txt",
+    reintentos=MAX_REINTENTOS,
+    generar_multiple=generar_poemas,
+    cascada=CASCADA,
+)
+
+async def procesar_lotes(lote_nums, cliente, desde_cero=False, multiple=False, cascada=None):
+    out_dir = "resultados_asindeton"
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    # Reparte los enfoques entre todos los lotes según su tasa de aceptación
+    planificador = planificador_de(FIGURA)
+
+    async with cliente:
+        for lote_num in lote_nums:
+            str_lote = f"{lote_num:03d}"
+            lote_file = f"lotes/lote_{str_lote}.txt"
+            out_file = f"{out_dir}/asindeton_lote_{str_lote}.txt"
+
+            if not os.path.exists(lote_file):
+                print(f"\n[ERROR] No existe el archivo: {lote_file}. Saltando lote...")
+                continue
+
+            # Reanuda desde el diario del lote (o empieza de cero con --desde-cero)
+            diario = Diario(out_file, reiniciar=desde_cero)
+
+            print(f"\n>>> INICIANDO PROCESO - LOTE: {str_lote}")
+
+            with open(lote_file, 'r', encoding='utf-8') as f_in:
+                palabras = [line.strip() for line in f_in if line.strip()]
+
+            await procesar_lote_figura(
+                cliente, FIGURA, palabras, out_file,
+                diario=diario, multiple=multiple, cascada=cascada, planificador=planificador
+            )
+
+            print(f"Lote {str_lote} finalizado. Resultados en: {out_file}")
 
 def main():
     parser = argparse.ArgumentParser()
     # Cambio: Ahora acepta una lista de enteros
     parser.add_argument("lote_nums", type=int, nargs="+", help="Lista de números de lote (ej: 1 2 3)")
+    parser.add_argument("--urls", nargs="+", default=[OLLAMA_URL], help="Uno o varios daemons de Ollama (se reparte la carga)")
+    parser.add_argument("--en-vuelo", type=int, default=EN_VUELO, help="Máximo de peticiones simultáneas por daemon")
+    parser.add_argument("--desde-cero", action="store_true", help="Ignorar el diario y regenerar el lote completo")
+    parser.add_argument("--streaming", action="store_true", help="Leer token a token y abortar los poemas que rompan las reglas")
+    parser.add_argument("--sin-cache", action="store_true", help="No consultar ni guardar respuestas en la caché en disco")
+    parser.add_argument("--cache-mb", type=int, default=512, help="Tamaño máximo de la caché antes de expulsar entradas")
+    parser.add_argument("--multiple", action="store_true", help="Pedir todos los poemas de cada palabra en una sola petición JSON")
+    parser.add_argument("--cascada", nargs="*", metavar="MODELO", help="Empezar por un modelo barato y escalar solo si el validador falla (por defecto CASCADA)")
     args = parser.parse_args()
 
-    out_dir = "resultados_asindeton"
-    if not os.path.exists(out_dir):
-        os.makedirs(out_dir)
-
-    # Bucle para procesar cada lote solicitado
-    for lote_num in args.lote_nums:
-        str_lote = f"{lote_num:03d}"
-        lote_file = f"lotes/lote_{str_lote}.txt"
-        out_file = f"{out_dir}/asindeton_lote_{str_lote}.txt"
-
-        if not os.path.exists(lote_file):
-            print(f"\n[ERROR] No existe el archivo: {lote_file}. Saltando lote...")
-            continue
-
-        # Limpiar/crear archivo de salida para el lote actual
-        with open(out_file, 'w', encoding='utf-8') as f:
-            pass
-
-        print(f"\n>>> INICIANDO PROCESO - LOTE: {str_lote}")
-
-        with open(lote_file, 'r', encoding='utf-8') as f_in:
-            palabras_lote = [line.strip() for line in f_in if line.strip()]
-
-        with open(out_file, 'a', encoding='utf-8') as f_out:
-            for palabra in palabras_lote:
-                print(f"=== Procesando: {palabra} ===")
-                
-                # Encabezado de la palabra
-                f_out.write(f"======[{palabra.upper()}]\n\n")
-                
-                for i in range(POEMAS_POR_PALABRA):
-                    enfoque_actual = ENFOQUES[i % len(ENFOQUES)]
-                    poema_final = ""
-                    
-                    intentos = 0
-                    while True:
-                        poema_generado = generar_poema(palabra, enfoque_actual)
-                        if not poema_generado: break
-
-                        if validar_asindeton(poema_generado):
-                            poema_final = poema_generado
-                            break
-                        else:
-                            intentos += 1
-                            if intentos <= MAX_REINTENTOS:
-                                print(f"    [R] Reintento {intentos}...")
-                                continue
-                            else:
-                                poema_final = poema_generado if poema_generado else "[FALLO]"
-                                break
-
-                    if poema_final:
-                        # Contenido del poema
-                        f_out.write(f"{poema_final}\n\n")
-                        # Separador después de cada poema
-                        f_out.write("---\n\n")
-                        f_out.flush()
-                        print(f"  ✓ [{i+1}/7] Generado")
-                    
-                    time.sleep(TIEMPO_ESPERA)
-
-                # Salto entre bloques de palabras
-                f_out.write("\n")
-
-        print(f"Lote {str_lote} finalizado. Resultados en: {out_file}")
+    cache = None if args.sin_cache else CacheGeneracion(max_mb=args.cache_mb)
+    cascada = Cascada(args.cascada or CASCADA) if args.cascada is not None else None
+    cliente = ClienteOllama(args.urls, en_vuelo=args.en_vuelo, streaming=args.streaming, cache=cache)
+    asyncio.run(procesar_lotes(args.lote_nums, cliente, args.desde_cero, args.multiple, cascada))
 
     print("\n[PROCESO COMPLETO]")
 
@@ -1,20 +1,36 @@
 import os
 import sys
-import time
-import json
-import requests
+import asyncio
 import argparse
-import string
+
+# Permite importar los paquetes compartidos ('generacion', 'corpus') desde la raíz del repo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from corpus.basura import regla_streaming
+from corpus.validadores import regla_versos, validador
+from generacion.cache import CacheGeneracion
+from generacion.cascada import Cascada
+from generacion.cliente import ClienteOllama
+from generacion.diario import Diario
+from generacion.figuras import Figura
+from generacion.formato import bloque_encabezado
+from generacion.lote import procesar_lote_figura
+from generacion.multiple import ENFOQUE_MULTIPLE, payload_multiple, poemas_de_respuesta
+from generacion.planificador import planificador_de
+from generacion.vigilancia import min_versos, palabra_clave
 
 # --- CONFIGURACIÓN ---
 OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
 MODELO = "qwen2.5:7b"
+# Con --cascada: del modelo más barato al más caro, se escala solo si el validador rechaza
+CASCADA = ["qwen2.5:1.5b", "qwen2.5:3b", MODELO]
 POEMAS_POR_PALABRA = 7
-TIEMPO_ESPERA = 1
 
 USAR_REINTENTOS = True  
 MAX_REINTENTOS = 2
 
+# Máximo de peticiones simultáneas por daemon; el ritmo real lo ajusta ControlRitmo
+EN_VUELO = 8
+
 ENFOQUES = [
     "Tono: Nostálgico y otoñal",
     "Tono: Violento y repentino",
@@ -25,29 +41,35 @@ ENFOQUES = [
     "Contexto: El cosmos y las estrellas"
 ]
 
-def generar_poema(palabra, enfoque):
-    # Prompt enfocado exclusivamente en el nexo "como"
-    prompt = f"""Eres un poeta experto en retórica.
-OBJETIVO: Escribir un poema de 4 versos utilizando SÍMILES sobre: '{palabra}'.
+# Prompt enfocado exclusivamente en el nexo "como"
+# Bloque fijo del prompt: es idéntico en todas las peticiones para que Ollama
+# reutilice el prefijo ya procesado (caché KV). Lo variable va al final.
+INSTRUCCIONES = """Eres un poeta experto en retórica.
+OBJETIVO: Escribir un poema de 4 versos utilizando SÍMILES sobre la PALABRA OBLIGATORIA indicada al final.
 
 REGLAS ABSOLUTAS:
-1. PALABRA CLAVE: La palabra '{palabra}' DEBE aparecer escrita literalmente en el poema.
+1. PALABRA CLAVE: La palabra obligatoria DEBE aparecer escrita literalmente en el poema.
 2. RECURSO: Cada verso debe contener una comparación usando la palabra 'como'.
 3. ESTRUCTURA: Exactamente 4 versos.
-4. ESTILO: {enfoque}.
+4. ESTILO: el indicado al final.
 5. No pongas títulos ni notas. Escribe solo el poema.
 
-EJEMPLO:
-"El {palabra} es como un mapa de venas,
+EJEMPLO (con la palabra 'corazón'):
+"El corazón es como un mapa de venas,
 late como un tambor en la sombra,
 su calor es como el fuego de la tierra,
 y su fuerza como el acero que no dobla."
+"""
 
+def construir_prompt(palabra, enfoque):
+    return f"""{INSTRUCCIONES}
+ESTILO: {enfoque}.
 TU TURNO. Palabra obligatoria: '{palabra}' y usar 'como'
 Poema:"""
 
-    payload = {
-        "model": MODELO,
+def crear_payload(prompt, modelo=MODELO):
+    return {
+        "model": modelo,
         "prompt": prompt,
         "stream": False,
         "options": {
@@ -58,92 +80,90 @@ Poema:"""
         }
     }
 
-    try:
-        response = requests.post(OLLAMA_URL, json=payload)
-        response.raise_for_status()
-        return response.json().get('response', '').strip()
-    except requests.exceptions.RequestException as e:
-        print(f"Error de conexión: {e}")
-        return None
-
-def validar_simil_simple(poema, palabra_objetivo):
-    """Verifica estructura, presencia de palabra y uso de 'como'."""
-    if not poema:
-        return False
-        
-    lineas = [l.strip().lower() for l in poema.split('\n') if l.strip()]
-    
-    if len(lineas) < 4:
-        return False
-    
-    if palabra_objetivo.lower() not in poema.lower():
-        return False
-
-    for linea in lineas[:4]:
-        if " como " not in f" {linea} ":
-            return False
-
-    return True
+async def generar_poema(cliente, palabra, enfoque, variante=0, modelo=MODELO):
+    payload = crear_payload(construir_prompt(palabra, enfoque), modelo)
+
+    # La caché en disco se consulta primero (ver ClienteOllama.generar)
+    return await cliente.generar(payload, reglas=reglas_streaming(palabra), variante=variante)
+
+async def generar_poemas(cliente, palabra, enfoques, variante=0, modelo=MODELO):
+    # Modo --multiple: un poema por enfoque en una sola petición con salida JSON
+    payload = payload_multiple(crear_payload(construir_prompt(palabra, ENFOQUE_MULTIPLE), modelo), enfoques)
+    return poemas_de_respuesta(await cliente.generar(payload, variante=variante), enfoques)
+
+def reglas_streaming(palabra):
+    # Versión incremental de la validación para abortar en modo --streaming
+    return [
+        regla_streaming(palabra),
+        regla_versos("simil"),
+        palabra_clave(palabra),
+        min_versos(4),
+    ]
+
+# Especificación de la figura para el motor unificado (generacion/motor.py)
+FIGURA = Figura(
+    nombre="simil",
+    directorio=os.path.dirname(os.path.abspath(__file__)),
+    generar=generar_poema,
+    validar=validador("simil"),
+    enfoques=ENFOQUES,
+    poemas_por_palabra=POEMAS_POR_PALABRA,
+    escribir_bloque=bloque_encabezado,
+    salida="resultados_simil/simil_lote_{:03d}.txt",
+    reintentos=MAX_REINTENTOS if USAR_REINTENTOS else 0,
+    texto_fallo="[FALLO]",
+    generar_multiple=generar_poemas,
+    cascada=CASCADA,
+)
+
+async def procesar_lotes(lote_nums, cliente, desde_cero=False, multiple=False, cascada=None):
+    out_dir = "resultados_simil"
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    # Reparte los enfoques entre todos los lotes según su tasa de aceptación
+    planificador = planificador_de(FIGURA)
+
+    async with cliente:
+        for lote_num in lote_nums:
+            str_lote = f"{lote_num:03d}"
+            lote_file = f"lotes/lote_{str_lote}.txt"
+            out_file = f"{out_dir}/simil_lote_{str_lote}.txt"
+
+            if not os.path.exists(lote_file):
+                print(f"\n[ERROR] No existe el archivo: {lote_file}.")
+                continue
+
+            # Reanuda desde el diario del lote (o empieza de cero con --desde-cero)
+            diario = Diario(out_file, reiniciar=desde_cero)
+
+            print(f"\n>>> INICIANDO PROCESO - LOTE: {str_lote}")
+
+            with open(lote_file, 'r', encoding='utf-8') as f_in:
+                palabras_lote = [line.strip() for line in f_in if line.strip()]
+
+            await procesar_lote_figura(
+                cliente, FIGURA, palabras_lote, out_file,
+                diario=diario, multiple=multiple, cascada=cascada, planificador=planificador
+            )
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("lote_nums", type=int, nargs="+", help="Números de lote")
+    parser.add_argument("--urls", nargs="+", default=[OLLAMA_URL], help="Uno o varios daemons de Ollama (se reparte la carga)")
+    parser.add_argument("--en-vuelo", type=int, default=EN_VUELO, help="Máximo de peticiones simultáneas por daemon")
+    parser.add_argument("--desde-cero", action="store_true", help="Ignorar el diario y regenerar el lote completo")
+    parser.add_argument("--streaming", action="store_true", help="Leer token a token y abortar los poemas que rompan las reglas")
+    parser.add_argument("--sin-cache", action="store_true", help="No consultar ni guardar respuestas en la caché en disco")
+    parser.add_argument("--cache-mb", type=int, default=512, help="Tamaño máximo de la caché antes de expulsar entradas")
+    parser.add_argument("--multiple", action="store_true", help="Pedir todos los poemas de cada palabra en una sola petición JSON")
+    parser.add_argument("--cascada", nargs="*", metavar="MODELO", help="Empezar por un modelo barato y escalar solo si el validador falla (por defecto CASCADA)")
     args = parser.parse_args()
 
-    out_dir = "resultados_simil"
-    if not os.path.exists(out_dir):
-        os.makedirs(out_dir)
-
-    for lote_num in args.lote_nums:
-        str_lote = f"{lote_num:03d}"
-        lote_file = f"lotes/lote_{str_lote}.txt"
-        out_file = f"{out_dir}/simil_lote_{str_lote}.txt"
-
-        if not os.path.exists(lote_file):
-            print(f"\n[ERROR] No existe el archivo: {lote_file}.")
-            continue
-
-        with open(out_file, 'w', encoding='utf-8') as f:
-            pass
-
-        print(f"\n>>> INICIANDO PROCESO - LOTE: {str_lote}")
-
-        with open(lote_file, 'r', encoding='utf-8') as f_in:
-            palabras_lote = [line.strip() for line in f_in if line.strip()]
-
-        with open(out_file, 'a', encoding='utf-8') as f_out:
-            for palabra in palabras_lote:
-                print(f"=== Procesando: '{palabra}' ===")
-                f_out.write(f"======[{palabra.upper()}]\n\n")
-                
-                for i in range(POEMAS_POR_PALABRA):
-                    enfoque_actual = ENFOQUES[i % len(ENFOQUES)]
-                    poema_final = ""
-                    intentos = 0
-                    
-                    while True:
-                        poema_generado = generar_poema(palabra, enfoque_actual)
-                        
-                        if validar_simil_simple(poema_generado, palabra):
-                            poema_final = poema_generado
-                            break
-                        else:
-                            intentos += 1
-                            if intentos <= MAX_REINTENTOS:
-                                print(f"    [R] Reintento {intentos} para '{palabra}'...")
-                                continue
-                            else:
-                                poema_final = poema_generado if poema_generado else "[FALLO]"
-                                break
-
-                    f_out.write(f"{poema_final}\n\n")
-                    f_out.write("---\n\n")
-                    f_out.flush()
-                    print(f"  ✓ [{i+1}/7] Generado")
-                    
-                    time.sleep(TIEMPO_ESPERA)
-
-                f_out.write("\n")
+    cache = None if args.sin_cache else CacheGeneracion(max_mb=args.cache_mb)
+    cascada = Cascada(args.cascada or CASCADA) if args.cascada is not None else None
+    cliente = ClienteOllama(args.urls, en_vuelo=args.en_vuelo, streaming=args.streaming, cache=cache)
+    asyncio.run(procesar_lotes(args.lote_nums, cliente, args.desde_cero, args.multiple, cascada))
 
     print(f"\n[PROCESO COMPLETO]")
 
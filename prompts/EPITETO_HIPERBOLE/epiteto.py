@@ -1,194 +1,228 @@
-import os
-import sys
-import time
-import json
-import requests
-import argparse
-
-# --- CONFIGURACIÓN ---
-OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
-MODELO = "qwen2.5:7b"
-POEMAS_POR_PALABRA = 7
-TIEMPO_ESPERA = 1
-
-USAR_REINTENTOS = True  
-MAX_REINTENTOS = 3      
-
-ENFOQUES = [
-    "ESTRUCTURA: Epíteto antepuesto (adjetivo + sustantivo)",
-    "ESTRUCTURA: Epíteto pospuesto (sustantivo + adjetivo)",
-    "ESTRUCTURA: Epíteto doble (dos adjetivos inherentes)",
-    "ESTRUCTURA: Epíteto reiterado (mismo sustantivo en cada verso)"
-    "TONO: Neutro descriptivo",
-    "TONO: Solemne",
-    "TONO: Melancólico contenido",
-    "TONO: Sereno"
-    "ESTILO: Clásico sobrio",
-    "ESTILO: Minimalista",
-    "ESTILO: Elevado",
-    "ESTILO: Arcaizante moderado"
-    "PERSPECTIVA: Natural (paisaje o fenómeno)",
-    "PERSPECTIVA: Temporal (paso del tiempo)",
-    "PERSPECTIVA: Espacial (cercanía / lejanía)",
-    "PERSPECTIVA: Abstracta concreta (idea sin metáfora)"
-    "REGISTRO: Lengua literaria estándar",
-    "REGISTRO: Tradición poética española",
-]
-
-def generar_poema(palabra, enfoque):
-    prompt = f"""Eres un poeta experto en retórica clasica española.
-
-OBJETIVO:
-Escribir un poema de 4 versos centrado exclusivamente en el USO DE EPÍTETOS
-(adjetivo calificativo + sustantivo) de carácter DESCRIPTIVO sobre: '{palabra}'.
-
-
-DEFINICIÓN OPERATIVA:
-Un epíteto estructural es un adjetivo calificativo NO RESTRICTIVO
-que acompaña a un sustantivo concreto y lo describe sin interpretarlo.
-
-REGLAS DE ORO (ESTRICTO):
-1. ESTRUCTURA DEL VERSO:
-   Cada verso DEBE contener al menos UN sintagma:
-   [ADJETIVO + SUSTANTIVO] claramente identificable.
-
-2. SUSTANTIVOS:
-   Usa solo sustantivos CONCRETOS y FÍSICOS
-   (cuerpo, naturaleza, objetos materiales).
-
-3. ADJETIVOS:
-   Usa solo adjetivos DESCRIPTIVOS FÍSICOS
-   (forma, textura, tamaño, temperatura, estado).
-   Prohibidos adjetivos emocionales, psicológicos o abstractos.
-
-4. POSICIÓN:
-   El adjetivo debe ir preferentemente ANTEPUESTO al sustantivo.
-
-5. VERBOS:
-   - O bien NO uses verbo en el verso,
-   - o usa SOLO verbos conjugados en forma personal
-     de esta lista: yace, se alza, se extiende, reposa, permanece.
-   PROHIBIDO el infinitivo.
-
-6. PERSONIFICACIÓN:
-   Prohibida cualquier acción humana o emocional.
-
-7. PRIORIDAD RETÓRICA:
-   El centro del verso debe ser el EPÍTETO, no la acción verbal.
-
-8. REPETICIÓN:
-   Se permite la repetición léxica como recurso estructural.
-
-9. LÉXICO:
-   Usa solo palabras existentes en el diccionario de la RAE.
-
-INSTRUCCIONES ESPECÍFICAS:
-Contexto/Tipo de epíteto: {enfoque}
-Palabra obligatoria: '{palabra}' (puede aparecer como sustantivo principal).
-
-FORMATO:
-Cuatro versos, sin explicación, sin títulos, sin comentarios.
-
-EJEMPLO DE ESTRUCTURA RIGUROSA:
-La blanca nieve cae,
-la fría noche avanza,
-el lento tiempo pasa,
-el viejo mundo calla.
-
-AUTOVERIFICACIÓN (INTERNA, NO ESCRIBIRLA):
-Antes de responder, comprueba que:
-- todos los versos tienen epíteto,
-- no hay infinitivos,
-- no hay personificación.
-
-TU TURNO (Escribe solo el poema de 4 versos):
-Poema:"""
-
-    payload = {
-        "model": MODELO,
-        "prompt": prompt,
-        "stream": False,
-        "options": {
-            "temperature": 0.7,
-            "top_p": 0.9,
-            "repeat_penalty": 1.0,
-            "num_predict": 120,
-            "stop": ["\n\n", "Nota:", "Análisis:", "Palabra:"]
-        }
-    }
-
-    try:
-        response = requests.post(OLLAMA_URL, json=payload)
-        response.raise_for_status()
-        return response.json().get('response', '').strip()
-    except requests.exceptions.RequestException as e:
-        print(f"Error de conexión: {e}")
-        return None
-
-def main():
-    parser = argparse.ArgumentParser()
-    # nargs='+' permite capturar uno o más números de lote
-    parser.add_argument("lote_nums", type=int, nargs="+", help="Lista de números de lote (ej: 1 2 3)")
-    args = parser.parse_args()
-
-    out_dir = "resultados_epiteto"
-    if not os.path.exists(out_dir):
-        os.makedirs(out_dir)
-
-    for lote_num in args.lote_nums:
-        str_lote = f"{lote_num:03d}"
-        lote_file = f"lotes/lote_{str_lote}.txt"
-        out_file = f"{out_dir}/epiteto_lote_{str_lote}.txt"
-
-        if not os.path.exists(lote_file):
-            print(f"[ERROR] No existe el archivo: {lote_file}. Saltando lote...")
-            continue
-
-        # Limpiar archivo de salida antes de empezar el lote
-        with open(out_file, 'w', encoding='utf-8') as f:
-            pass
-
-        print(f"\n>>> PROCESANDO LOTE: {str_lote}")
-
-        with open(lote_file, 'r', encoding='utf-8') as f_in:
-            palabras = [line.strip() for line in f_in if line.strip()]
-
-        with open(out_file, 'a', encoding='utf-8') as f_out:
-            for palabra in palabras:
-                print(f"=== Palabra: {palabra} ===")
-                
-                f_out.write(f"======[{palabra.upper()}]\n\n")
-                
-                for i in range(POEMAS_POR_PALABRA):
-                    enfoque_actual = ENFOQUES[i % len(ENFOQUES)]
-                    poema = ""
-                    intentos = 0
-                    
-                    while True:
-                        poema = generar_poema(palabra, enfoque_actual)
-                        if not poema: break
-                        
-                        if palabra.lower() in poema.lower():
-                            break
-                            
-                        if USAR_REINTENTOS and intentos < MAX_REINTENTOS:
-                            intentos += 1
-                            continue 
-                        break 
-
-                    if poema:
-                        f_out.write(f"{poema}\n\n")
-                        f_out.write("---\n\n")
-                        f_out.flush()
-                        print(f"  ✓ [{i+1}/{POEMAS_POR_PALABRA}] Generado")
-                    
-                    time.sleep(TIEMPO_ESPERA)
-
-                f_out.write("\n")
-
-        print(f"Lote {str_lote} finalizado. Salida en: {out_file}")
-
-    print("\n[PROCESO COMPLETO]")
-
-if __name__ == "__main__":
+import os
+import sys
+import asyncio
+import argparse
+
+# Permite importar los paquetes compartidos ('generacion', 'corpus') desde la raíz del repo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from corpus.basura import regla_streaming
+from corpus.validadores import validador
+from generacion.cache import CacheGeneracion
+from generacion.cascada import Cascada
+from generacion.cliente import ClienteOllama
+from generacion.diario import Diario
+from generacion.figuras import Figura
+from generacion.formato import bloque_encabezado
+from generacion.lote import procesar_lote_figura
+from generacion.multiple import ENFOQUE_MULTIPLE, payload_multiple, poemas_de_respuesta
+from generacion.planificador import planificador_de
+from generacion.vigilancia import max_versos, palabra_clave
+
+# --- CONFIGURACIÓN ---
+OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
+MODELO = "qwen2.5:7b"
+# Con --cascada: del modelo más barato al más caro, se escala solo si el validador rechaza
+CASCADA = ["qwen2.5:1.5b", "qwen2.5:3b", MODELO]
+POEMAS_POR_PALABRA = 7
+
+USAR_REINTENTOS = True  
+MAX_REINTENTOS = 3      
+
+# Máximo de peticiones simultáneas por daemon; el ritmo real lo ajusta ControlRitmo
+EN_VUELO = 8
+
+ENFOQUES = [
+    "ESTRUCTURA: Epíteto antepuesto (adjetivo + sustantivo)",
+    "ESTRUCTURA: Epíteto pospuesto (sustantivo + adjetivo)",
+    "ESTRUCTURA: Epíteto doble (dos adjetivos inherentes)",
+    "ESTRUCTURA: Epíteto reiterado (mismo sustantivo en cada verso)",
+    "TONO: Neutro descriptivo",
+    "TONO: Solemne",
+    "TONO: Melancólico contenido",
+    "TONO: Sereno",
+    "ESTILO: Clásico sobrio",
+    "ESTILO: Minimalista",
+    "ESTILO: Elevado",
+    "ESTILO: Arcaizante moderado",
+    "PERSPECTIVA: Natural (paisaje o fenómeno)",
+    "PERSPECTIVA: Temporal (paso del tiempo)",
+    "PERSPECTIVA: Espacial (cercanía / lejanía)",
+    "PERSPECTIVA: Abstracta concreta (idea sin metáfora)",
+    "REGISTRO: Lengua literaria estándar",
+    "REGISTRO: Tradición poética española",
+]
+
+# Bloque fijo del prompt: es idéntico en todas las peticiones para que Ollama
+# reutilice el prefijo ya procesado (caché KV). Lo variable va al final.
+INSTRUCCIONES = """Eres un poeta experto en retórica clasica española.
+
+OBJETIVO:
+Escribir un poema de 4 versos centrado exclusivamente en el USO DE EPÍTETOS
+(adjetivo calificativo + sustantivo) de carácter DESCRIPTIVO sobre la
+PALABRA OBLIGATORIA indicada al final.
+
+
+DEFINICIÓN OPERATIVA:
+Un epíteto estructural es un adjetivo calificativo NO RESTRICTIVO
+que acompaña a un sustantivo concreto y lo describe sin interpretarlo.
+
+REGLAS DE ORO (ESTRICTO):
+1. ESTRUCTURA DEL VERSO:
+   Cada verso DEBE contener al menos UN sintagma:
+   [ADJETIVO + SUSTANTIVO] claramente identificable.
+
+2. SUSTANTIVOS:
+   Usa solo sustantivos CONCRETOS y FÍSICOS
+   (cuerpo, naturaleza, objetos materiales).
+
+3. ADJETIVOS:
+   Usa solo adjetivos DESCRIPTIVOS FÍSICOS
+   (forma, textura, tamaño, temperatura, estado).
+   Prohibidos adjetivos emocionales, psicológicos o abstractos.
+
+4. POSICIÓN:
+   El adjetivo debe ir preferentemente ANTEPUESTO al sustantivo.
+
+5. VERBOS:
+   - O bien NO uses verbo en el verso,
+   - o usa SOLO verbos conjugados en forma personal
+     de esta lista: yace, se alza, se extiende, reposa, permanece.
+   PROHIBIDO el infinitivo.
+
+6. PERSONIFICACIÓN:
+   Prohibida cualquier acción humana o emocional.
+
+7. PRIORIDAD RETÓRICA:
+   El centro del verso debe ser el EPÍTETO, no la acción verbal.
+
+8. REPETICIÓN:
+   Se permite la repetición léxica como recurso estructural.
+
+9. LÉXICO:
+   Usa solo palabras existentes en el diccionario de la RAE.
+
+FORMATO:
+Cuatro versos, sin explicación, sin títulos, sin comentarios.
+
+EJEMPLO DE ESTRUCTURA RIGUROSA:
+La blanca nieve cae,
+la fría noche avanza,
+el lento tiempo pasa,
+el viejo mundo calla.
+
+AUTOVERIFICACIÓN (INTERNA, NO ESCRIBIRLA):
+Antes de responder, comprueba que:
+- todos los versos tienen epíteto,
+- no hay infinitivos,
+- no hay personificación."""
+
+def construir_prompt(palabra, enfoque):
+    return f"""{INSTRUCCIONES}
+
+INSTRUCCIONES ESPECÍFICAS:
+Contexto/Tipo de epíteto: {enfoque}
+Palabra obligatoria: '{palabra}' (puede aparecer como sustantivo principal).
+
+TU TURNO (Escribe solo el poema de 4 versos):
+Poema:"""
+
+def crear_payload(prompt, modelo=MODELO):
+    return {
+        "model": modelo,
+        "prompt": prompt,
+        "stream": False,
+        "options": {
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "repeat_penalty": 1.0,
+            "num_predict": 120,
+            "stop": ["\n\n", "Nota:", "Análisis:", "Palabra:"]
+        }
+    }
+
+async def generar_poema(cliente, palabra, enfoque, variante=0, modelo=MODELO):
+    payload = crear_payload(construir_prompt(palabra, enfoque), modelo)
+
+    # La caché en disco se consulta primero (ver ClienteOllama.generar)
+    return await cliente.generar(payload, reglas=reglas_streaming(palabra), variante=variante)
+
+async def generar_poemas(cliente, palabra, enfoques, variante=0, modelo=MODELO):
+    # Modo --multiple: un poema por enfoque en una sola petición con salida JSON
+    payload = payload_multiple(crear_payload(construir_prompt(palabra, ENFOQUE_MULTIPLE), modelo), enfoques)
+    return poemas_de_respuesta(await cliente.generar(payload, variante=variante), enfoques)
+
+def reglas_streaming(palabra):
+    # Versión incremental de la validación para abortar en modo --streaming
+    return [regla_streaming(palabra), max_versos(4), palabra_clave(palabra)]
+
+# Especificación de la figura para el motor unificado (generacion/motor.py)
+FIGURA = Figura(
+    nombre="epiteto",
+    directorio=os.path.dirname(os.path.abspath(__file__)),
+    generar=generar_poema,
+    validar=validador("epiteto"),
+    enfoques=ENFOQUES,
+    poemas_por_palabra=POEMAS_POR_PALABRA,
+    escribir_bloque=bloque_encabezado,
+    salida="resultados_epiteto/epiteto_lote_{:03d}.txt",
+    reintentos=MAX_REINTENTOS if USAR_REINTENTOS else 0,
+    generar_multiple=generar_poemas,
+    cascada=CASCADA,
+)
+
+async def procesar_lotes(lote_nums, cliente, desde_cero=False, multiple=False, cascada=None):
+    out_dir = "resultados_epiteto"
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    # Reparte los enfoques entre todos los lotes según su tasa de aceptación
+    planificador = planificador_de(FIGURA)
+
+    async with cliente:
+        for lote_num in lote_nums:
+            str_lote = f"{lote_num:03d}"
+            lote_file = f"lotes/lote_{str_lote}.txt"
+            out_file = f"{out_dir}/epiteto_lote_{str_lote}.txt"
+
+            if not os.path.exists(lote_file):
+                print(f"[ERROR] No existe el archivo: {lote_file}. Saltando lote...")
+                continue
+
+            # Reanuda desde el diario del lote (o empieza de cero con --desde-cero)
+            diario = Diario(out_file, reiniciar=desde_cero)
+
+            print(f"\n>>> PROCESANDO LOTE: {str_lote}")
+
+            with open(lote_file, 'r', encoding='utf-8') as f_in:
+                palabras = [line.strip() for line in f_in if line.strip()]
+
+            await procesar_lote_figura(
+                cliente, FIGURA, palabras, out_file,
+                diario=diario, multiple=multiple, cascada=cascada, planificador=planificador
+            )
+
+            print(f"Lote {str_lote} finalizado. Salida en: {out_file}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    # nargs='+' permite capturar uno o más números de lote
+    parser.add_argument("lote_nums", type=int, nargs="+", help="Lista de números de lote (ej: 1 2 3)")
+    parser.add_argument("--urls", nargs="+", default=[OLLAMA_URL], help="Uno o varios daemons de Ollama (se reparte la carga)")
+    parser.add_argument("--en-vuelo", type=int, default=EN_VUELO, help="Máximo de peticiones simultáneas por daemon")
+    parser.add_argument("--desde-cero", action="store_true", help="Ignorar el diario y regenerar el lote completo")
+    parser.add_argument("--streaming", action="store_true", help="Leer token a token y abortar los poemas que rompan las reglas")
+    parser.add_argument("--sin-cache", action="store_true", help="No consultar ni guardar respuestas en la caché en disco")
+    parser.add_argument("--cache-mb", type=int, default=512, help="Tamaño máximo de la caché antes de expulsar entradas")
+    parser.add_argument("--multiple", action="store_true", help="Pedir todos los poemas de cada palabra en una sola petición JSON")
+    parser.add_argument("--cascada", nargs="*", metavar="MODELO", help="Empezar por un modelo barato y escalar solo si el validador falla (por defecto CASCADA)")
+    args = parser.parse_args()
+
+    cache = None if args.sin_cache else CacheGeneracion(max_mb=args.cache_mb)
+    cascada = Cascada(args.cascada or CASCADA) if args.cascada is not None else None
+    cliente = ClienteOllama(args.urls, en_vuelo=args.en_vuelo, streaming=args.streaming, cache=cache)
+    asyncio.run(procesar_lotes(args.lote_nums, cliente, args.desde_cero, args.multiple, cascada))
+
+    print("\n[PROCESO COMPLETO]")
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,64 @@
+# lemas.py
+# Construye (una sola vez, offline) la tabla forma -> lema que usa corpus/lemas.py
+# para aceptar flexiones de la palabra clave ("lloramos" por "llorar", "lunas" por "luna").
+import os
+import sys
+import json
+import argparse
+
+import spacy
+
+DIR_TOOLS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIR_TOOLS))
+from corpus.lemas import RUTA_LEMAS, RE_TOKEN, normalizar
+
+# parámetros (rutas fijas respecto a tools/, se ejecute desde donde se ejecute)
+MODELO_SPACY = "es_core_news_md"
+VOCAB = os.path.join(DIR_TOOLS, "vocab_poetico.txt")
+SALIDA = RUTA_LEMAS     # tools/lemas.json, donde la lee corpus/lemas.py
+RAICES_CORPUS = [os.path.join(DIR_TOOLS, "..", "figures"), os.path.join(DIR_TOOLS, "..", "prompts")]
+
+
+def palabras_del_corpus(raices):
+    """Todas las formas que el modelo ya ha escrito en los lotes generados."""
+    from corpus.validar import buscar_archivos, poemas_de_archivo
+
+    formas = set()
+    for _, ruta in buscar_archivos(raices):
+        for _, poema in poemas_de_archivo(ruta):
+            formas.update(RE_TOKEN.findall(poema.lower()))
+    return formas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tabla de lemas para el chequeo de palabra clave")
+    parser.add_argument("--corpus", action="store_true", help="Añadir también las formas de los lotes ya generados")
+    args = parser.parse_args()
+
+    with open(VOCAB, "r", encoding="utf-8") as f:
+        formas = {line.strip().lower() for line in f if line.strip()}
+    print(f"1. Vocabulario: {len(formas)} palabras")
+
+    if args.corpus:
+        formas |= palabras_del_corpus(RAICES_CORPUS)
+        print(f"   → {len(formas)} formas con las del corpus")
+
+    print("2. Cargando spaCy...")
+    nlp = spacy.load(MODELO_SPACY, disable=["ner", "parser"])
+
+    print("3. Lematizando...")
+    lemas = {}
+    for doc in nlp.pipe(sorted(formas), batch_size=5000):
+        token = doc[0]
+        forma, lema = normalizar(token.text), normalizar(token.lemma_)
+        # Solo se guardan las formas que no son ya su propio lema
+        if lema and lema != forma:
+            lemas[forma] = lema
+
+    with open(SALIDA, "w", encoding="utf-8") as f:
+        json.dump(lemas, f, ensure_ascii=False, sort_keys=True)
+    print(f"\n✓ Completado: {len(lemas)} formas flexionadas guardadas en {SALIDA}")
+
+
+if __name__ == "__main__":
+    main()